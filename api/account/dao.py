@@ -1,9 +1,12 @@
-from sqlalchemy import select, and_
-from sqlalchemy.exc import NoResultFound
+from datetime import datetime
+
+from sqlalchemy import select, and_, or_, update
 from sqlalchemy.exc import NoResultFound, IntegrityError
 
 from dao.base import BaseDAO
-from src.db import User, async_session_maker
+from src.db import AuthorizationArchive, User, async_session_maker
+from exceptions import EdgeUserCreateException
+from config import settings
 
 
 class UserDAO(BaseDAO):
@@ -31,22 +34,90 @@ class UserDAO(BaseDAO):
     async def register_user(cls, user: User):
         """
         Регистрация нового пользователя.
+
+        Уникальность логина и email гарантируют индексы ix_users_login и
+        ix_users_email, поэтому вместо предварительных SELECT делаем
+        одну вставку и разбираем IntegrityError. MySQL называет в ошибке
+        индекс, SQLite (узел склада) - колонку.
         """
-        async with async_session_maker() as session:
-            # Проверяем существование пользователя по логину
-            result = await session.execute(select(User).filter_by(login=user.login))
-            if result.scalar_one_or_none():
-                return 'login_exists'
-            
-            # Проверяем существование пользователя по email
-            result = await session.execute(select(User).filter_by(email=user.email))
-            if result.scalar_one_or_none():
-                return 'email_exists'
+        if settings.EDGE_MODE:
+            # Таблицу users узла заменяет снимок центра (src/sync.py)
+            raise EdgeUserCreateException
 
+        async with async_session_maker() as session:
             session.add(user)
             try:
                 await session.commit()
                 return 'success'
-            except IntegrityError:
+            except IntegrityError as e:
                 await session.rollback()
-                return 'error'
\ No newline at end of file
+
+                error = str(e.orig)
+                if 'ix_users_login' in error or 'users.login' in error:
+                    return 'login_exists'
+                if 'ix_users_email' in error or 'users.email' in error:
+                    return 'email_exists'
+
+                return 'error'
+
+    @classmethod
+    async def bump_state(cls, user_id: int, **values) -> bool:
+        """
+        Изменяет пользователя и увеличивает его state_version: выданные
+        ранее access- и refresh-токены перестают приниматься (src/user_state.py).
+        Используется для блокировки, смены группы и пароля.
+        :return: False, если пользователь не найден.
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    **values,
+                    state_version=User.state_version + 1,
+                    state_changed_at=datetime.utcnow()
+                )
+            )
+            await session.commit()
+            return result.rowcount > 0
+
+    @classmethod
+    async def set_blocked(cls, user_id: int, is_blocked: bool) -> bool:
+        return await cls.bump_state(user_id, is_blocked=is_blocked)
+
+
+class AuthorizationArchiveDAO(BaseDAO):
+    model = AuthorizationArchive
+
+    @classmethod
+    async def history(
+        cls,
+        user_id: int,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+        limit: int = 100,
+        before_id: int | None = None
+    ) -> list:
+        """
+        Авторизации пользователя за период, новые первыми
+        (ix_authorization_archive_user_time). Следующая страница -
+        запрос с date_to и before_id, равными auth_time и id последней
+        записи: записи одной пачки буфера могут иметь одинаковый auth_time,
+        поэтому курсор - пара (auth_time, id).
+        Записи последних AUTH_ARCHIVE_FLUSH_SECONDS могут быть еще в буфере.
+        """
+        query = select(AuthorizationArchive.__table__.columns).where(AuthorizationArchive.user_id == user_id)
+        if date_from is not None:
+            query = query.where(AuthorizationArchive.auth_time >= date_from)
+        if date_to is not None and before_id is not None:
+            query = query.where(or_(
+                AuthorizationArchive.auth_time < date_to,
+                and_(AuthorizationArchive.auth_time == date_to, AuthorizationArchive.id < before_id)
+            ))
+        elif date_to is not None:
+            query = query.where(AuthorizationArchive.auth_time < date_to)
+        query = query.order_by(AuthorizationArchive.auth_time.desc(), AuthorizationArchive.id.desc()).limit(limit)
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return result.mappings().all()
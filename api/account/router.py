@@ -1,5 +1,4 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, status, Body
 from fastapi.security import OAuth2PasswordBearer  
 from typing import Annotated
 from datetime import datetime
@@ -8,15 +7,21 @@ from src.db import User, async_session_maker
 
 from sqlalchemy.future import select
 
-from src.auth import create_access_token, get_current_user
-from api.models import UserStructure
-from api.account.dao import UserDAO
+from src.auth import create_token_pair, get_current_user, refresh_token_pair
+from src.auth_archive import authorization_recorder
+from src.ratelimit import client_ip
+from src.permissions import Rule, require_rule
+from api.models import CurrentUser, UserStructure
+from api.account.dao import AuthorizationArchiveDAO, UserDAO
 from exceptions import (
+    FailCheckUserData,
+    UserIsBlocked,
     UserCreateErrorException, 
     UserLoginAlreadyExistsException,
     UserEmailAlreadyExistsException
 )
 from src.logger import _logger
+from src.responses import JSONResponse
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -61,39 +66,27 @@ async def registration(
         requires_password_reset=False
     )
 
-    async with async_session_maker() as session:
-        result = await session.execute(select(User).filter_by(login=login))
-        existing_user = result.scalar_one_or_none()
-
-        if existing_user:
-            _logger.error(UserLoginAlreadyExistsException.detail, extra={
-                'ActionError': UserLoginAlreadyExistsException.__name__,
-                'login': login
-            })
-
-            raise UserLoginAlreadyExistsException
-
-        result = await session.execute(select(User).filter_by(email=email))
-        existing_user = result.scalar_one_or_none()
-
-        if existing_user:
-            _logger.error(UserEmailAlreadyExistsException.detail, extra={
-                'ActionError': UserEmailAlreadyExistsException.__name__,
-                'email': email
-            })
-            raise UserEmailAlreadyExistsException
-        
-        # Временная затычка
-        session.add(user)
-        try:
-            await session.commit()
-        except:
-            await session.rollback()
-            _logger.error(UserCreateErrorException.detail, extra={
-                'ActionError': UserCreateErrorException.__name__
-            })
-
-            raise UserCreateErrorException
+    result = await UserDAO.register_user(user)
+
+    if result == 'login_exists':
+        _logger.error(UserLoginAlreadyExistsException.detail, extra={
+            'ActionError': UserLoginAlreadyExistsException.__name__,
+            'login': login
+        })
+        raise UserLoginAlreadyExistsException
+
+    if result == 'email_exists':
+        _logger.error(UserEmailAlreadyExistsException.detail, extra={
+            'ActionError': UserEmailAlreadyExistsException.__name__,
+            'email': email
+        })
+        raise UserEmailAlreadyExistsException
+
+    if result != 'success':
+        _logger.error(UserCreateErrorException.detail, extra={
+            'ActionError': UserCreateErrorException.__name__
+        })
+        raise UserCreateErrorException
 
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
@@ -106,6 +99,7 @@ async def registration(
     description='Авторизовывает пользователя'
 )
 async def authorization(
+    request: Request,
     login: str = Query(..., description='Логин пользователя'),
     password: str = Query(..., description='Пароль пользователя')
 ) -> JSONResponse:
@@ -123,11 +117,11 @@ async def authorization(
             content={'message': 'Неверный логин или пароль'}
         )
 
-    jwt_token = create_access_token(
-        data={
-            'id': user_data.id
-        }
-    )
+    if user_data.is_blocked:
+        raise UserIsBlocked
+
+    tokens = await create_token_pair(user_data)
+    await authorization_recorder.record(user_data.id, client_ip(request.scope))
     
     return JSONResponse(
         status_code=status.HTTP_200_OK,
@@ -136,18 +130,103 @@ async def authorization(
             'data': {
                 'id': user_data.id,
                 'login': user_data.login,
-                'token': jwt_token
+                **tokens
             }
         }
     )
 
+@router.post(
+    path='/refresh',
+    status_code=status.HTTP_200_OK,
+    description='Выдает новую пару токенов по refresh-токену'
+)
+async def refresh(
+    refresh_token: str = Body(..., embed=True, description='Refresh-токен, выданный при авторизации')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Токены обновлены',
+            'data': await refresh_token_pair(refresh_token)
+        }
+    )
+
+@router.put(
+    path='/{user_id}/block',
+    status_code=status.HTTP_200_OK,
+    description='Блокирует или разблокирует пользователя; токены пользователя перестают действовать'
+)
+async def block_user(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_USERS))],
+    user_id: int,
+    is_blocked: bool = Body(True, embed=True, description='True - заблокировать, False - разблокировать')
+) -> JSONResponse:
+    if not await UserDAO.set_blocked(user_id, is_blocked):
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'message': 'Пользователь с указанным ID не найден'}
+        )
+
+    _logger.info('Изменена блокировка пользователя', extra={
+        'UserId': user_id, 'IsBlocked': is_blocked, 'ByUserId': current_user.id
+    })
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'message': 'Пользователь заблокирован' if is_blocked else 'Пользователь разблокирован'}
+    )
+
+async def _authorization_history(
+    user_id: int,
+    date_from: datetime | None,
+    date_to: datetime | None,
+    limit: int,
+    before_id: int | None
+) -> JSONResponse:
+    history = await AuthorizationArchiveDAO.history(user_id, date_from, date_to, limit, before_id)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'История авторизаций получена',
+            'data': history
+        }
+    )
+
+@router.get(
+    path='/me/authorizations',
+    status_code=status.HTTP_200_OK,
+    description='История своих авторизаций'
+)
+async def get_my_authorizations(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    date_from: datetime | None = Query(None, description='Начало периода (UTC)'),
+    date_to: datetime | None = Query(None, description='Конец периода (UTC), не включительно'),
+    limit: int = Query(100, ge=1, le=1000, description='Максимум записей'),
+    before_id: int | None = Query(None, description='Следующая страница: ID последней записи, date_to - ее auth_time')
+) -> JSONResponse:
+    return await _authorization_history(current_user.id, date_from, date_to, limit, before_id)
+
+@router.get(
+    path='/{user_id}/authorizations',
+    status_code=status.HTTP_200_OK,
+    description='История авторизаций пользователя (нужно правило VIEW_LOGS)'
+)
+async def get_user_authorizations(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.VIEW_LOGS))],
+    user_id: int,
+    date_from: datetime | None = Query(None, description='Начало периода (UTC)'),
+    date_to: datetime | None = Query(None, description='Конец периода (UTC), не включительно'),
+    limit: int = Query(100, ge=1, le=1000, description='Максимум записей'),
+    before_id: int | None = Query(None, description='Следующая страница: ID последней записи, date_to - ее auth_time')
+) -> JSONResponse:
+    return await _authorization_history(user_id, date_from, date_to, limit, before_id)
+
 @router.get(
     path='/me',
     status_code=status.HTTP_200_OK,
     description='Получение информации о себе'
 )
 async def get_my_account(
-    current_user: Annotated[UserStructure, Depends(get_current_user)]
+    current_user: Annotated[CurrentUser, Depends(get_current_user)]
 ) -> JSONResponse:
     """
     Эндпоинт для получения информации о себе.
@@ -155,26 +234,17 @@ async def get_my_account(
     :param current_user: Данные текущего пользователя.
     :return: Информация о пользователе.
     """
+    # Токен содержит только ID и группу, профиль читается из БД
+    user = await UserDAO.find_one_or_none(id=current_user.id)
+    if user is None:
+        raise FailCheckUserData
+
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
             'message': 'Информация была успешно получена',
-            'data': {
-                'id': current_user.id,
-                'login': current_user.login,
-                'name': current_user.name,
-                'surname': current_user.surname,
-                'email': current_user.email,
-                'phone_number': current_user.phone_number,
-                'group_id': current_user.group_id,
-                'city_id': current_user.city_id,
-                'prefix': current_user.prefix,
-                'status': current_user.status,
-                'two_factor': current_user.two_factor,
-                'is_blocked': current_user.is_blocked,
-                'requires_password_reset': current_user.requires_password_reset,
-                'created_at': str(current_user.created_at),
-            }
+            # password_hash исключен из сериализации в UserStructure
+            'data': UserStructure(**user)
         }
     )
 
@@ -184,7 +254,7 @@ async def get_my_account(
     description='Обновляет информацию своего профиля'
 )
 async def get_my_account(
-    current_user: Annotated[UserStructure, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
     new_data: UserStructure = Body(..., description='Новые данные пользователя')
 ) -> JSONResponse:
     ...
\ No newline at end of file
@@ -0,0 +1,146 @@
+import json
+import os
+import uuid
+
+from fastapi import APIRouter, Depends, File, Query, UploadFile, status
+from fastapi.responses import RedirectResponse
+from typing import Annotated
+
+from src.permissions import Rule, require_rule
+from api.models import CurrentUser
+from api.task.dao import TaskDAO, TaskStatus
+from src.exporter import EXPORT_WRITERS
+from src.importer import SUPPORTED_FORMATS, SUPPORTED_KINDS
+from src.manager import S3Data, TaskManager
+from src.s3 import _S3Connector
+from src.responses import JSONResponse
+from config import settings
+
+router = APIRouter(
+    prefix='/data',
+    tags=['Data']
+)
+
+@router.post(
+    path='/import',
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Загружает CSV/XLSX файл и ставит задачу импорта предметов или поставщиков'
+)
+async def import_data(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.IMPORT_DATA))],
+    kind: str = Query(..., description=f'Что импортируем: {", ".join(SUPPORTED_KINDS)}'),
+    file: UploadFile = File(..., description='Файл CSV (UTF-8) или XLSX с заголовками в первой строке')
+) -> JSONResponse:
+    """
+    Файл потоком загружается в S3, сам импорт выполняется фоновой задачей.
+    Ход импорта и ошибки по строкам доступны через GET /task/{task_id}.
+    """
+    file_format = os.path.splitext(file.filename or '')[1].lstrip('.').lower()
+    if kind not in SUPPORTED_KINDS or file_format not in SUPPORTED_FORMATS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': 'Неподдерживаемый тип импорта или формат файла'}
+        )
+
+    file_key = f'imports/{uuid.uuid4()}.{file_format}'
+    async with _S3Connector(S3Data) as s3:
+        await s3.upload_fileobj(fileobj=file.file, key=file_key)
+
+    task_id = await TaskManager().create_task(
+        'import_data',
+        payload={'kind': kind, 'format': file_format, 'file_key': file_key},
+        user_id=current_user.id,
+        # Повтор после частично вставленных пачек продублировал бы строки
+        max_attempts=1
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'message': 'Импорт поставлен в очередь',
+            'data': {'task_id': task_id}
+        }
+    )
+
+@router.post(
+    path='/export',
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Ставит задачу выгрузки предметов склада в CSV, XLSX или Parquet'
+)
+async def export_data(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.EXPORT_DATA))],
+    file_format: str = Query('csv', alias='format', description=f'Формат: {", ".join(EXPORT_WRITERS)}'),
+    depot_id: int | None = Query(None, description='Выгрузить только один склад')
+) -> JSONResponse:
+    if file_format not in EXPORT_WRITERS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': 'Неподдерживаемый формат экспорта'}
+        )
+
+    task_id = await TaskManager().create_task(
+        'export_data',
+        payload={'format': file_format, 'depot_id': depot_id},
+        user_id=current_user.id
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'message': 'Экспорт поставлен в очередь',
+            'data': {'task_id': task_id}
+        }
+    )
+
+@router.get(
+    path='/export/{task_id}',
+    status_code=status.HTTP_200_OK,
+    description='Ссылка на готовый экспорт или переход к скачиванию (download=true)'
+)
+async def get_export(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.EXPORT_DATA))],
+    task_id: int,
+    download: bool = Query(False, description='Сразу перенаправить на скачивание файла')
+):
+    task = await TaskDAO.find_one_or_none(id=task_id, task_type='export_data')
+    # Ночные экспорты ставит планировщик, у них нет владельца: их может
+    # скачать любой пользователь с правом EXPORT_DATA
+    if task is None or task['user_id'] not in (None, current_user.id):
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'message': 'Экспорт с указанным ID не найден'}
+        )
+
+    if task['status'] != TaskStatus.DONE:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={
+                'message': 'Экспорт еще не готов',
+                'data': {'status': task['status'], 'progress': task['progress']}
+            }
+        )
+
+    result = json.loads(task['result'])
+    async with _S3Connector(S3Data) as s3:
+        url = await s3.presigned_url(
+            result['file_key'],
+            expires_in=settings.EXPORT_LINK_TTL,
+            filename=result['file_name']
+        )
+
+    if download:
+        return RedirectResponse(url=url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Экспорт готов',
+            'data': {
+                'url': url,
+                'expires_in': settings.EXPORT_LINK_TTL,
+                'file_name': result['file_name'],
+                'rows': result['rows'],
+                'size': result['size'],
+            }
+        }
+    )
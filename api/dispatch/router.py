@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, status
+from typing import Annotated
+
+from src.permissions import Rule, require_rule
+from api.models import DispatchPlanRequest, CurrentUser
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/dispatch',
+    tags=['Dispatch']
+)
+
+@router.post(
+    path='/plan',
+    status_code=status.HTTP_200_OK,
+    description='Распределяет отправки по машинам и строит маршрут объезда складов для каждой'
+)
+async def create_dispatch_plan(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.DISPATCH))],
+    request: DispatchPlanRequest
+) -> JSONResponse:
+    # src.routing тянет NumPy, он нужен только этому эндпоинту
+    from src.routing import plan_dispatch
+
+    try:
+        plan = await plan_dispatch(request)
+    except ValueError as e:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': str(e)}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'План доставки построен',
+            'data': plan
+        }
+    )
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Body, Depends, status
+from typing import Annotated, List
+
+from src.permissions import Rule, require_rule
+from api.models import CurrentUser, WriteOffActRequest
+from src.manager import TaskManager
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/document',
+    tags=['Document']
+)
+
+@router.post(
+    path='/write-off-acts',
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Ставит задачу пакетной генерации актов о списании (docx)'
+)
+async def create_write_off_acts(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    acts: List[WriteOffActRequest] = Body(..., min_length=1, description='Акты для генерации')
+) -> JSONResponse:
+    """
+    Акты рендерятся фоновой задачей generate_report; ссылки на готовые
+    файлы появляются в результате задачи (GET /task/{task_id}).
+    """
+    task_id = await TaskManager().create_task(
+        'generate_report',
+        payload={
+            'report': 'write_off_acts',
+            'acts': [act.model_dump() for act in acts],
+        },
+        user_id=current_user.id
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'message': 'Генерация актов поставлена в очередь',
+            'data': {'task_id': task_id}
+        }
+    )
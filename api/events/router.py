@@ -0,0 +1,106 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
+from typing import Annotated
+
+from src.auth import get_current_user
+from api.models import CurrentUser
+from src.events import StockSubscription, stock_events
+from src.responses import JSONResponse, dumps
+from config import settings
+
+router = APIRouter(
+    prefix='/events',
+    tags=['Events']
+)
+
+
+def _subscribe(depot_id: list[int] | None, section_id: list[int] | None) -> StockSubscription | None:
+    return stock_events.subscribe(
+        depot_ids=set(depot_id) if depot_id else None,
+        section_ids=set(section_id) if section_id else None
+    )
+
+
+@router.websocket('/stock/ws')
+async def stock_events_ws(
+    websocket: WebSocket,
+    token: str = Query(..., description='Access-токен: браузер не передает заголовки при открытии WebSocket'),
+    depot_id: list[int] | None = Query(None, description='Склады, по умолчанию все'),
+    section_id: list[int] | None = Query(None, description='Секции, по умолчанию все')
+) -> None:
+    """
+    Поток изменений остатков. Каждое сообщение - JSON-массив событий
+    (src/events.py).
+    """
+    try:
+        await get_current_user(token)
+    except Exception:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    subscription = _subscribe(depot_id, section_id)
+    if subscription is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await websocket.accept()
+
+    async def pump() -> None:
+        while True:
+            batch = await subscription.next_batch()
+            await websocket.send_bytes(dumps(batch))
+
+    async def drain() -> None:
+        # Сообщения клиента не нужны, но читать их надо, чтобы заметить отключение
+        while True:
+            await websocket.receive_text()
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        stock_events.unsubscribe(subscription)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.get(
+    path='/stock',
+    status_code=status.HTTP_200_OK,
+    description='Поток изменений остатков (Server-Sent Events)'
+)
+async def stock_events_sse(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    depot_id: list[int] | None = Query(None, description='Склады, по умолчанию все'),
+    section_id: list[int] | None = Query(None, description='Секции, по умолчанию все')
+):
+    subscription = _subscribe(depot_id, section_id)
+    if subscription is None:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={'message': 'Слишком много подписчиков, попробуйте позже'}
+        )
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.next_batch(), settings.STOCK_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Комментарий SSE не дает прокси закрыть простаивающее соединение
+                    yield b': ping\n\n'
+                    continue
+                yield b'event: stock\ndata: ' + dumps(batch) + b'\n\n'
+        finally:
+            stock_events.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -4,30 +4,26 @@ from sqlalchemy.exc import NoResultFound
 from dao.base import BaseDAO
 from src.db import GroupUsers, async_session_maker
 from api.models import GroupUsersStructure
+from src.cache import response_cache, CacheNamespace
+from src.permissions import permission_cache
 
 
 class GroupDAO(BaseDAO):
     model = GroupUsers
 
     @classmethod
-    async def get_all(self) -> dict | None:
+    async def get_all(self) -> list | None:
         """
         Получает все группы
         """
         query = select(GroupUsers.id, GroupUsers.name, GroupUsers.rules)
         async with async_session_maker() as session:
             result = await session.execute(query)
-            return [
-                {
-                    'id': row.id, 
-                    'name': row.name, 
-                    'rules': row.rules
-                } 
-                for row in result.fetchall()
-            ]
+            # Строки отдаются как есть, их сериализует src.responses.JSONResponse
+            return result.mappings().all()
             
     @classmethod
-    async def delete_group(group_id: int) -> bool:
+    async def delete_group(cls, group_id: int) -> bool:
         """
         Удаление группы
         """
@@ -42,13 +38,15 @@ class GroupDAO(BaseDAO):
             await session.delete(group)
             try:
                 await session.commit()  
+                response_cache.invalidate(CacheNamespace.GROUPS)
+                permission_cache.drop_group(group_id)
                 return True
             except:
                 await session.rollback() 
                 return False
 
     @classmethod
-    async def update_group(group_data: GroupUsersStructure) -> GroupUsers | None:
+    async def update_group(cls, group_data: GroupUsersStructure) -> GroupUsers | None:
         """
         Обновление данных группы
         """
@@ -65,6 +63,8 @@ class GroupDAO(BaseDAO):
 
             try:
                 await session.commit() 
+                response_cache.invalidate(CacheNamespace.GROUPS)
+                permission_cache.set_group(group.id, group_data.rules)
                 return group
             except:
                 await session.rollback()  
@@ -1,17 +1,19 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status, Body
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, status, Body
 from fastapi.security import OAuth2PasswordBearer  
 from typing import Annotated
 from sqlalchemy.future import select
 
 from src.auth import create_access_token, get_current_user
 from api.models import (
-    UserStructure, GroupUsersStructure
+    CurrentUser, GroupUsersStructure
 )
 from src.db import async_session_maker, GroupUsers
 from api.group.dao import GroupDAO
 from exceptions import GroupDeleteErrorException
 from src.logger import _logger
+from src.responses import JSONResponse
+from src.cache import response_cache, CacheNamespace
+from src.permissions import Rule, permission_cache, require_rule
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -26,9 +28,21 @@ router = APIRouter(
     description='Получает все группы или список всех групп'
 )
 async def get_group(
-    current_user: Annotated[UserStructure, Depends(get_current_user)],
+    request: Request,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
     group_id: int | None = None
-) -> JSONResponse:
+) -> Response:
+    # Группы меняются редко: ответ кэшируется и сбрасывается при
+    # создании, обновлении и удалении группы
+    return await response_cache.respond(
+        CacheNamespace.GROUPS,
+        request,
+        permission_key=current_user.group_id,
+        build=lambda: _build_group_response(group_id)
+    )
+
+
+async def _build_group_response(group_id: int | None) -> JSONResponse:
     if group_id is None:
         if groups := await GroupDAO.get_all(): 
             return JSONResponse(
@@ -76,7 +90,7 @@ async def get_group(
     description='Создает группу'
 )
 async def create_group(
-    current_user: Annotated[UserStructure, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_GROUPS))],
     data: GroupUsersStructure
 ) -> JSONResponse:
     group = GroupUsers(name=data.name)
@@ -95,6 +109,9 @@ async def create_group(
                 }
             ) 
     
+    response_cache.invalidate(CacheNamespace.GROUPS)
+    permission_cache.set_group(group.id, data.rules)
+
     return JSONResponse(
         status_code=status.HTTP_200_OK,
         content={
@@ -113,7 +130,7 @@ async def create_group(
     description='Обновляет данные группы'
 )
 async def update_group(
-    current_user: Annotated[UserStructure, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_GROUPS))],
     nw_data: GroupUsersStructure
 ) -> JSONResponse:
     if await GroupDAO.update_group(nw_data):
@@ -137,7 +154,7 @@ async def update_group(
     description='Удаляет группу по ID'
 )
 async def delete_group(
-    current_user: Annotated[UserStructure, Depends(get_current_user)],
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_GROUPS))],
     group_id: int = Query(..., description='ID группы для удаления')
 ) -> JSONResponse:
     group = await GroupDAO.delete_group(group_id)
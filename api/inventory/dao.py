@@ -0,0 +1,348 @@
+import importlib
+
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+
+from sqlalchemy import case, func, insert, literal, select, update
+
+from dao.base import BaseDAO
+from src.changelog import log_item_changes
+from src.db import Depot, DepotItems, InventoryCount, InventoryCountLine, async_session_maker
+from src.events import stock_events
+from src.expiration import expiration_index
+from src.reservations import availability_index
+from src.stock_summary import SUMMARY_COLUMNS, StockDelta, apply_stock_delta
+from exceptions import InventoryCountNotFoundException, InventoryCountStateException
+from config import settings
+
+
+# Сколько ID предметов с урезанной корректировкой попадает в итог применения
+CLAMPED_REPORT_LIMIT = 1000
+
+
+class InventoryCountStatus:
+    OPEN: str = 'open'             # Идет подсчет
+    APPLYING: str = 'applying'     # Корректировки применяются (задача close_inventory_count)
+    CLOSED: str = 'closed'
+    CANCELLED: str = 'cancelled'
+
+
+def _upsert_lines(dialect_name: str):
+    table = InventoryCountLine.__table__
+    # Модуль диалекта импортируется по имени: грузится только используемый
+    dialect = importlib.import_module(f'sqlalchemy.dialects.{dialect_name}')
+    # Без values(): строки передаются параметрами executemany, и запрос
+    # компилируется один раз, а не заново под каждую пачку
+    statement = dialect.insert(table)
+    new = statement.inserted if dialect_name == 'mysql' else statement.excluded
+
+    # Повторный скан заменяет количество; расхождение нужно пересчитать
+    values = {
+        'counted_quantity': new.counted_quantity,
+        'scanned_by': new.scanned_by,
+        'scanned_at': new.scanned_at,
+        'expected_quantity': None,
+        'variance': None,
+        'approved': False,
+    }
+    if dialect_name == 'mysql':
+        return statement.on_duplicate_key_update(values)
+    return statement.on_conflict_do_update(index_elements=['count_id', 'item_id'], set_=values)
+
+
+class InventoryCountDAO(BaseDAO):
+    """
+    Инвентаризация (src/inventory.py). Все операции над строками
+    пересчета выполняются множествами: загрузка - пачками INSERT,
+    расхождения - одним UPDATE с подзапросом к depot_items, применение -
+    одним UPDATE на порцию INVENTORY_APPLY_CHUNK предметов.
+    """
+    model = InventoryCount
+
+    @staticmethod
+    async def _require(session, count_id: int, *statuses: str):
+        # Строка пересчета блокируется: смена статуса и работа со строками не пересекаются
+        count = (await session.execute(
+            select(InventoryCount.__table__).where(InventoryCount.id == count_id).with_for_update()
+        )).mappings().one_or_none()
+        if count is None:
+            raise InventoryCountNotFoundException
+        if count['status'] not in statuses:
+            raise InventoryCountStateException
+        return count
+
+    @staticmethod
+    def _scope(count) -> list:
+        conditions = [DepotItems.depot_id == count['depot_id']]
+        if count['section_id'] is not None:
+            conditions.append(DepotItems.depot_section == count['section_id'])
+        return conditions
+
+    @classmethod
+    async def create(cls, depot_id: int, section_id: int | None, user_id: int) -> int:
+        async with async_session_maker() as session:
+            result = await session.execute(insert(InventoryCount).values(
+                depot_id=depot_id,
+                section_id=section_id,
+                status=InventoryCountStatus.OPEN,
+                created_by=user_id,
+                created_at=datetime.utcnow(),
+                applied_lines=0
+            ))
+            await session.commit()
+        return result.inserted_primary_key[0]
+
+    @classmethod
+    async def get(cls, count_id: int):
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(InventoryCount.__table__).where(InventoryCount.id == count_id)
+            )
+            return result.mappings().one_or_none()
+
+    @classmethod
+    async def stage(cls, count_id: int, lines: dict[int, int], user_id: int) -> int:
+        """
+        Загружает пачку подсчетов: ID предмета -> количество.
+        :return: Сколько строк загружено.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {'count_id': count_id, 'item_id': item_id, 'counted_quantity': quantity, 'scanned_by': user_id, 'scanned_at': now}
+            for item_id, quantity in lines.items()
+        ]
+
+        async with async_session_maker() as session:
+            await cls._require(session, count_id, InventoryCountStatus.OPEN)
+            statement = _upsert_lines(session.bind.dialect.name)
+            for start in range(0, len(rows), settings.INVENTORY_STAGE_CHUNK):
+                await session.execute(statement, rows[start:start + settings.INVENTORY_STAGE_CHUNK])
+            await session.commit()
+        return len(rows)
+
+    @classmethod
+    async def compute_variances(cls, count_id: int, uncounted_as_zero: bool = False) -> dict:
+        """
+        Сравнивает подсчет с учетом одним UPDATE по всем строкам.
+        Утверждения расхождений сбрасываются.
+        :param uncounted_as_zero: Предметы склада (секции), которые не
+            сканировали, считаются подсчитанными с нулем.
+        :return: Сводка по пересчету.
+        """
+        line = InventoryCountLine
+        async with async_session_maker() as session:
+            count = await cls._require(session, count_id, InventoryCountStatus.OPEN)
+            scope = cls._scope(count)
+
+            if uncounted_as_zero:
+                counted = select(line.item_id).where(line.count_id == count_id)
+                await session.execute(insert(line).from_select(
+                    ['count_id', 'item_id', 'counted_quantity', 'scanned_by', 'scanned_at'],
+                    select(
+                        literal(count_id), DepotItems.id, literal(0),
+                        literal(count['created_by']), literal(datetime.utcnow())
+                    ).where(*scope, DepotItems.id.not_in(counted))
+                ))
+
+            # Предмет вне склада (секции) пересчета дает NULL - такое расхождение не применяется
+            expected = (
+                select(func.coalesce(DepotItems.quantity, 0))
+                .where(DepotItems.id == line.item_id, *scope)
+                .scalar_subquery()
+            )
+            await session.execute(
+                update(line)
+                .where(line.count_id == count_id)
+                .values(expected_quantity=expected, variance=line.counted_quantity - expected, approved=False)
+            )
+
+            summary = (await session.execute(
+                select(
+                    func.count(),
+                    func.coalesce(func.sum(case((line.variance != 0, 1), else_=0)), 0),
+                    func.coalesce(func.sum(case((line.expected_quantity.is_(None), 1), else_=0)), 0),
+                    func.coalesce(func.sum(line.variance), 0),
+                ).where(line.count_id == count_id)
+            )).one()
+            await session.commit()
+
+        lines, with_variance, unknown, net = summary
+        return {'lines': lines, 'with_variance': int(with_variance), 'unknown_items': int(unknown), 'net_variance': int(net)}
+
+    @classmethod
+    async def variances(cls, count_id: int, only_nonzero: bool, limit: int, offset: int) -> list[dict]:
+        """
+        Расхождения, самые крупные первыми.
+        """
+        line = InventoryCountLine
+        query = (
+            select(
+                line.item_id, DepotItems.name, DepotItems.barcode, line.counted_quantity,
+                line.expected_quantity, line.variance, line.approved, line.applied_at
+            )
+            .outerjoin(DepotItems, DepotItems.id == line.item_id)
+            .where(line.count_id == count_id)
+            .order_by(func.abs(line.variance).desc(), line.item_id)
+            .limit(limit)
+            .offset(offset)
+        )
+        if only_nonzero:
+            query = query.where(line.variance != 0)
+
+        async with async_session_maker() as session:
+            return (await session.execute(query)).mappings().all()
+
+    @classmethod
+    async def approve(cls, count_id: int, item_ids: list[int] | None = None, max_abs_variance: int | None = None) -> int:
+        """
+        Утверждает рассчитанные расхождения; без фильтров - все.
+        :return: Сколько строк утверждено.
+        """
+        line = InventoryCountLine
+        conditions = [line.count_id == count_id, line.variance.is_not(None), line.approved.is_(False)]
+        if item_ids is not None:
+            conditions.append(line.item_id.in_(item_ids))
+        if max_abs_variance is not None:
+            conditions.append(func.abs(line.variance) <= max_abs_variance)
+
+        async with async_session_maker() as session:
+            await cls._require(session, count_id, InventoryCountStatus.OPEN)
+            result = await session.execute(update(line).where(*conditions).values(approved=True))
+            await session.commit()
+        return result.rowcount
+
+    @classmethod
+    async def set_status(cls, count_id: int, status: str, *expected: str) -> None:
+        async with async_session_maker() as session:
+            await cls._require(session, count_id, *expected)
+            await session.execute(
+                update(InventoryCount).where(InventoryCount.id == count_id).values(status=status)
+            )
+            await session.commit()
+
+    @classmethod
+    async def apply(cls, count_id: int, on_progress: Callable[[int, int], Awaitable] | None = None) -> dict:
+        """
+        Применяет утвержденные расхождения порциями по
+        INVENTORY_APPLY_CHUNK предметов, каждая - в своей транзакции.
+        Примененные строки помечаются, поэтому прерванное применение
+        продолжается с места остановки. В конце пересчет закрывается, у
+        склада обновляется last_inventory_date.
+
+        Количество не опускается ниже reserved_quantity (и нуля), как и в
+        ItemDAO._update: если по подсчету товара меньше, чем занято
+        резервами, или его продали после расчета расхождений, корректировка
+        урезается. Такие предметы перечисляются в итоге (clamped).
+        :return: Итог применения.
+        """
+        line = InventoryCountLine
+        count = await cls.get(count_id)
+        if count is None:
+            raise InventoryCountNotFoundException
+        if count['status'] == InventoryCountStatus.CLOSED:
+            return {'count_id': count_id, 'applied': count['applied_lines'], 'clamped': 0, 'clamped_item_ids': []}
+        if count['status'] != InventoryCountStatus.APPLYING:
+            raise InventoryCountStateException
+
+        pending = [
+            line.count_id == count_id,
+            line.approved.is_(True),
+            line.applied_at.is_(None),
+            line.variance != 0,
+        ]
+        async with async_session_maker() as session:
+            total = (await session.execute(select(func.count()).where(*pending))).scalar_one()
+
+        done, clamped = 0, []
+        while True:
+            async with async_session_maker() as session:
+                chunk = dict((await session.execute(
+                    select(line.item_id, line.variance)
+                    .where(*pending)
+                    .order_by(line.item_id)
+                    .limit(settings.INVENTORY_APPLY_CHUNK)
+                )).all())
+                if not chunk:
+                    break
+
+                now = datetime.utcnow()
+                # Удаленные после подсчета предметы просто пропускаются
+                before = (await session.execute(
+                    select(DepotItems.id, DepotItems.reserved_quantity, *SUMMARY_COLUMNS)
+                    .where(DepotItems.id.in_(chunk))
+                    .with_for_update()
+                )).mappings().all()
+
+                # Корректировка - дельта: движения после расчета расхождений не теряются
+                variance = (
+                    select(line.variance)
+                    .where(line.count_id == count_id, line.item_id == DepotItems.id)
+                    .scalar_subquery()
+                )
+                adjusted = func.coalesce(DepotItems.quantity, 0) + variance
+                await session.execute(
+                    update(DepotItems)
+                    .where(DepotItems.id.in_(chunk))
+                    .values(
+                        quantity=case(
+                            (adjusted < DepotItems.reserved_quantity, DepotItems.reserved_quantity),
+                            else_=adjusted
+                        ),
+                        updated_at=now
+                    )
+                )
+
+                delta = StockDelta.of(before, sign=-1)
+                changes = []
+                for row in before:
+                    quantity = (row['quantity'] or 0) + chunk[row['id']]
+                    if quantity < row['reserved_quantity']:
+                        quantity = row['reserved_quantity']
+                        clamped.append(row['id'])
+                    after = {**row, 'quantity': quantity}
+                    delta.add(after)
+                    changes.append((row['id'], row, after))
+                await apply_stock_delta(session, delta)
+                await log_item_changes(session, changes)
+
+                await session.execute(
+                    update(line)
+                    .where(line.count_id == count_id, line.item_id.in_(chunk))
+                    .values(applied_at=now)
+                )
+                await session.execute(
+                    update(InventoryCount)
+                    .where(InventoryCount.id == count_id)
+                    .values(applied_lines=InventoryCount.applied_lines + len(before))
+                )
+                await session.commit()
+
+            done += len(chunk)
+            if on_progress is not None:
+                await on_progress(done, total)
+
+        closed_at = datetime.utcnow()
+        async with async_session_maker() as session:
+            await session.execute(
+                update(InventoryCount)
+                .where(InventoryCount.id == count_id)
+                .values(status=InventoryCountStatus.CLOSED, closed_at=closed_at)
+            )
+            await session.execute(
+                update(Depot).where(Depot.id == count['depot_id']).values(last_inventory_date=closed_at)
+            )
+            applied = (await session.execute(
+                select(InventoryCount.applied_lines).where(InventoryCount.id == count_id)
+            )).scalar_one()
+            await session.commit()
+
+        # Поштучные события на сотни тысяч предметов не нужны: склад перечитывается целиком
+        expiration_index.invalidate(count['depot_id'])
+        availability_index.invalidate(count['depot_id'])
+        stock_events.publish_depot(count['depot_id'])
+        return {
+            'count_id': count_id,
+            'applied': applied,
+            'clamped': len(clamped),
+            'clamped_item_ids': clamped[:CLAMPED_REPORT_LIMIT],
+        }
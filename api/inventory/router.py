@@ -0,0 +1,206 @@
+from fastapi import APIRouter, Body, Depends, Path, Query, status
+from typing import Annotated
+
+from src.auth import get_current_user
+from src.permissions import Rule, require_rule
+from api.models import CurrentUser, InventoryApproveRequest, InventoryLinesRequest
+from api.inventory.dao import InventoryCountDAO, InventoryCountStatus
+from api.task.dao import TaskDAO, TaskStatus
+from src.manager import TaskManager
+from src.responses import JSONResponse
+from exceptions import InventoryCountNotFoundException
+from config import settings
+
+router = APIRouter(
+    prefix='/inventory',
+    tags=['Inventory']
+)
+
+@router.post(
+    path='',
+    status_code=status.HTTP_201_CREATED,
+    description='Начало инвентаризации склада или одной секции'
+)
+async def create_count(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    depot_id: int = Body(..., description='ID склада'),
+    section_id: int | None = Body(None, description='Пересчитать только эту секцию')
+) -> JSONResponse:
+    count_id = await InventoryCountDAO.create(depot_id, section_id, current_user.id)
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            'message': 'Инвентаризация начата',
+            'data': {'count_id': count_id}
+        }
+    )
+
+@router.get(
+    path='/{count_id}',
+    status_code=status.HTTP_200_OK,
+    description='Получение инвентаризации'
+)
+async def get_count(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    count_id: int = Path(..., description='ID инвентаризации')
+) -> JSONResponse:
+    count = await InventoryCountDAO.get(count_id)
+    if count is None:
+        raise InventoryCountNotFoundException
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Инвентаризация',
+            'data': count
+        }
+    )
+
+@router.post(
+    path='/{count_id}/lines',
+    status_code=status.HTTP_200_OK,
+    description='Загрузка пачки подсчетов со сканера; повторный подсчет предмета заменяет прежний'
+)
+async def stage_lines(
+    request: InventoryLinesRequest,
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    count_id: int = Path(..., description='ID инвентаризации')
+) -> JSONResponse:
+    if len(request.lines) > settings.INVENTORY_STAGE_MAX_LINES:
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={'message': f'В одной пачке не больше {settings.INVENTORY_STAGE_MAX_LINES} строк'}
+        )
+
+    # Внутри пачки побеждает последний подсчет предмета
+    staged = await InventoryCountDAO.stage(
+        count_id, {line.item_id: line.quantity for line in request.lines}, current_user.id
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Подсчеты загружены',
+            'data': {'staged': staged}
+        }
+    )
+
+@router.post(
+    path='/{count_id}/variances',
+    status_code=status.HTTP_200_OK,
+    description='Расчет расхождений подсчета с учетом; прежние утверждения сбрасываются'
+)
+async def compute_variances(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    count_id: int = Path(..., description='ID инвентаризации'),
+    uncounted_as_zero: bool = Query(False, description='Несосканированные предметы считать отсутствующими')
+) -> JSONResponse:
+    summary = await InventoryCountDAO.compute_variances(count_id, uncounted_as_zero)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Расхождения рассчитаны',
+            'data': summary
+        }
+    )
+
+@router.get(
+    path='/{count_id}/variances',
+    status_code=status.HTTP_200_OK,
+    description='Список расхождений, самые крупные первыми'
+)
+async def get_variances(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    count_id: int = Path(..., description='ID инвентаризации'),
+    only_nonzero: bool = Query(True, description='Только строки с расхождением'),
+    limit: int = Query(100, gt=0, le=1000),
+    offset: int = Query(0, ge=0)
+) -> JSONResponse:
+    variances = await InventoryCountDAO.variances(count_id, only_nonzero, limit, offset)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Расхождения',
+            'data': variances
+        }
+    )
+
+@router.post(
+    path='/{count_id}/approve',
+    status_code=status.HTTP_200_OK,
+    description='Утверждение расхождений: по списку предметов, по порогу или все'
+)
+async def approve_variances(
+    request: InventoryApproveRequest,
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    count_id: int = Path(..., description='ID инвентаризации')
+) -> JSONResponse:
+    approved = await InventoryCountDAO.approve(count_id, request.item_ids, request.max_abs_variance)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Расхождения утверждены',
+            'data': {'approved': approved}
+        }
+    )
+
+@router.post(
+    path='/{count_id}/close',
+    status_code=status.HTTP_202_ACCEPTED,
+    description='Закрытие инвентаризации: утвержденные корректировки применяются фоновой задачей'
+)
+async def close_count(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    count_id: int = Path(..., description='ID инвентаризации')
+) -> JSONResponse:
+    """
+    После перевода в applying подсчеты и утверждения больше не меняются.
+    Ход применения доступен через GET /task/{task_id}. Повторный вызов
+    вернет ту же задачу, а если она окончательно упала - поставит новую:
+    применение продолжится с места остановки.
+    """
+    await InventoryCountDAO.set_status(
+        count_id, InventoryCountStatus.APPLYING, InventoryCountStatus.OPEN, InventoryCountStatus.APPLYING
+    )
+
+    attempt = 0
+    while (
+        (task := await TaskDAO.find_one_or_none(idempotency_key=f'inventory-close:{count_id}:{attempt}')) is not None
+        and task['status'] == TaskStatus.FAILED
+    ):
+        attempt += 1
+
+    task_id = await TaskManager().create_task(
+        'close_inventory_count',
+        payload={'count_id': count_id},
+        user_id=current_user.id,
+        idempotency_key=f'inventory-close:{count_id}:{attempt}'
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            'message': 'Закрытие инвентаризации поставлено в очередь',
+            'data': {'task_id': task_id}
+        }
+    )
+
+@router.delete(
+    path='/{count_id}',
+    status_code=status.HTTP_200_OK,
+    description='Отмена инвентаризации без применения корректировок'
+)
+async def cancel_count(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    count_id: int = Path(..., description='ID инвентаризации')
+) -> JSONResponse:
+    await InventoryCountDAO.set_status(count_id, InventoryCountStatus.CANCELLED, InventoryCountStatus.OPEN)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'message': 'Инвентаризация отменена'}
+    )
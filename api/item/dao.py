@@ -0,0 +1,217 @@
+from datetime import datetime
+
+from sqlalchemy import delete, insert, literal, select, update
+
+from dao.base import BaseDAO
+from src.changelog import ChangeKind, decode_row, log_depot_refresh, log_item_change
+from src.db import DepotItems, async_session_maker
+from src.events import stock_events
+from src.expiration import expiration_index
+from src.reservations import availability_index
+from src.stock_summary import SUMMARY_COLUMNS, StockDelta, apply_stock_delta
+from exceptions import EdgeItemCreateException, InsufficientStockException
+from config import settings
+
+# Колонки, которые не переносятся из изменений других узлов: количество
+# приходит дельтой, резервы у каждого узла свои
+LOCAL_COLUMNS = ('id', 'quantity', 'reserved_quantity', 'created_at')
+
+
+class ItemDAO(BaseDAO):
+    """
+    Изменения остатков склада. Каждый метод в той же транзакции
+    обновляет сводки остатков (src/stock_summary.py) и журнал изменений
+    для узлов складов (src/changelog.py), а после коммита - индексы
+    сроков годности (src/expiration.py) и свободных остатков
+    (src/reservations.py) и публикует изменение подписчикам
+    (src/events.py).
+    """
+    model = DepotItems
+
+    @staticmethod
+    async def _lock_item(session, item_id: int):
+        # Строка блокируется до конца транзакции, чтобы дельта сводок
+        # считалась от актуальных значений
+        result = await session.execute(
+            select(*SUMMARY_COLUMNS, DepotItems.barcode, DepotItems.name, DepotItems.status)
+            .where(DepotItems.id == item_id)
+            .with_for_update()
+        )
+        return result.mappings().one_or_none()
+
+    @classmethod
+    async def _update(cls, session, item_id: int, values: dict, diff: int = 0, check_stock: bool = True) -> tuple | None:
+        """
+        Изменение предмета внутри транзакции: колонки из values и
+        прибавка diff к количеству.
+
+        Уменьшение количества ниже зарезервированного (src/reservations.py)
+        отклоняется InsufficientStockException. check_stock=False - для
+        изменений других узлов: там списание уже произошло.
+        :return: (before, after) или None, если предмет не найден.
+        """
+        before = await cls._lock_item(session, item_id)
+        if before is None:
+            return None
+        if not values and not diff:
+            return before, before
+
+        after = {**before, **{key: values[key] for key in before.keys() if key in values}}
+        if diff:
+            after['quantity'] = (before['quantity'] or 0) + diff
+            values = {**values, 'quantity': DepotItems.quantity + diff}
+
+        conditions = [DepotItems.id == item_id]
+        decrease = check_stock and (after['quantity'] or 0) < (before['quantity'] or 0)
+        if decrease:
+            # Проверка в самом UPDATE: параллельный резерв не проскочит между чтением и записью
+            quantity = values['quantity'] if diff else literal(values['quantity'])
+            reserved = values.get('reserved_quantity', DepotItems.reserved_quantity)
+            conditions += [quantity >= 0, quantity - reserved >= 0]
+
+        result = await session.execute(
+            update(DepotItems).where(*conditions).values(**values)
+        )
+        # rowcount проверяется только здесь: MySQL не считает строки, где значения не изменились
+        if decrease and result.rowcount != 1:
+            raise InsufficientStockException
+
+        delta = StockDelta.of([before], sign=-1)
+        delta.add(after)
+        await apply_stock_delta(session, delta)
+        await log_item_change(session, item_id, before, after)
+        return before, after
+
+    @classmethod
+    async def _delete(cls, session, item_id: int):
+        """
+        :return: Состояние предмета до удаления или None, если он не найден.
+        """
+        before = await cls._lock_item(session, item_id)
+        if before is None:
+            return None
+
+        await session.execute(delete(DepotItems).where(DepotItems.id == item_id))
+        await apply_stock_delta(session, StockDelta.of([before], sign=-1))
+        await log_item_change(session, item_id, before, None)
+        return before
+
+    @staticmethod
+    def _after_commit(item_id: int, before, after) -> None:
+        expiration_index.update(item_id, after)
+        availability_index.update(item_id, after)
+        stock_events.publish_item(item_id, before, after)
+
+    @classmethod
+    async def _apply_remote(cls, session, change: dict, depot_id: int | None = None) -> tuple | None:
+        """
+        Применяет изменение из журнала другого узла (src/sync.py).
+
+        Количество прибавляется дельтой, поэтому параллельные приходы и
+        расходы на узле и в центре складываются. Остальные колонки
+        перезаписываются, только если изменение не старше текущей строки
+        (last writer wins по updated_at).
+
+        depot_id - склад узла (None в центре): предметы, ушедшие с него,
+        удаляются, пришедшие - добавляются. В центре изменение удаленного
+        предмета пропускается - удаление побеждает.
+        :return: (item_id, before, after) для _after_commit или None.
+        """
+        item_id = change['item_id']
+        row = decode_row(change['row']) if change['kind'] == ChangeKind.ITEM else None
+
+        if row is None or (depot_id is not None and row['depot_id'] != depot_id):
+            before = await cls._delete(session, item_id)
+            return (item_id, before, None) if before is not None else None
+
+        current = (await session.execute(
+            select(DepotItems.updated_at).where(DepotItems.id == item_id)
+        )).first()
+        if current is None:
+            if depot_id is None:
+                return None
+            # Резервы у каждого узла свои
+            row['reserved_quantity'] = 0
+            await session.execute(insert(DepotItems).values(**row))
+            await apply_stock_delta(session, StockDelta.of([row]))
+            return item_id, None, row
+
+        values = {}
+        if current.updated_at is None or row['updated_at'] is None or row['updated_at'] >= current.updated_at:
+            values = {key: value for key, value in row.items() if key not in LOCAL_COLUMNS}
+
+        changed = await cls._update(session, item_id, values, change['quantity_delta'], check_stock=False)
+        return (item_id, *changed) if changed is not None else None
+
+    @classmethod
+    async def add_items(cls, rows: list[dict]) -> int:
+        """
+        Добавляет предметы одним bulk INSERT.
+        :return: Количество добавленных строк.
+        """
+        if not rows:
+            return 0
+        if settings.EDGE_MODE:
+            # ID предметов выдает центральная БД, иначе узлы выдали бы одинаковые
+            raise EdgeItemCreateException
+
+        depot_ids = {row['depot_id'] for row in rows}
+        async with async_session_maker() as session:
+            await session.execute(insert(DepotItems), rows)
+            await apply_stock_delta(session, StockDelta.of(rows))
+            for depot_id in depot_ids:
+                await log_depot_refresh(session, depot_id)
+            await session.commit()
+
+        # ID новых строк bulk INSERT не возвращает, поэтому кучи складов перечитываются
+        for depot_id in depot_ids:
+            expiration_index.invalidate(depot_id)
+            availability_index.invalidate(depot_id)
+            stock_events.publish_depot(depot_id)
+        return len(rows)
+
+    @classmethod
+    async def update_item(cls, item_id: int, **values) -> bool:
+        """
+        Обновляет предмет: количество, цену, склад, секцию и т.д.
+        Перемещение между складами - это смена depot_id/depot_section.
+        :return: False, если предмет не найден.
+        """
+        values.setdefault('updated_at', datetime.utcnow())
+        async with async_session_maker() as session:
+            changed = await cls._update(session, item_id, values)
+            if changed is None:
+                return False
+            await session.commit()
+
+        cls._after_commit(item_id, *changed)
+        return True
+
+    @classmethod
+    async def change_quantity(cls, item_id: int, diff: int) -> bool:
+        """
+        Приход (diff > 0) или расход (diff < 0) по предмету.
+        :return: False, если предмет не найден.
+        """
+        async with async_session_maker() as session:
+            changed = await cls._update(session, item_id, {'updated_at': datetime.utcnow()}, diff)
+            if changed is None:
+                return False
+            await session.commit()
+
+        cls._after_commit(item_id, *changed)
+        return True
+
+    @classmethod
+    async def delete_item(cls, item_id: int) -> bool:
+        """
+        :return: False, если предмет не найден.
+        """
+        async with async_session_maker() as session:
+            before = await cls._delete(session, item_id)
+            if before is None:
+                return False
+            await session.commit()
+
+        cls._after_commit(item_id, before, None)
+        return True
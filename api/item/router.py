@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated
+
+from src.auth import get_current_user
+from api.models import CurrentUser
+from src.expiration import expiration_index, expiring_items
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/item',
+    tags=['Item']
+)
+
+@router.get(
+    path='/fefo',
+    status_code=status.HTTP_200_OK,
+    description='Подбор товара по FEFO: сначала предметы с ближайшим сроком годности'
+)
+async def get_fefo_pick(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    depot_id: int = Query(..., description='ID склада'),
+    barcode: str = Query(..., max_length=50, description='Штрихкод товара'),
+    quantity: int = Query(..., gt=0, description='Сколько нужно взять')
+) -> JSONResponse:
+    picks = await expiration_index.pick(depot_id, barcode, quantity)
+    shortage = quantity - sum(pick['take'] for pick in picks)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Подбор выполнен' if not shortage else 'Товара со сроком годности недостаточно',
+            'data': {'picks': picks, 'shortage': shortage}
+        }
+    )
+
+@router.get(
+    path='/expiry-alerts',
+    status_code=status.HTTP_200_OK,
+    description='Предметы со свободным остатком, срок годности которых истекает в ближайшие EXPIRY_ALERT_DAYS дней'
+)
+async def get_expiry_alerts(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    depot_id: int | None = Query(None, description='Только этот склад')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Предметы с истекающим сроком годности',
+            'data': await expiring_items(depot_id)
+        }
+    )
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from src.metrics import metrics
+
+router = APIRouter(
+    prefix='/metrics',
+    tags=['Metrics']
+)
+
+@router.get(
+    path='',
+    status_code=status.HTTP_200_OK,
+    description='Метрики запросов всех воркеров в формате Prometheus',
+    include_in_schema=False
+)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        content=metrics.render(),
+        media_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -13,7 +13,7 @@ class UserStructure(BaseModel):
     group_id: int = Field(..., description='ID группы (например: Администраторы, Курьеры, Бухгалтеры)')
     city_id: int = Field(..., description='ID города')
     prefix: str = Field(..., description='Префикс для идентификации')
-    password_hash: str = Field(..., description='Хеш пароля, сами пароли не храним')
+    password_hash: str = Field(..., exclude=True, description='Хеш пароля, сами пароли не храним')
     status: str | None = Field(None, description='Статус пользователя')
     two_factor: bool = Field(False, description='Включена ли двухфакторная аутентификация')
     is_blocked: bool = Field(False, description='Заблокирован ли пользователь')
@@ -21,6 +21,11 @@ class UserStructure(BaseModel):
     created_at: datetime = Field(..., description='Дата создания пользователя')
 
 
+class CurrentUser(BaseModel):
+    id: int = Field(..., description='ID пользователя')
+    group_id: int = Field(..., description='ID группы')
+
+
 class CityStructure(BaseModel):
     id: int | None = Field(None, description='Уникальный идентификатор города')
     name: str = Field(..., description='Название города (например: Гудаута)')
@@ -134,12 +139,57 @@ class References(BaseModel):
 
 class AuthorizationArchive(BaseModel):
     id: int | None = Field(None, description='Архив авторизаций')
-    user_id: int = Field(..., max_length=250, description='ID пользователя, на чей аккаунт была произведена авторизация')
+    user_id: int = Field(..., description='ID пользователя, на чей аккаунт была произведена авторизация')
     auth_time: datetime = Field(default_factory=datetime.utcnow, description='Время авторизации')
-    ip: str = Field(..., max_length=15, description='IP-адрес')
+    ip: str = Field(..., max_length=45, description='IP-адрес (IPv4 или IPv6)')
+
+
+class WriteOffActRequest(BaseModel):
+    depot_id: int = Field(..., description='ID склада, с которого списываются предметы')
+    item_ids: List[int] = Field(..., min_length=1, description='ID списываемых предметов')
+    number: str = Field(..., max_length=50, description='Номер акта')
+    organization: str | None = Field(None, max_length=250, description='Организация')
+    department: str | None = Field(None, max_length=250, description='Подразделение')
+    signatures: List[str] = Field(default_factory=list, description='Строки подписей под актом')
+
+
+class DepotCompanyCars(BaseModel):
+    id: int | None = Field(None, description='ID машины')
+    name: str = Field(..., max_length=250, description='Название машины (не модель)')
+    brand: str = Field(..., max_length=100, description='Бренд (Toyota, BMW, ...)')
+    model: str = Field(..., max_length=100, description='Название модели')
+    vin_body_number: str = Field(..., max_length=17, description='VIN или номер кузова')
+    year: int = Field(..., description='Год выпуска')
+    license_plates: str | None = Field(None, max_length=100, description='Гос. номера')
+    vehicle_payload: int = Field(..., gt=0, description='Грузоподъемность (в кг)')
+    fuel_type: str | None = Field(None, max_length=100, description='Тип топлива (бензин, дизель, электро)')
+
+
+class ShipmentRequest(BaseModel):
+    depot_id: int = Field(..., description='ID склада-получателя (точка маршрута)')
+    weight: float | None = Field(None, ge=0, description='Вес отправки в кг; если не указан - считается по item_ids')
+    item_ids: List[int] = Field(default_factory=list, description='Отправляемые предметы (вес * количество)')
+
+
+class DispatchPlanRequest(BaseModel):
+    origin_depot_id: int = Field(..., description='ID склада, откуда выезжают машины')
+    shipments: List[ShipmentRequest] = Field(..., min_length=1, description='Отправки по складам')
+    car_ids: List[int] | None = Field(None, description='Доступные машины; по умолчанию все')
+    return_to_origin: bool = Field(True, description='Машины возвращаются на исходный склад')
+
+
+class InventoryCountLineModel(BaseModel):
+    item_id: int = Field(..., description='ID подсчитанного предмета')
+    quantity: int = Field(..., ge=0, description='Фактическое количество')
+
+
+class InventoryLinesRequest(BaseModel):
+    lines: List[InventoryCountLineModel] = Field(..., min_length=1, description='Пачка подсчетов со сканера')
 
 
-# TODO DepotCompanyCars
+class InventoryApproveRequest(BaseModel):
+    item_ids: List[int] | None = Field(None, description='Утвердить расхождения этих предметов')
+    max_abs_variance: int | None = Field(None, ge=0, description='Утвердить все расхождения не больше по модулю')
 
 
 class Attachment(BaseModel):
@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Body, Depends, status
+from typing import Annotated
+
+from api.models import CurrentUser
+from src.permissions import Rule, require_rule
+from src.profiler import profiler_window
+from src.logger import _logger
+from src.responses import JSONResponse
+from config import settings
+
+router = APIRouter(
+    prefix='/profiler',
+    tags=['Profiler']
+)
+
+@router.get(
+    path='/window',
+    status_code=status.HTTP_200_OK,
+    description='Состояние окна профилирования в текущем воркере'
+)
+async def get_window(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.ADMIN))]
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Состояние окна профилирования',
+            'data': {
+                'enabled': settings.PROFILER_ENABLED,
+                'active': profiler_window.active,
+                'remaining_seconds': profiler_window.remaining(),
+                'sample_rate': profiler_window.sample_rate,
+            }
+        }
+    )
+
+@router.post(
+    path='/window',
+    status_code=status.HTTP_200_OK,
+    description='Открывает окно профилирования: профилируется доля запросов текущего воркера'
+)
+async def open_window(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.ADMIN))],
+    seconds: int = Body(60, ge=1, description='Длительность окна, в секундах'),
+    sample_rate: float = Body(0.1, gt=0, le=1, description='Доля профилируемых запросов')
+) -> JSONResponse:
+    if not settings.PROFILER_ENABLED:
+        return JSONResponse(
+            status_code=status.HTTP_409_CONFLICT,
+            content={'message': 'Профилирование выключено (PROFILER_ENABLED)'}
+        )
+
+    seconds = min(seconds, settings.PROFILER_MAX_WINDOW_SECONDS)
+    profiler_window.open(seconds, sample_rate)
+    _logger.warning('Открыто окно профилирования', extra={
+        'UserId': current_user.id, 'Seconds': seconds, 'SampleRate': sample_rate
+    })
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Окно профилирования открыто',
+            'data': {'seconds': seconds, 'sample_rate': sample_rate}
+        }
+    )
+
+@router.delete(
+    path='/window',
+    status_code=status.HTTP_200_OK,
+    description='Закрывает окно профилирования в текущем воркере'
+)
+async def close_window(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.ADMIN))]
+) -> JSONResponse:
+    profiler_window.close()
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'message': 'Окно профилирования закрыто'}
+    )
@@ -0,0 +1,107 @@
+import time
+
+from sqlalchemy import func, select
+
+from src.db import (
+    Depot, DepotExpirySummary, DepotItemsType, DepotSection,
+    DepotStockSummary, Supplier, async_session_maker
+)
+from src.stock_summary import SECONDS_PER_DAY
+
+
+class ReportDimension:
+    SECTION: str = 'section'
+    TYPE: str = 'type'
+    SUPPLIER: str = 'supplier'
+
+
+# Разрез отчета -> (колонка сводки, справочник, колонка названия)
+DIMENSIONS = {
+    ReportDimension.SECTION: (DepotStockSummary.section_id, DepotSection, DepotSection.section_name),
+    ReportDimension.TYPE: (DepotStockSummary.item_type_id, DepotItemsType, DepotItemsType.name),
+    ReportDimension.SUPPLIER: (DepotStockSummary.supplier_id, Supplier, Supplier.name),
+}
+
+
+class ReportDAO:
+    """
+    Отчеты по остаткам. Читают только сводки depot_stock_summary и
+    depot_expiry_summary, к depot_items не обращаются.
+    """
+
+    @classmethod
+    async def stock_by_depot(cls, depot_id: int | None = None) -> list[dict]:
+        query = (
+            select(
+                DepotStockSummary.depot_id,
+                Depot.name.label('depot'),
+                func.sum(DepotStockSummary.items_count).label('items_count'),
+                func.sum(DepotStockSummary.quantity).label('quantity'),
+                func.sum(DepotStockSummary.stock_value).label('stock_value'),
+            )
+            .outerjoin(Depot, Depot.id == DepotStockSummary.depot_id)
+            .group_by(DepotStockSummary.depot_id, Depot.name)
+            .having(func.sum(DepotStockSummary.items_count) > 0)
+            .order_by(DepotStockSummary.depot_id)
+        )
+        if depot_id is not None:
+            query = query.where(DepotStockSummary.depot_id == depot_id)
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def stock_by(cls, dimension: str, depot_id: int | None = None) -> list[dict]:
+        """
+        Остатки склада в разрезе секции, типа или поставщика.
+        Строки с id = 0 - предметы без секции/типа/поставщика.
+        """
+        key, reference, name = DIMENSIONS[dimension]
+        query = (
+            select(
+                DepotStockSummary.depot_id,
+                key.label('id'),
+                name.label('name'),
+                func.sum(DepotStockSummary.items_count).label('items_count'),
+                func.sum(DepotStockSummary.quantity).label('quantity'),
+                func.sum(DepotStockSummary.stock_value).label('stock_value'),
+            )
+            .outerjoin(reference, reference.id == key)
+            .group_by(DepotStockSummary.depot_id, key, name)
+            .having(func.sum(DepotStockSummary.items_count) > 0)
+            .order_by(DepotStockSummary.depot_id, key)
+        )
+        if depot_id is not None:
+            query = query.where(DepotStockSummary.depot_id == depot_id)
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
+
+    @classmethod
+    async def expiring(cls, days: int, depot_id: int | None = None) -> list[dict]:
+        """
+        Остатки, срок годности которых истекает в ближайшие days дней
+        (включая уже просроченные), по складам.
+        """
+        last_day = int(time.time()) // SECONDS_PER_DAY + days
+        query = (
+            select(
+                DepotExpirySummary.depot_id,
+                Depot.name.label('depot'),
+                func.sum(DepotExpirySummary.items_count).label('items_count'),
+                func.sum(DepotExpirySummary.quantity).label('quantity'),
+                (func.min(DepotExpirySummary.expiration_day) * SECONDS_PER_DAY).label('nearest_expiration'),
+            )
+            .outerjoin(Depot, Depot.id == DepotExpirySummary.depot_id)
+            .where(DepotExpirySummary.expiration_day <= last_day, DepotExpirySummary.items_count > 0)
+            .group_by(DepotExpirySummary.depot_id, Depot.name)
+            .order_by(DepotExpirySummary.depot_id)
+        )
+        if depot_id is not None:
+            query = query.where(DepotExpirySummary.depot_id == depot_id)
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return [dict(row) for row in result.mappings()]
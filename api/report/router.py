@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated
+
+from src.permissions import Rule, require_rule
+from api.models import CurrentUser
+from api.report.dao import DIMENSIONS, ReportDAO
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/report',
+    tags=['Report']
+)
+
+@router.get(
+    path='/stock',
+    status_code=status.HTTP_200_OK,
+    description='Остатки и стоимость запасов (quantity * price) по складам'
+)
+async def get_stock(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.VIEW_REPORTS))],
+    depot_id: int | None = Query(None, description='Только один склад')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Остатки по складам',
+            'data': await ReportDAO.stock_by_depot(depot_id)
+        }
+    )
+
+@router.get(
+    path='/stock/{dimension}',
+    status_code=status.HTTP_200_OK,
+    description=f'Остатки складов в разрезе: {", ".join(DIMENSIONS)}'
+)
+async def get_stock_by(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.VIEW_REPORTS))],
+    dimension: str,
+    depot_id: int | None = Query(None, description='Только один склад')
+) -> JSONResponse:
+    if dimension not in DIMENSIONS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': 'Неизвестный разрез отчета'}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Остатки по складам',
+            'data': await ReportDAO.stock_by(dimension, depot_id)
+        }
+    )
+
+@router.get(
+    path='/expiring',
+    status_code=status.HTTP_200_OK,
+    description='Остатки со сроком годности, истекающим в ближайшие дни'
+)
+async def get_expiring(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.VIEW_REPORTS))],
+    days: int = Query(30, ge=0, le=3650, description='Горизонт в днях'),
+    depot_id: int | None = Query(None, description='Только один склад')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Истекающие остатки',
+            'data': await ReportDAO.expiring(days, depot_id)
+        }
+    )
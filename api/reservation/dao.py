@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select, update
+
+from dao.base import BaseDAO
+from api.item.dao import ItemDAO
+from src.db import DepotItems, StockReservation, async_session_maker
+from src.expiration import expiration_index
+from src.reservations import ReservationStatus, availability_index
+from exceptions import (
+    InsufficientStockException, ItemNotFoundException, ItemNotInSectionException,
+    ReservationNotActiveException
+)
+
+
+class ReservationDAO(BaseDAO):
+    """
+    Резервы остатков (src/reservations.py). Каждый переход резерва -
+    условный UPDATE, поэтому все методы безопасны при параллельных
+    вызовах из разных процессов.
+    """
+    model = StockReservation
+
+    @classmethod
+    async def reserve(
+        cls,
+        item_id: int,
+        quantity: int,
+        user_id: int,
+        ttl_seconds: int,
+        section_id: int | None = None,
+        reference: str | None = None
+    ) -> dict:
+        """
+        :return: Созданный резерв.
+        """
+        conditions = [
+            DepotItems.id == item_id,
+            DepotItems.quantity - DepotItems.reserved_quantity >= quantity,
+        ]
+        if section_id is not None:
+            conditions.append(DepotItems.depot_section == section_id)
+
+        now = datetime.utcnow()
+        async with async_session_maker() as session:
+            result = await session.execute(
+                update(DepotItems)
+                .where(*conditions)
+                .values(reserved_quantity=DepotItems.reserved_quantity + quantity)
+            )
+            item = (await session.execute(
+                select(DepotItems.depot_id, DepotItems.depot_section, DepotItems.quantity, DepotItems.reserved_quantity)
+                .where(DepotItems.id == item_id)
+            )).first()
+
+            if item is None:
+                raise ItemNotFoundException
+            if result.rowcount != 1:
+                # Индекс процесса мог отстать: поправляем его по факту из БД
+                availability_index.refresh(item_id, item.quantity, item.reserved_quantity)
+                expiration_index.refresh(item_id, item.quantity, item.reserved_quantity)
+                if section_id is not None and item.depot_section != section_id:
+                    raise ItemNotInSectionException
+                raise InsufficientStockException
+
+            reservation = {
+                'item_id': item_id,
+                'depot_id': item.depot_id,
+                'section_id': item.depot_section,
+                'quantity': quantity,
+                'status': ReservationStatus.ACTIVE,
+                'reference': reference,
+                'user_id': user_id,
+                'created_at': now,
+                'expires_at': now + timedelta(seconds=ttl_seconds),
+            }
+            inserted = await session.execute(insert(StockReservation).values(**reservation))
+            await session.commit()
+
+        availability_index.refresh(item_id, item.quantity, item.reserved_quantity)
+        expiration_index.refresh(item_id, item.quantity, item.reserved_quantity)
+        return {'id': inserted.inserted_primary_key[0], **reservation}
+
+    @staticmethod
+    async def _close(session, reservation_id: int, status: str, only_unexpired: bool = False):
+        """
+        Переводит активный резерв в status.
+        :return: (item_id, quantity) или None, если резерв уже не активен.
+        """
+        now = datetime.utcnow()
+        conditions = [StockReservation.id == reservation_id, StockReservation.status == ReservationStatus.ACTIVE]
+        if only_unexpired:
+            conditions.append(StockReservation.expires_at > now)
+
+        result = await session.execute(
+            update(StockReservation).where(*conditions).values(status=status, closed_at=now)
+        )
+        if result.rowcount != 1:
+            return None
+
+        return (await session.execute(
+            select(StockReservation.item_id, StockReservation.quantity)
+            .where(StockReservation.id == reservation_id)
+        )).one()
+
+    @staticmethod
+    async def _unreserve(session, item_id: int, quantity: int) -> None:
+        await session.execute(
+            update(DepotItems)
+            .where(DepotItems.id == item_id)
+            .values(reserved_quantity=DepotItems.reserved_quantity - quantity)
+        )
+
+    @classmethod
+    async def commit(cls, reservation_id: int) -> None:
+        """
+        Подтверждает резерв: количество списывается с предмета.
+        ItemDAO._update проверяет, что количества хватает на резерв
+        (quantity >= резерва) и на остальные резервы предмета.
+        """
+        async with async_session_maker() as session:
+            closed = await cls._close(session, reservation_id, ReservationStatus.COMMITTED, only_unexpired=True)
+            if closed is None:
+                raise ReservationNotActiveException
+
+            item_id, quantity = closed
+            changed = await ItemDAO._update(
+                session, item_id,
+                {'reserved_quantity': DepotItems.reserved_quantity - quantity, 'updated_at': datetime.utcnow()},
+                -quantity
+            )
+            if changed is None:
+                raise ItemNotFoundException
+            await session.commit()
+
+        ItemDAO._after_commit(item_id, *changed)
+        availability_index.adjust_reserved(item_id, -quantity)
+        expiration_index.adjust_reserved(item_id, -quantity)
+
+    @classmethod
+    async def release(cls, reservation_id: int) -> None:
+        """
+        Отменяет резерв: количество возвращается в свободный остаток.
+        """
+        async with async_session_maker() as session:
+            closed = await cls._close(session, reservation_id, ReservationStatus.RELEASED)
+            if closed is None:
+                raise ReservationNotActiveException
+
+            item_id, quantity = closed
+            await cls._unreserve(session, item_id, quantity)
+            await session.commit()
+
+        availability_index.adjust_reserved(item_id, -quantity)
+        expiration_index.adjust_reserved(item_id, -quantity)
+
+    @classmethod
+    async def expire_due(cls, limit: int) -> int:
+        """
+        Закрывает истекшие резервы одной транзакцией.
+        :return: Сколько резервов закрыто.
+        """
+        async with async_session_maker() as session:
+            due = (await session.execute(
+                select(StockReservation.id)
+                .where(
+                    StockReservation.status == ReservationStatus.ACTIVE,
+                    StockReservation.expires_at <= datetime.utcnow()
+                )
+                .order_by(StockReservation.expires_at)
+                .limit(limit)
+            )).scalars().all()
+
+            expired = []
+            for reservation_id in due:
+                # Резерв мог быть подтвержден или закрыт другим воркером после выборки
+                if (closed := await cls._close(session, reservation_id, ReservationStatus.EXPIRED)) is not None:
+                    await cls._unreserve(session, *closed)
+                    expired.append(closed)
+            await session.commit()
+
+        for item_id, quantity in expired:
+            availability_index.adjust_reserved(item_id, -quantity)
+            expiration_index.adjust_reserved(item_id, -quantity)
+        return len(due)
+
+    @classmethod
+    async def find(cls, reservation_id: int):
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(StockReservation.__table__).where(StockReservation.id == reservation_id)
+            )
+            return result.mappings().one_or_none()
+
+    @staticmethod
+    async def recount(session, depot_id: int) -> None:
+        """
+        Пересчитывает reserved_quantity предметов склада по активным
+        резервам (после замены предметов снимком, src/sync.py).
+        """
+        active = (
+            select(func.coalesce(func.sum(StockReservation.quantity), 0))
+            .where(
+                StockReservation.item_id == DepotItems.id,
+                StockReservation.status == ReservationStatus.ACTIVE
+            )
+            .scalar_subquery()
+        )
+        await session.execute(
+            update(DepotItems).where(DepotItems.depot_id == depot_id).values(reserved_quantity=active)
+        )
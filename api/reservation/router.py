@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Body, Depends, Path, Query, status
+from typing import Annotated
+
+from src.auth import get_current_user
+from src.permissions import Rule, require_rule
+from src.reservations import availability_index
+from api.models import CurrentUser
+from api.reservation.dao import ReservationDAO
+from src.responses import JSONResponse
+from config import settings
+
+router = APIRouter(
+    prefix='/reservation',
+    tags=['Reservation']
+)
+
+@router.get(
+    path='/available',
+    status_code=status.HTTP_200_OK,
+    description='Свободный остаток товара (количество за вычетом активных резервов)'
+)
+async def get_available(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    depot_id: int = Query(..., description='ID склада'),
+    barcode: str = Query(..., max_length=50, description='Штрихкод товара'),
+    section_id: int | None = Query(None, description='Только в этой секции')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Свободный остаток',
+            'data': await availability_index.available(depot_id, barcode, section_id)
+        }
+    )
+
+@router.post(
+    path='',
+    status_code=status.HTTP_201_CREATED,
+    description='Резерв количества предмета под заказ'
+)
+async def create_reservation(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    item_id: int = Body(..., description='ID предмета'),
+    quantity: int = Body(..., gt=0, description='Сколько зарезервировать'),
+    section_id: int | None = Body(None, description='Секция, из которой берется товар'),
+    ttl_seconds: int = Body(
+        settings.RESERVATION_TTL_SECONDS, gt=0, le=settings.RESERVATION_MAX_TTL_SECONDS,
+        description='Через сколько секунд резерв истекает'
+    ),
+    reference: str | None = Body(None, max_length=100, description='Номер заказа')
+) -> JSONResponse:
+    reservation = await ReservationDAO.reserve(
+        item_id=item_id,
+        quantity=quantity,
+        user_id=current_user.id,
+        ttl_seconds=ttl_seconds,
+        section_id=section_id,
+        reference=reference
+    )
+
+    return JSONResponse(
+        status_code=status.HTTP_201_CREATED,
+        content={
+            'message': 'Резерв создан',
+            'data': reservation
+        }
+    )
+
+@router.get(
+    path='/{reservation_id}',
+    status_code=status.HTTP_200_OK,
+    description='Получение резерва'
+)
+async def get_reservation(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    reservation_id: int = Path(..., description='ID резерва')
+) -> JSONResponse:
+    reservation = await ReservationDAO.find(reservation_id)
+    if reservation is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'message': 'Резерв не найден'}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Резерв',
+            'data': reservation
+        }
+    )
+
+@router.post(
+    path='/{reservation_id}/commit',
+    status_code=status.HTTP_200_OK,
+    description='Подтверждение резерва: количество списывается с предмета'
+)
+async def commit_reservation(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    reservation_id: int = Path(..., description='ID резерва')
+) -> JSONResponse:
+    await ReservationDAO.commit(reservation_id)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'message': 'Резерв подтвержден'}
+    )
+
+@router.delete(
+    path='/{reservation_id}',
+    status_code=status.HTTP_200_OK,
+    description='Отмена резерва'
+)
+async def release_reservation(
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_ITEMS))],
+    reservation_id: int = Path(..., description='ID резерва')
+) -> JSONResponse:
+    await ReservationDAO.release(reservation_id)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={'message': 'Резерв отменен'}
+    )
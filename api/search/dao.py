@@ -0,0 +1,126 @@
+import re
+
+from sqlalchemy import literal, or_, select
+from sqlalchemy.dialects.mysql import match
+
+from src.db import DepotItems, Supplier, async_session_maker
+
+
+class SearchKind:
+    ITEMS: str = 'items'
+    SUPPLIERS: str = 'suppliers'
+
+
+# Что ищем -> (модель, колонки FULLTEXT-индекса, колонка автодополнения, возвращаемые колонки)
+SEARCH_TARGETS = {
+    SearchKind.ITEMS: (
+        DepotItems,
+        (DepotItems.name, DepotItems.description),
+        DepotItems.name,
+        (DepotItems.id, DepotItems.depot_id, DepotItems.name, DepotItems.barcode, DepotItems.quantity),
+    ),
+    SearchKind.SUPPLIERS: (
+        Supplier,
+        (Supplier.name, Supplier.contact_person),
+        Supplier.name,
+        (Supplier.id, Supplier.name, Supplier.contact_person, Supplier.contact_phone),
+    ),
+}
+
+# Операторы BOOLEAN MODE и прочие спецсимволы в пользовательском запросе не нужны
+_SPECIAL_CHARS = re.compile(r'[+\-<>()~*"@%_\\]+')
+
+
+def normalize_query(value: str) -> str:
+    return ' '.join(_SPECIAL_CHARS.sub(' ', value).split())
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SearchDAO:
+    """
+    Поиск предметов и поставщиков.
+
+    На MySQL используется FULLTEXT-индекс с парсером ngram: запрос и текст
+    режутся на n-граммы, поэтому находятся части слов, другие словоформы
+    и слова с опечатками (совпадает большая часть n-грамм), а
+    релевантность считает сам InnoDB. На других СУБД - запасной вариант
+    через LIKE без ранжирования.
+    """
+
+    @classmethod
+    async def search(
+        cls,
+        kind: str,
+        query: str,
+        depot_id: int | None = None,
+        limit: int = 20,
+        offset: int = 0
+    ) -> tuple[list[dict], bool]:
+        """
+        :return: (найденные строки по убыванию релевантности, есть ли следующая страница)
+        """
+        model, columns, _, fields = SEARCH_TARGETS[kind]
+        text = normalize_query(query)
+        if not text:
+            return [], False
+
+        async with async_session_maker() as session:
+            if session.bind.dialect.name == 'mysql':
+                score = match(*columns, against=text).in_natural_language_mode()
+                statement = (
+                    select(*fields, score.label('score'))
+                    .where(score > 0)
+                    .order_by(score.desc(), model.id)
+                )
+            else:
+                words = [f'%{_escape_like(word)}%' for word in text.split()]
+                statement = (
+                    select(*fields, literal(1.0).label('score'))
+                    .where(or_(*(
+                        column.ilike(word, escape='\\') for word in words for column in columns
+                    )))
+                    .order_by(model.id)
+                )
+
+            if depot_id is not None and kind == SearchKind.ITEMS:
+                statement = statement.where(DepotItems.depot_id == depot_id)
+
+            # Лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+            result = await session.execute(statement.limit(limit + 1).offset(offset))
+            rows = [dict(row) for row in result.mappings()]
+
+        return rows[:limit], len(rows) > limit
+
+    @classmethod
+    async def autocomplete(
+        cls,
+        kind: str,
+        prefix: str,
+        depot_id: int | None = None,
+        limit: int = 10
+    ) -> list[str]:
+        """
+        Названия, начинающиеся с prefix. LIKE 'начало%' - это диапазон
+        по индексу ix_*_name, а не полный просмотр таблицы.
+        """
+        _, _, column, _ = SEARCH_TARGETS[kind]
+        prefix = prefix.strip()
+        if not prefix:
+            return []
+
+        statement = (
+            select(column)
+            .where(column.like(f'{_escape_like(prefix)}%', escape='\\'))
+            .distinct()
+            .order_by(column)
+            .limit(limit)
+        )
+        if depot_id is not None and kind == SearchKind.ITEMS:
+            statement = statement.where(DepotItems.depot_id == depot_id)
+
+        async with async_session_maker() as session:
+            result = await session.execute(statement)
+            return list(result.scalars().all())
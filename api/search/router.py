@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, Query, status
+from typing import Annotated
+
+from src.auth import get_current_user
+from api.models import CurrentUser
+from api.search.dao import SEARCH_TARGETS, SearchDAO
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/search',
+    tags=['Search']
+)
+
+@router.get(
+    path='/{kind}',
+    status_code=status.HTTP_200_OK,
+    description=f'Полнотекстовый поиск с ранжированием: {", ".join(SEARCH_TARGETS)}'
+)
+async def search(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    kind: str,
+    q: str = Query(..., min_length=1, max_length=200, description='Строка поиска'),
+    depot_id: int | None = Query(None, description='Искать предметы только на одном складе'),
+    limit: int = Query(20, ge=1, le=100, description='Размер страницы'),
+    offset: int = Query(0, ge=0, le=10000, description='Смещение')
+) -> JSONResponse:
+    if kind not in SEARCH_TARGETS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': 'Неизвестный тип поиска'}
+        )
+
+    rows, has_more = await SearchDAO.search(kind, q, depot_id, limit, offset)
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Результаты поиска',
+            'data': {'items': rows, 'limit': limit, 'offset': offset, 'has_more': has_more}
+        }
+    )
+
+@router.get(
+    path='/{kind}/autocomplete',
+    status_code=status.HTTP_200_OK,
+    description='Подсказки названий по началу строки'
+)
+async def autocomplete(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    kind: str,
+    prefix: str = Query(..., min_length=1, max_length=100, description='Начало названия'),
+    depot_id: int | None = Query(None, description='Только предметы одного склада'),
+    limit: int = Query(10, ge=1, le=50, description='Сколько подсказок вернуть')
+) -> JSONResponse:
+    if kind not in SEARCH_TARGETS:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={'message': 'Неизвестный тип поиска'}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Подсказки',
+            'data': await SearchDAO.autocomplete(kind, prefix, depot_id, limit)
+        }
+    )
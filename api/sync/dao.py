@@ -0,0 +1,246 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, func, insert, or_, select, update
+
+from dao.base import BaseDAO
+from api.item.dao import ItemDAO
+from api.reservation.dao import ReservationDAO
+from src.changelog import CENTRAL_ORIGIN, ChangeKind, get_cursor, set_cursor, sync_origin
+from src.db import (
+    City, Depot, DepotItems, DepotItemsType, DepotSection, GroupUsers, Supplier,
+    SyncChange, User, async_session_maker
+)
+from src.stock_summary import reconcile
+from config import settings
+
+# Справочники, которые узел склада получает целиком вместе со снимком:
+# без них на узле не работают авторизация, права и связи предметов
+REFERENCE_TABLES = tuple(model.__table__ for model in (
+    City, GroupUsers, User, Depot, DepotSection, Supplier, DepotItemsType
+))
+
+# Колонки изменения, которые передаются между узлом и центром
+CHANGE_COLUMNS = (
+    SyncChange.id, SyncChange.kind, SyncChange.depot_id, SyncChange.item_id,
+    SyncChange.quantity_delta, SyncChange.row,
+)
+
+PUSHED_CURSOR = 'pushed'
+PULLED_CURSOR = 'pulled'
+
+
+def _restore(table, row: dict) -> dict:
+    # Снимок приходит в JSON: даты - строками ISO
+    return {
+        column.name: datetime.fromisoformat(row[column.name])
+        if isinstance(column.type, DateTime) and row.get(column.name) is not None
+        else row.get(column.name)
+        for column in table.columns
+    }
+
+
+class SyncDAO(BaseDAO):
+    """
+    Синхронизация узлов складов с центральной БД (src/sync.py).
+    push/pull/snapshot выполняются в центре, остальные методы - на узле.
+    """
+    model = SyncChange
+
+    @classmethod
+    async def push(cls, origin: str, changes: list[dict]) -> int:
+        """
+        Применяет изменения узла одной транзакцией. Повторная отправка
+        безопасна: ID последнего примененного изменения узла хранится в
+        sync_state и коммитится вместе с изменениями.
+        :return: ID последнего примененного изменения узла.
+        """
+        touched = []
+        async with async_session_maker() as session:
+            key = f'push:{origin}'
+            applied = await get_cursor(session, key, lock=True) or 0
+
+            token = sync_origin.set(origin)
+            try:
+                for change in sorted(changes, key=lambda change: change['id']):
+                    if change['id'] <= applied:
+                        continue
+                    if (result := await ItemDAO._apply_remote(session, change)) is not None:
+                        touched.append(result)
+                    applied = change['id']
+            finally:
+                sync_origin.reset(token)
+
+            await set_cursor(session, key, applied)
+            await session.commit()
+
+        for item_id, before, after in touched:
+            ItemDAO._after_commit(item_id, before, after)
+        return applied
+
+    @classmethod
+    async def pull(cls, depot_id: int, after: int, limit: int, origin: str) -> tuple[list[dict], int]:
+        """
+        Изменения склада после курсора, включая перемещения с него.
+        Изменения самого узла не возвращаются, но курсор сдвигается и
+        через них.
+        :return: (изменения, новый курсор).
+        """
+        settled = datetime.utcnow() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        query = (
+            select(SyncChange.origin, *CHANGE_COLUMNS)
+            .where(
+                SyncChange.id > after,
+                SyncChange.created_at < settled,
+                or_(SyncChange.depot_id == depot_id, SyncChange.previous_depot_id == depot_id)
+            )
+            .order_by(SyncChange.id)
+            .limit(limit)
+        )
+        async with async_session_maker() as session:
+            rows = (await session.execute(query)).mappings().all()
+
+        changes = [
+            {key: value for key, value in row.items() if key != 'origin'}
+            for row in rows if row['origin'] != origin
+        ]
+        return changes, rows[-1]['id'] if rows else after
+
+    @classmethod
+    async def snapshot(cls, depot_id: int, origin: str) -> dict:
+        """
+        Предметы склада, справочники и курсор журнала, прочитанные в
+        одной транзакции.
+
+        Курсор, как и в pull, не заходит в последние SYNC_SETTLE_SECONDS:
+        изменение с меньшим ID могло еще не закоммититься и не попасть в
+        предметы. Хвост после курсора узел заберет через pull повторно,
+        поэтому видимые изменения хвоста (кроме изменений самого узла)
+        отдаются в tail: узел откатывает их дельты количества
+        (apply_snapshot), чтобы не применить дважды.
+        """
+        settled = datetime.utcnow() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+        async with async_session_maker() as session:
+            cursor = (await session.execute(
+                select(func.coalesce(func.max(SyncChange.id), 0)).where(SyncChange.created_at < settled)
+            )).scalar_one()
+            tail = (await session.execute(
+                select(SyncChange.kind, SyncChange.item_id, SyncChange.quantity_delta)
+                .where(
+                    SyncChange.id > cursor,
+                    SyncChange.origin != origin,
+                    or_(SyncChange.depot_id == depot_id, SyncChange.previous_depot_id == depot_id)
+                )
+            )).mappings().all()
+            items = (await session.execute(
+                select(DepotItems.__table__).where(DepotItems.depot_id == depot_id)
+            )).mappings().all()
+            reference = {
+                table.name: (await session.execute(select(table))).mappings().all()
+                for table in REFERENCE_TABLES
+            }
+
+        return {'cursor': cursor, 'tail': tail, 'items': items, 'reference': reference}
+
+    @classmethod
+    async def local_changes(cls, limit: int) -> list[dict]:
+        """
+        Неотправленные изменения узла.
+        """
+        async with async_session_maker() as session:
+            pushed = await get_cursor(session, PUSHED_CURSOR) or 0
+            rows = await session.execute(
+                select(*CHANGE_COLUMNS)
+                .where(SyncChange.id > pushed)
+                .order_by(SyncChange.id)
+                .limit(limit)
+            )
+            return [dict(row) for row in rows.mappings()]
+
+    @classmethod
+    async def mark_pushed(cls, applied: int) -> None:
+        """
+        Сдвигает курсор отправки и удаляет отправленное из журнала узла.
+        """
+        async with async_session_maker() as session:
+            await set_cursor(session, PUSHED_CURSOR, applied)
+            await session.execute(delete(SyncChange).where(SyncChange.id <= applied))
+            await session.commit()
+
+    @classmethod
+    async def pulled_cursor(cls) -> int | None:
+        """
+        :return: None, если узел еще не загружал снимок.
+        """
+        async with async_session_maker() as session:
+            return await get_cursor(session, PULLED_CURSOR)
+
+    @classmethod
+    async def apply_pulled(cls, depot_id: int, changes: list[dict], cursor: int) -> None:
+        """
+        Применяет изменения центра на узле вместе со сдвигом курсора.
+        """
+        touched = []
+        async with async_session_maker() as session:
+            token = sync_origin.set(CENTRAL_ORIGIN)
+            try:
+                for change in changes:
+                    if (result := await ItemDAO._apply_remote(session, change, depot_id)) is not None:
+                        touched.append(result)
+            finally:
+                sync_origin.reset(token)
+
+            await set_cursor(session, PULLED_CURSOR, cursor)
+            await session.commit()
+
+        for item_id, before, after in touched:
+            ItemDAO._after_commit(item_id, before, after)
+
+    @classmethod
+    async def apply_snapshot(cls, depot_id: int, snapshot: dict) -> None:
+        """
+        Заменяет справочники и предметы склада снимком центра. Локальные
+        изменения, которые центр еще не получил, накладываются поверх
+        снимка, сводки остатков пересчитываются.
+        """
+        async with async_session_maker() as session:
+            for table in REFERENCE_TABLES:
+                await session.execute(delete(table))
+                if rows := snapshot['reference'][table.name]:
+                    await session.execute(insert(table), [_restore(table, row) for row in rows])
+
+            await session.execute(delete(DepotItems).where(DepotItems.depot_id == depot_id))
+            if snapshot['items']:
+                await session.execute(
+                    insert(DepotItems), [_restore(DepotItems.__table__, row) for row in snapshot['items']]
+                )
+
+            # Хвост снимка придет повторно через pull: его дельты уже есть в предметах
+            for change in snapshot['tail']:
+                if change['kind'] == ChangeKind.ITEM and change['quantity_delta']:
+                    await session.execute(
+                        update(DepotItems)
+                        .where(DepotItems.id == change['item_id'], DepotItems.depot_id == depot_id)
+                        .values(quantity=DepotItems.quantity - change['quantity_delta'])
+                    )
+
+            pushed = await get_cursor(session, PUSHED_CURSOR) or 0
+            unpushed = await session.execute(
+                select(SyncChange.kind, SyncChange.item_id, SyncChange.quantity_delta)
+                .where(SyncChange.id > pushed)
+                .order_by(SyncChange.id)
+            )
+            for kind, item_id, quantity_delta in unpushed.all():
+                if kind == ChangeKind.DELETE:
+                    await session.execute(delete(DepotItems).where(DepotItems.id == item_id))
+                elif quantity_delta:
+                    await session.execute(
+                        update(DepotItems)
+                        .where(DepotItems.id == item_id)
+                        .values(quantity=DepotItems.quantity + quantity_delta)
+                    )
+
+            # Резервы узла живут только в его БД
+            await ReservationDAO.recount(session, depot_id)
+            await reconcile(session)
+            await set_cursor(session, PULLED_CURSOR, snapshot['cursor'])
+            await session.commit()
@@ -0,0 +1,81 @@
+import hmac
+
+from fastapi import APIRouter, Body, Depends, Header, Query, status
+
+from api.sync.dao import SyncDAO
+from src.responses import JSONResponse
+from config import settings
+from exceptions import SyncTokenInvalidException
+
+router = APIRouter(
+    prefix='/sync',
+    tags=['Sync']
+)
+
+
+async def verify_sync_token(x_sync_token: str = Header(..., description='Общий секрет узлов и центра (SYNC_TOKEN)')) -> None:
+    if settings.SYNC_TOKEN is None or not hmac.compare_digest(x_sync_token, settings.SYNC_TOKEN):
+        raise SyncTokenInvalidException
+
+
+@router.post(
+    path='/push',
+    status_code=status.HTTP_200_OK,
+    description='Прием изменений узла склада',
+    dependencies=[Depends(verify_sync_token)]
+)
+async def push_changes(
+    origin: str = Body(..., max_length=50, description='Имя узла (EDGE_NODE_ID)'),
+    changes: list[dict] = Body(..., description='Изменения из журнала узла')
+) -> JSONResponse:
+    applied = await SyncDAO.push(origin, changes)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Изменения применены',
+            'data': {'applied': applied}
+        }
+    )
+
+
+@router.get(
+    path='/pull',
+    status_code=status.HTTP_200_OK,
+    description='Изменения склада для узла после курсора',
+    dependencies=[Depends(verify_sync_token)]
+)
+async def pull_changes(
+    depot_id: int = Query(..., description='ID склада узла'),
+    after: int = Query(0, ge=0, description='Курсор: ID последнего полученного изменения'),
+    limit: int = Query(settings.SYNC_BATCH_SIZE, gt=0, le=5000, description='Максимум изменений'),
+    origin: str = Query(..., max_length=50, description='Имя узла: его собственные изменения не возвращаются')
+) -> JSONResponse:
+    changes, cursor = await SyncDAO.pull(depot_id, after, limit, origin)
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Изменения склада',
+            'data': {'changes': changes, 'cursor': cursor}
+        }
+    )
+
+
+@router.get(
+    path='/snapshot',
+    status_code=status.HTTP_200_OK,
+    description='Полный снимок склада и справочников для узла',
+    dependencies=[Depends(verify_sync_token)]
+)
+async def get_snapshot(
+    depot_id: int = Query(..., description='ID склада узла'),
+    origin: str = Query(..., max_length=50, description='Имя узла: его собственные изменения не попадают в tail')
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Снимок склада',
+            'data': await SyncDAO.snapshot(depot_id, origin)
+        }
+    )
@@ -0,0 +1,240 @@
+import json
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from dao.base import BaseDAO
+from src.db import Task, async_session_maker
+
+
+class TaskStatus:
+    PENDING: str = 'pending'
+    RUNNING: str = 'running'
+    DONE: str = 'done'
+    FAILED: str = 'failed'
+
+
+class TaskDAO(BaseDAO):
+    model = Task
+
+    @classmethod
+    async def enqueue(cls, task: Task) -> int:
+        """
+        Ставит задачу в очередь.
+
+        Если у задачи есть idempotency_key и задача с таким ключом уже
+        существует, новая не создается - возвращается ID существующей.
+        :return: ID задачи.
+        """
+        async with async_session_maker() as session:
+            session.add(task)
+            try:
+                await session.commit()
+                return task.id
+            except IntegrityError:
+                await session.rollback()
+                if task.idempotency_key is None:
+                    raise
+
+            result = await session.execute(
+                select(Task.id).filter_by(idempotency_key=task.idempotency_key)
+            )
+            return result.scalar_one()
+
+    @classmethod
+    async def claim_due(
+        cls,
+        task_type: str,
+        limit: int,
+        worker_id: str,
+        lease: timedelta
+    ) -> list[Task]:
+        """
+        Забирает в работу до limit готовых к запуску задач одного типа,
+        в порядке приоритета и времени запуска, и закрепляет их за
+        воркером на время lease.
+
+        SELECT ... FOR UPDATE SKIP LOCKED пропускает строки, которые в этот
+        момент забирает другой воркер, поэтому воркеры не ждут друг друга
+        и одна задача не достается двум воркерам.
+        """
+        now = datetime.utcnow()
+        query = (
+            select(Task)
+            .where(
+                Task.status == TaskStatus.PENDING,
+                Task.task_type == task_type,
+                Task.run_at <= now
+            )
+            .order_by(Task.priority.desc(), Task.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            tasks = result.scalars().all()
+            if tasks:
+                await session.execute(
+                    update(Task)
+                    .where(Task.id.in_([task.id for task in tasks]))
+                    .values(
+                        status=TaskStatus.RUNNING,
+                        attempts=Task.attempts + 1,
+                        started_at=now,
+                        locked_by=worker_id,
+                        lease_expires_at=now + lease
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+
+        for task in tasks:
+            task.attempts += 1
+        return tasks
+
+    @classmethod
+    async def heartbeat(cls, worker_id: str, task_ids: list[int], lease: timedelta) -> set[int]:
+        """
+        Продлевает аренду задач воркера.
+        :return: ID задач, которые все еще закреплены за воркером. Остальные
+            были переданы другому воркеру после истечения аренды.
+        """
+        if not task_ids:
+            return set()
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Task)
+                .where(
+                    Task.id.in_(task_ids),
+                    Task.locked_by == worker_id,
+                    Task.status == TaskStatus.RUNNING
+                )
+                .values(lease_expires_at=datetime.utcnow() + lease)
+            )
+            result = await session.execute(
+                select(Task.id).where(Task.id.in_(task_ids), Task.locked_by == worker_id)
+            )
+            owned = set(result.scalars().all())
+            await session.commit()
+
+        return owned
+
+    @classmethod
+    async def reclaim_expired(cls) -> int:
+        """
+        Возвращает в очередь задачи, аренда которых истекла (воркер упал
+        или завис). Задачи, исчерпавшие попытки, помечаются как failed.
+        :return: Количество возвращенных в очередь задач.
+        """
+        now = datetime.utcnow()
+        expired = (
+            Task.status == TaskStatus.RUNNING,
+            Task.lease_expires_at < now
+        )
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Task)
+                .where(*expired, Task.attempts >= Task.max_attempts)
+                .values(
+                    status=TaskStatus.FAILED,
+                    error='Истекла аренда воркера',
+                    locked_by=None,
+                    lease_expires_at=None,
+                    finished_at=now
+                )
+            )
+            result = await session.execute(
+                update(Task)
+                .where(*expired)
+                .values(
+                    status=TaskStatus.PENDING,
+                    error='Истекла аренда воркера',
+                    locked_by=None,
+                    lease_expires_at=None
+                )
+            )
+            await session.commit()
+            return result.rowcount
+
+    @classmethod
+    async def set_progress(cls, task_id: int, progress: int) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Task).where(Task.id == task_id).values(progress=max(0, min(progress, 100)))
+            )
+            await session.commit()
+
+    @classmethod
+    async def mark_done(cls, task_id: int, worker_id: str, result: dict | None = None) -> None:
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Task).where(Task.id == task_id, Task.locked_by == worker_id).values(
+                    status=TaskStatus.DONE,
+                    locked_by=None,
+                    lease_expires_at=None,
+                    progress=100,
+                    result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                    error=None,
+                    finished_at=datetime.utcnow()
+                )
+            )
+            await session.commit()
+
+    @classmethod
+    async def mark_failed(
+        cls,
+        task_id: int,
+        worker_id: str,
+        error: str,
+        retry_in: timedelta | None = None
+    ) -> None:
+        """
+        Фиксирует ошибку задачи.
+        :param retry_in: Через сколько повторить. None - задача завершена с ошибкой.
+        """
+        values = {'error': error[:65535], 'locked_by': None, 'lease_expires_at': None}
+        if retry_in is None:
+            values.update(status=TaskStatus.FAILED, finished_at=datetime.utcnow())
+        else:
+            values.update(status=TaskStatus.PENDING, run_at=datetime.utcnow() + retry_in)
+
+        async with async_session_maker() as session:
+            await session.execute(
+                update(Task).where(Task.id == task_id, Task.locked_by == worker_id).values(**values)
+            )
+            await session.commit()
+
+    @classmethod
+    async def find_for_user(cls, user_id: int, limit: int = 50) -> list:
+        query = (
+            select(
+                Task.id, Task.task_type, Task.status, Task.progress,
+                Task.attempts, Task.run_at, Task.created_at, Task.finished_at
+            )
+            .filter_by(user_id=user_id)
+            .order_by(Task.id.desc())
+            .limit(limit)
+        )
+        async with async_session_maker() as session:
+            result = await session.execute(query)
+            return result.mappings().all()
+
+    @classmethod
+    async def last_result(cls, task_type: str) -> dict | None:
+        """
+        Результат последней успешно выполненной задачи данного типа.
+        Периодические задачи хранят в нем свои водяные знаки.
+        """
+        query = (
+            select(Task.result)
+            .where(Task.status == TaskStatus.DONE, Task.task_type == task_type)
+            .order_by(Task.run_at.desc())
+            .limit(1)
+        )
+        async with async_session_maker() as session:
+            result = (await session.execute(query)).scalar_one_or_none()
+        return json.loads(result) if result else None
@@ -0,0 +1,67 @@
+import json
+
+from fastapi import APIRouter, Depends, status
+from typing import Annotated
+
+from src.auth import get_current_user
+from api.models import CurrentUser
+from api.task.dao import TaskDAO
+from src.responses import JSONResponse
+
+router = APIRouter(
+    prefix='/task',
+    tags=['Task']
+)
+
+@router.get(
+    path='/',
+    status_code=status.HTTP_200_OK,
+    description='Список последних задач текущего пользователя'
+)
+async def get_my_tasks(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)]
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Список задач был получен успешно',
+            'data': await TaskDAO.find_for_user(current_user.id)
+        }
+    )
+
+@router.get(
+    path='/{task_id}',
+    status_code=status.HTTP_200_OK,
+    description='Статус и результат фоновой задачи'
+)
+async def get_task(
+    current_user: Annotated[CurrentUser, Depends(get_current_user)],
+    task_id: int
+) -> JSONResponse:
+    task = await TaskDAO.find_one_or_none(id=task_id, user_id=current_user.id)
+    if task is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={'message': 'Задача с указанным ID не найдена'}
+        )
+
+    return JSONResponse(
+        status_code=status.HTTP_200_OK,
+        content={
+            'message': 'Информация о задаче была успешно получена',
+            'data': {
+                'id': task['id'],
+                'task_type': task['task_type'],
+                'status': task['status'],
+                'progress': task['progress'],
+                'attempts': task['attempts'],
+                'max_attempts': task['max_attempts'],
+                'result': json.loads(task['result']) if task['result'] else None,
+                'error': task['error'],
+                'run_at': task['run_at'],
+                'created_at': task['created_at'],
+                'started_at': task['started_at'],
+                'finished_at': task['finished_at'],
+            }
+        }
+    )
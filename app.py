@@ -1,27 +1,80 @@
-import asyncio
-import uvicorn
 import logging
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.utils import get_openapi
 from fastapi.security import OAuth2PasswordBearer
 
 from api.account.router import router as router_account 
 from api.attachment.router import router as router_attachment
 from api.group.router import router as router_group 
+from api.task.router import router as router_task
+from api.data.router import router as router_data
+from api.document.router import router as router_document
+from api.report.router import router as router_report
+from api.item.router import router as router_item
+from api.dispatch.router import router as router_dispatch
+from api.search.router import router as router_search
+from api.metrics.router import router as router_metrics
+from api.profiler.router import router as router_profiler
+from api.events.router import router as router_events
+from api.sync.router import router as router_sync
+from api.reservation.router import router as router_reservation
+from api.inventory.router import router as router_inventory
 
-from src.db import create_tables, async_session_maker
+from src.db import async_session_maker
+from src.metrics import MetricsMiddleware, metrics
+from src.openapi import install as install_openapi
+from src.auth_archive import authorization_recorder
+from src.permissions import permission_cache
+from src.profiler import ProfilerMiddleware
+from src.ratelimit import RateLimitMiddleware
+from src.reservations import reservation_sweeper
+from src.sync import edge_sync
+from src.user_state import user_state_cache
+from src.responses import JSONResponse
+from src.tasks import task_worker
+from config import settings
 
 logging.basicConfig(level=logging.WARNING)  
 logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await metrics.start()
+    await permission_cache.start()
+    await user_state_cache.start()
+    await authorization_recorder.start()
+    await reservation_sweeper.start()
+    if settings.TASK_WORKER_ENABLED:
+        await task_worker.start()
+    if settings.EDGE_MODE:
+        await edge_sync.start()
+
+    yield
+
+    if settings.EDGE_MODE:
+        await edge_sync.stop()
+    if settings.TASK_WORKER_ENABLED:
+        await task_worker.stop(timeout=settings.SERVER_GRACEFUL_TIMEOUT)
+    await reservation_sweeper.stop()
+    # Записи архива авторизаций сбрасываются в БД до остановки
+    await authorization_recorder.stop()
+    await user_state_cache.stop()
+    await permission_cache.stop()
+    await metrics.stop()
+
+
 api = FastAPI(
     title='API By Reques6e',
     version='0.1.0',
+    description='API для работы с учетными записями пользователей',
     redoc_url=None,
+    default_response_class=JSONResponse,
+    lifespan=lifespan,
     openapi_tags=[
         {
             "name": "Account",
@@ -35,6 +88,13 @@ origins = [
     "http://localhost:3000",
 ]
 
+if settings.PROFILER_ENABLED:
+    # Внутри лимитера и метрик: в профиль попадает только работа приложения
+    api.add_middleware(ProfilerMiddleware)
+
+# Добавляется раньше CORS, чтобы ответы 429 тоже получали CORS-заголовки
+api.add_middleware(RateLimitMiddleware)
+
 api.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -45,31 +105,34 @@ api.add_middleware(
                    "Authorization"],
 )
 
+if settings.METRICS_ENABLED:
+    # Добавляется последним, то есть снаружи остальных: учитываются и
+    # ответы 429 лимитера (маршрут у них не определен - <unmatched>)
+    api.add_middleware(MetricsMiddleware)
+
 api.include_router(router_account)
 api.include_router(router_attachment)
 api.include_router(router_group)
+api.include_router(router_task)
+api.include_router(router_data)
+api.include_router(router_document)
+api.include_router(router_report)
+api.include_router(router_item)
+api.include_router(router_dispatch)
+api.include_router(router_search)
+api.include_router(router_metrics)
+api.include_router(router_profiler)
+api.include_router(router_events)
+api.include_router(router_sync)
+api.include_router(router_reservation)
+api.include_router(router_inventory)
 
-api.openapi_schema = get_openapi(
-    title="API By Reques6e",
-    version="0.1.0",
-    description="API для работы с учетными записями пользователей",
-    routes=api.routes,
-)
-
-api.openapi_schema["components"]["securitySchemes"] = {
-    "BearerAuth": {
-        "type": "http",
-        "scheme": "bearer",
-        "bearerFormat": "JWT"
-    }
-}
-api.openapi_schema["security"] = [{"BearerAuth": []}]
+# Схема строится при первом обращении к /docs или берется из
+# OPENAPI_SCHEMA_PATH (src/openapi.py)
+install_openapi(api)
 
 if __name__ == '__main__':
-    asyncio.run(create_tables())
-    uvicorn.run(
-        app='app:api', 
-        host='0.0.0.0', 
-        port=91,
-        reload=True # В проде офнуть нужно
-    )
+    from src.server import run
+
+    # Миграции один раз, затем воркеры uvicorn (src/server.py)
+    run()
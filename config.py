@@ -9,6 +9,16 @@ class Settings(BaseSettings):
 
     AppName: str
 
+    # Запуск сервера (src/server.py)
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 91
+    SERVER_WORKERS: int | None = None # None - по числу CPU
+    SERVER_RELOAD: bool = False # Режим разработки: один процесс с перезапуском при изменении кода
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEP_ALIVE: int = 5 # Сколько держать простаивающее keep-alive соединение, в секундах
+    SERVER_GRACEFUL_TIMEOUT: int = 30 # Сколько ждать запросы и задачи в работе при остановке
+    OPENAPI_SCHEMA_PATH: str | None = None # Схема, построенная при сборке (scripts/build_openapi.py)
+
     # Типизация для подключения базы данных
     DB_HOST: str
     DB_PORT: int
@@ -18,6 +28,9 @@ class Settings(BaseSettings):
 
     @property
     def DATABASE_URL(self):
+        if self.EDGE_MODE:
+            # Узел склада работает с локальной SQLite (src/sync.py)
+            return f'sqlite+aiosqlite:///{self.EDGE_DATABASE_PATH}'
         return f'mysql+asyncmy://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}/{self.DB_NAME}'
     
     # Секретный ключ, нужен для генерации JWT токенов и 
@@ -34,6 +47,115 @@ class Settings(BaseSettings):
     SMTP_USER: str | None = None
     SMTP_PASS: str | None = None
 
+    # Хранилище S3 (src/s3.py)
+    S3_BUCKET_NAME: str | None = None
+    S3_ENDPOINT_URL: str | None = None
+    S3_REGION_NAME: str | None = None
+    S3_ACCESS_KEY: str | None = None
+    S3_SECRET_ACCESS_KEY: str | None = None
+
+    # Кэш ответов справочных эндпоинтов (src/cache.py)
+    RESPONSE_CACHE_TTL: int = 60
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+
+    # Фоновые задачи (src/tasks.py)
+    TASK_WORKER_ENABLED: bool = True
+    TASK_POLL_INTERVAL: float = 1.0
+    TASK_DEFAULT_CONCURRENCY: int = 4
+    TASK_RETRY_BASE_DELAY: int = 5 # Задержка перед первым повтором, в секундах
+    TASK_RETRY_MAX_DELAY: int = 600
+    TASK_LEASE_SECONDS: int = 60 # На сколько задача закрепляется за воркером
+    TASK_HEARTBEAT_INTERVAL: float = 15 # Как часто воркер продлевает аренду
+    TASK_SCHEDULE_TICK: float = 30 # Как часто проверяются периодические задачи
+
+    # Импорт данных из CSV/XLSX (src/importer.py)
+    IMPORT_BATCH_SIZE: int = 1000 # Строк в одной пачке валидации и вставки
+    IMPORT_MAX_ERRORS: int = 1000 # Сколько ошибок по строкам сохранять в результате задачи
+
+    # Экспорт склада (src/exporter.py)
+    EXPORT_FETCH_SIZE: int = 5000 # Строк за одну выборку из серверного курсора
+    EXPORT_LINK_TTL: int = 3600 # Время жизни ссылки на скачивание, в секундах
+    EXPORT_NIGHTLY_FORMAT: str | None = None # Формат ночного экспорта (csv, xlsx, parquet), None - выключен; нужен S3
+    EXPORT_NIGHTLY_HOUR: int = 2 # Час запуска ночного экспорта, UTC
+
+    # Генерация документов (src/documents.py)
+    DOCUMENT_WORKERS: int | None = None # Процессов рендеринга, None - по числу CPU
+    DOCUMENT_UPLOAD_CONCURRENCY: int = 8 # Одновременных загрузок готовых актов в S3
+
+    # Сводки остатков (src/stock_summary.py)
+    STOCK_SUMMARY_RECONCILE_HOURS: int = 6 # Период сверки сводок с depot_items, 0 - не сверять
+
+    # Сроки годности (src/expiration.py)
+    EXPIRATION_INDEX_TTL: int = 60 # Через сколько секунд перечитывать кучи склада из БД
+    EXPIRY_ALERT_DAYS: int = 7 # За сколько дней до окончания срока годности оповещать
+    EXPIRY_ALERT_INTERVAL_MINUTES: int = 60 # Период проверки сроков, 0 - не проверять
+    EXPIRY_ALERT_MAX_ITEMS: int = 1000 # Сколько предметов на склад отдавать в /item/expiry-alerts
+
+    # Резервы остатков под заказы (src/reservations.py)
+    RESERVATION_TTL_SECONDS: int = 900 # Время жизни резерва по умолчанию
+    RESERVATION_MAX_TTL_SECONDS: int = 86400
+    RESERVATION_SWEEP_SECONDS: float = 5 # Период поиска истекших резервов
+    RESERVATION_SWEEP_BATCH: int = 500 # Истекших резервов за одну транзакцию
+    AVAILABILITY_INDEX_TTL: int = 30 # Через сколько секунд перечитывать доступные остатки склада из БД
+
+    # Инвентаризация (src/inventory.py)
+    INVENTORY_STAGE_MAX_LINES: int = 5000 # Строк в одной пачке от сканера
+    INVENTORY_STAGE_CHUNK: int = 1000 # Строк в одном executemany upsert при загрузке пачки
+    INVENTORY_APPLY_CHUNK: int = 2000 # Корректировок в одной транзакции при закрытии
+
+    # Планирование доставки (src/routing.py)
+    ROUTING_MAX_PASSES: int = 50 # Максимум проходов 2-opt на маршрут
+
+    # Права групп (src/permissions.py)
+    PERMISSIONS_REFRESH_SECONDS: int = 30 # Как часто перечитывать правила групп из БД
+
+    # Токены (src/auth.py, src/user_state.py)
+    ACCESS_TOKEN_MINUTES: int = 15 # Время жизни access-токена
+    REFRESH_TOKEN_DAYS: int = 30 # Время жизни refresh-токена
+    USER_STATE_POLL_SECONDS: float = 2 # Как часто забирать блокировки и другие изменения пользователей
+
+    # Ограничение частоты запросов (src/ratelimit.py)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_MAX_KEYS: int = 100000 # Максимум корзин в памяти процесса
+    RATE_LIMIT_REDIS_URL: str | None = None # Общие для воркеров лимиты, None - в памяти процесса
+    RATE_LIMIT_TRUST_FORWARDED: bool = False # Брать IP из X-Forwarded-For (только за своим прокси)
+
+    # Архив авторизаций (src/auth_archive.py)
+    AUTH_ARCHIVE_BATCH_SIZE: int = 500 # Записей в одной вставке
+    AUTH_ARCHIVE_FLUSH_SECONDS: float = 1.0 # Максимальная задержка записи в БД
+    AUTH_ARCHIVE_BUFFER_SIZE: int = 10000 # Максимум записей в памяти, дальше авторизация ждет
+    AUTH_ARCHIVE_PUT_TIMEOUT: float = 0.5 # Сколько ждать места в буфере, потом запись теряется
+
+    # Метрики (src/metrics.py)
+    METRICS_ENABLED: bool = True
+    METRICS_DIR: str | None = None # Каталог файлов метрик воркеров, None - только метрики процесса
+    METRICS_FLUSH_SECONDS: float = 5 # Как часто воркер сохраняет свои счетчики
+
+    # Профилирование запросов (src/profiler.py)
+    PROFILER_ENABLED: bool = True # False - middleware не подключается
+    PROFILER_INTERVAL: float = 0.001 # Период выборки стека, в секундах
+    PROFILER_STORAGE: Literal['local', 's3'] = 'local'
+    PROFILER_OUTPUT_DIR: str = 'profiles' # Каталог профилей при PROFILER_STORAGE='local'
+    PROFILER_MAX_WINDOW_SECONDS: int = 600 # Максимальная длина окна профилирования
+
+    # Уведомления об изменении остатков (src/events.py)
+    STOCK_EVENTS_WINDOW_MS: int = 200 # Окно слияния изменений одного предмета
+    STOCK_EVENTS_MAX_PENDING: int = 5000 # Неотправленных событий на подписчика, дальше resync
+    STOCK_EVENTS_MAX_SUBSCRIBERS: int = 1000 # Подписчиков на процесс
+    STOCK_EVENTS_HEARTBEAT_SECONDS: int = 15 # Пинг SSE-соединения при отсутствии событий
+
+    # Синхронизация узлов складов с центральной БД (src/sync.py)
+    EDGE_MODE: bool = False # Узел склада: локальная SQLite и синхронизация с центром
+    EDGE_DATABASE_PATH: str = 'edge.db'
+    EDGE_NODE_ID: str = 'edge' # Уникальное имя узла, пишется в журнал изменений
+    EDGE_DEPOT_ID: int | None = None # Склад, который обслуживает узел
+    EDGE_CENTRAL_URL: str | None = None # Адрес центрального API
+    EDGE_SYNC_INTERVAL_SECONDS: float = 10 # Пауза между циклами синхронизации
+    EDGE_SNAPSHOT_SECONDS: int = 3600 # Как часто узел перечитывает склад и справочники целиком
+    SYNC_TOKEN: str | None = None # Общий секрет узлов и центра, None - синхронизация выключена
+    SYNC_BATCH_SIZE: int = 500 # Изменений в одной передаче
+    SYNC_SETTLE_SECONDS: int = 5 # Узлы получают изменения не моложе этого: транзакции с меньшим ID успевают завершиться
+
 settings = Settings(
     AppName='TestDepotManager',
     DB_HOST='176.57.218.143',
@@ -52,3 +52,43 @@ class IncorrectTokenFormatException(BookingException):
 class CannotAddDataToDatabase(BookingException):
     status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     detail='Не удалось добавить запись'
+
+class PermissionDeniedException(BookingException):
+    status_code=status.HTTP_403_FORBIDDEN
+    detail='Недостаточно прав для выполнения действия'
+
+class EdgeItemCreateException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='На узле склада нельзя создавать предметы: они создаются в центральной БД'
+
+class EdgeUserCreateException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='На узле склада нельзя регистрировать пользователей: они создаются в центральной БД'
+
+class SyncTokenInvalidException(BookingException):
+    status_code=status.HTTP_403_FORBIDDEN
+    detail='Неверный токен синхронизации'
+
+class ItemNotFoundException(BookingException):
+    status_code=status.HTTP_404_NOT_FOUND
+    detail='Предмет не найден'
+
+class InsufficientStockException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='Недостаточно свободного остатка с учетом резервов'
+
+class ItemNotInSectionException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='Предмет не находится в указанной секции'
+
+class ReservationNotActiveException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='Резерв не найден, истек или уже закрыт'
+
+class InventoryCountNotFoundException(BookingException):
+    status_code=status.HTTP_404_NOT_FOUND
+    detail='Инвентаризация не найдена'
+
+class InventoryCountStateException(BookingException):
+    status_code=status.HTTP_409_CONFLICT
+    detail='Инвентаризация уже закрывается, закрыта или отменена'
@@ -0,0 +1,26 @@
+"""
+Строит схему OpenAPI при сборке, чтобы воркеры не строили ее сами.
+
+    python scripts/build_openapi.py openapi.json
+
+Затем укажите путь в OPENAPI_SCHEMA_PATH (src/openapi.py).
+"""
+import json
+import sys
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import api  # noqa: E402
+from src.openapi import build_schema  # noqa: E402
+
+
+def main() -> None:
+    target = Path(sys.argv[1] if len(sys.argv) > 1 else 'openapi.json')
+    target.write_text(json.dumps(build_schema(api), ensure_ascii=False))
+    print(f'Схема OpenAPI записана в {target}')
+
+
+if __name__ == '__main__':
+    main()
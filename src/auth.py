@@ -1,5 +1,6 @@
 import jwt
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import Optional
 
 from fastapi import Depends, HTTPException, status
@@ -8,53 +9,142 @@ from jwt.exceptions import InvalidTokenError
 from typing import Annotated
 
 
-from api.models import UserStructure
+from api.models import CurrentUser, UserStructure
 from api.account.dao import UserDAO
 
 from src.manager import UserManager
+from src.permissions import permission_cache
+from src.user_state import user_state_cache
 from src.logger import _logger
 
 from config import settings
-from exceptions import UserIsBlocked, FailCheckUserData
+from exceptions import UserIsBlocked, FailCheckUserData, TokenExpiredException
 
 ALGORITHM = 'HS256'
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> UserStructure:
+class TokenType:
+    ACCESS: str = 'access'
+    REFRESH: str = 'refresh'
+
+
+async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> CurrentUser:
     """
-    Извлекает текущего пользователя на основе токена авторизации.
-    
-    Пытается декодировать токен и извлечь идентификатор пользователя. 
-    Если токен недействителен или пользователь не найден, вызывает исключение 401 (Unauthorized).
-    
+    Извлекает текущего пользователя из access-токена.
+
+    Все нужные данные (ID, группа, версии прав и состояния) лежат в
+    токене, поэтому проверка не обращается к БД: версия состояния
+    сверяется с user_state_cache, версия прав - с permission_cache.
+    Токен с устаревшей версией (пользователя заблокировали, сменили ему
+    группу или права группы) отклоняется как истекший - клиент должен
+    получить новый через refresh-токен.
+
     Args:
         token (str): Токен авторизации, переданный в заголовке запроса.
-    
+
     Returns:
-        UserStructure: Модель пользователя, если токен валиден.
-    
+        CurrentUser: ID и группа пользователя.
+
     Raises:
-        HTTPException: В случае ошибки валидации токена или отсутствии пользователя.
+        HTTPException: В случае ошибки валидации токена или устаревшего токена.
     """
-    
     try:
         payload = jwt.decode(token, settings.SECRET_JWT_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get('id')
-        if user_id is None:
-            raise FailCheckUserData
+    except jwt.ExpiredSignatureError:
+        raise TokenExpiredException
     except InvalidTokenError:
         raise FailCheckUserData
 
+    user_id = payload.get('id')
+    if user_id is None:
+        raise FailCheckUserData
+
+    if 'uv' not in payload and 'type' not in payload:
+        # Токены старого формата (только id) проверяются по БД, пока не истекут
+        return await _get_legacy_user(user_id)
+
+    if payload.get('type') != TokenType.ACCESS:
+        raise FailCheckUserData
+
+    if not user_state_cache.is_current(user_id, payload['uv']):
+        raise TokenExpiredException
+    if not await permission_cache.is_current_version(payload['gid'], payload['pv']):
+        raise TokenExpiredException
+
+    return CurrentUser(id=user_id, group_id=payload['gid'])
+
+
+async def _get_legacy_user(user_id: int) -> CurrentUser:
     user = await UserDAO.find_one_or_none(id=user_id)
     if user is None:
         raise FailCheckUserData
-    
+
+    user = UserStructure(**user)
+
     validate = await UserManager.validate_user(user=user)
     if validate.result == False:
         raise UserIsBlocked
 
-    return user
+    return CurrentUser(id=user.id, group_id=user.group_id)
+
+
+async def create_token_pair(user) -> dict:
+    """
+    Выдает access-токен с claims и refresh-токен.
+    :param user: Строка users (нужны id, group_id, state_version).
+    """
+    access_ttl = timedelta(minutes=settings.ACCESS_TOKEN_MINUTES)
+    access_token = create_access_token(
+        data={
+            'type': TokenType.ACCESS,
+            'id': user.id,
+            'gid': user.group_id,
+            'pv': await permission_cache.version(user.group_id),
+            'uv': user.state_version,
+        },
+        expires_delta=access_ttl
+    )
+    refresh_token = create_access_token(
+        data={
+            'type': TokenType.REFRESH,
+            'id': user.id,
+            'uv': user.state_version,
+        },
+        expires_delta=timedelta(days=settings.REFRESH_TOKEN_DAYS)
+    )
+    return {
+        'token': access_token,
+        'refresh_token': refresh_token,
+        'expires_in': int(access_ttl.total_seconds()),
+    }
+
+
+async def refresh_token_pair(refresh_token: str) -> dict:
+    """
+    Обменивает refresh-токен на новую пару токенов. Здесь, в отличие от
+    обычных запросов, пользователь читается из БД: проверяются блокировка
+    и версия состояния, так что после блокировки refresh сразу перестает работать.
+    """
+    try:
+        payload = jwt.decode(refresh_token, settings.SECRET_JWT_KEY, algorithms=[ALGORITHM])
+    except jwt.ExpiredSignatureError:
+        raise TokenExpiredException
+    except InvalidTokenError:
+        raise FailCheckUserData
+
+    if payload.get('type') != TokenType.REFRESH:
+        raise FailCheckUserData
+
+    user = await UserDAO.find_one_or_none(id=payload.get('id'))
+    if user is None or user['state_version'] != payload.get('uv'):
+        raise FailCheckUserData
+
+    validate = await UserManager.validate_user(user=UserStructure(**user))
+    if validate.result == False:
+        raise UserIsBlocked
+
+    return await create_token_pair(SimpleNamespace(**user))
 
 
 async def decode_jwt(token: str) -> dict:
@@ -0,0 +1,128 @@
+"""
+Запись истории авторизаций (authorization_archive) без лишней записи в
+БД на пути авторизации.
+
+Авторизация только кладет запись в ограниченную очередь в памяти
+(AUTH_ARCHIVE_BUFFER_SIZE). Фоновая задача забирает записи пачками и
+вставляет их одним INSERT - когда набралось AUTH_ARCHIVE_BATCH_SIZE
+записей или прошло AUTH_ARCHIVE_FLUSH_SECONDS с первой записи пачки.
+
+Если БД не успевает и очередь заполнена, авторизация ждет места до
+AUTH_ARCHIVE_PUT_TIMEOUT (обратное давление), после чего запись
+теряется с ошибкой в логе - вход пользователя из-за архива не
+блокируется. Неудачная пачка повторяется на следующем сбросе. При
+штатной остановке приложения все накопленные записи сбрасываются в БД.
+"""
+import asyncio
+import time
+
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.db import AuthorizationArchive, async_session_maker
+from src.logger import _logger
+from config import settings
+
+
+class AuthorizationRecorder:
+
+    def __init__(self) -> None:
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=settings.AUTH_ARCHIVE_BUFFER_SIZE)
+        # Пачка, которую не удалось записать: повторяется первой
+        self._pending: list[dict] = []
+        self._flusher: asyncio.Task | None = None
+        self.dropped = 0
+
+    async def record(self, user_id: int, ip: str) -> None:
+        entry = {'user_id': user_id, 'auth_time': datetime.utcnow(), 'ip': ip[:45]}
+        try:
+            self._queue.put_nowait(entry)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        try:
+            await asyncio.wait_for(self._queue.put(entry), settings.AUTH_ARCHIVE_PUT_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.dropped += 1
+            _logger.error('Буфер архива авторизаций переполнен, запись потеряна', extra={
+                'UserId': user_id, 'Dropped': self.dropped
+            })
+
+    def _take(self, limit: int) -> None:
+        while len(self._pending) < limit:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def flush(self) -> int:
+        """
+        Записывает накопленную пачку.
+        :return: Сколько записей вставлено.
+        """
+        self._take(settings.AUTH_ARCHIVE_BATCH_SIZE)
+        if not self._pending:
+            return 0
+
+        batch = self._pending
+        async with async_session_maker() as session:
+            await session.execute(insert(AuthorizationArchive), batch)
+            await session.commit()
+
+        self._pending = []
+        return len(batch)
+
+    async def _collect(self) -> None:
+        """
+        Ждет первую запись, затем добирает пачку до размера или до
+        истечения AUTH_ARCHIVE_FLUSH_SECONDS.
+        """
+        if not self._pending:
+            self._pending.append(await self._queue.get())
+
+        deadline = time.monotonic() + settings.AUTH_ARCHIVE_FLUSH_SECONDS
+        while len(self._pending) < settings.AUTH_ARCHIVE_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._collect()
+            try:
+                await self.flush()
+            except Exception as e:
+                _logger.error(f'Не удалось записать архив авторизаций: {e}', extra={
+                    'Pending': len(self._pending)
+                })
+                await asyncio.sleep(settings.AUTH_ARCHIVE_FLUSH_SECONDS)
+
+    async def start(self) -> None:
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+
+        # Остаток очереди уходит в БД до завершения процесса
+        try:
+            while await self.flush():
+                pass
+        except Exception as e:
+            _logger.error(f'Не удалось записать архив авторизаций при остановке: {e}', extra={
+                'Lost': len(self._pending) + self._queue.qsize()
+            })
+
+
+authorization_recorder = AuthorizationRecorder()
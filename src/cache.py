@@ -0,0 +1,134 @@
+"""
+Кэш ответов для справочных эндпоинтов (группы, города, типы предметов,
+поставщики), которые читаются часто, а меняются редко.
+
+Ключ кэша - пространство имен + путь + query-параметры + ключ прав
+пользователя, чтобы пользователи с разными правами не получали чужой ответ.
+Сбрасывается кэш целиком по пространству имен из путей создания,
+обновления и удаления соответствующих данных.
+
+Кэш живет в памяти процесса, поэтому у каждого воркера он свой; TTL
+ограничивает время, в течение которого другой воркер может отдавать
+устаревший ответ после изменения данных.
+"""
+import hashlib
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response, status
+
+from config import settings
+
+
+class CacheNamespace:
+    GROUPS: str = 'groups'
+    CITIES: str = 'cities'
+    ITEM_TYPES: str = 'item_types'
+    SUPPLIERS: str = 'suppliers'
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    media_type: str
+    expires_at: float
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        ttl: float = settings.RESPONSE_CACHE_TTL,
+        max_entries: int = settings.RESPONSE_CACHE_MAX_ENTRIES
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[str, OrderedDict[str, CachedResponse]] = {}
+        # Поколение пространства имен растет при каждом сбросе. Ответ,
+        # который начали строить до сброса, в кэш уже не попадет.
+        self._generations: dict[str, int] = {}
+
+    @staticmethod
+    def make_key(request: Request, permission_key: object) -> str:
+        query = '&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))
+        return f'{request.url.path}?{query}#{permission_key}'
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    @staticmethod
+    def _not_modified(request: Request, etag: str) -> bool:
+        if_none_match = request.headers.get('if-none-match')
+        if not if_none_match:
+            return False
+        return if_none_match.strip() == '*' or etag in (
+            tag.strip().removeprefix('W/') for tag in if_none_match.split(',')
+        )
+
+    def _response(self, request: Request, entry: CachedResponse) -> Response:
+        headers = {
+            'ETag': entry.etag,
+            # Клиент может хранить ответ, но обязан перепроверять его по ETag
+            'Cache-Control': 'private, no-cache',
+        }
+        if self._not_modified(request, entry.etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return Response(content=entry.body, media_type=entry.media_type, headers=headers)
+
+    async def respond(
+        self,
+        namespace: str,
+        request: Request,
+        permission_key: object,
+        build: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """
+        Возвращает ответ из кэша или строит его через build.
+        Кэшируются только ответы со статусом 200.
+        :param namespace: Пространство имен (см. CacheNamespace).
+        :param permission_key: Значение, от которого зависит ответ с точки
+            зрения прав (например, группа пользователя).
+        :param build: Корутина, которая строит ответ без кэша.
+        """
+        key = self.make_key(request, permission_key)
+        entries = self._entries.setdefault(namespace, OrderedDict())
+
+        entry = entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            entries.move_to_end(key)
+            return self._response(request, entry)
+
+        generation = self._generations.get(namespace, 0)
+        response = await build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+
+        entry = CachedResponse(
+            body=bytes(response.body),
+            etag=self.make_etag(response.body),
+            media_type=response.media_type,
+            expires_at=time.monotonic() + self.ttl
+        )
+        if self._generations.get(namespace, 0) == generation:
+            entries = self._entries.setdefault(namespace, OrderedDict())
+            entries[key] = entry
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+
+        return self._response(request, entry)
+
+    def invalidate(self, namespace: str) -> None:
+        """
+        Сбрасывает все закэшированные ответы пространства имен.
+        """
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+        self._entries.pop(namespace, None)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,160 @@
+"""
+Журнал изменений предметов (sync_changes) для синхронизации узлов
+складов с центральной БД (src/sync.py).
+
+ItemDAO в той же транзакции, что и изменение depot_items, пишет запись:
+- item - предмет изменен; количество хранится как дельта (quantity_delta),
+  остальные колонки - снимком строки после изменения (row);
+- delete - предмет удален;
+- refresh - массовое изменение склада (bulk INSERT не возвращает ID):
+  узлу склада нужно перечитать его целиком.
+
+Журнал ведется на узле (EDGE_MODE) и в центре, если задан SYNC_TOKEN.
+Изменения, которые применяются из другого узла, выполняются под
+sync_origin: в центре они пишутся с именем узла-источника (чтобы не
+вернуть их этому узлу и раздать остальным), на узле не пишутся вовсе -
+они уже есть в центре.
+"""
+import contextvars
+import json
+
+from collections.abc import Mapping
+from datetime import datetime
+
+from sqlalchemy import DateTime, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db import DepotItems, SyncChange, SyncState
+from config import settings
+
+CENTRAL_ORIGIN = 'central'
+
+# Имя узла, изменения которого применяются в текущем контексте
+sync_origin: contextvars.ContextVar[str | None] = contextvars.ContextVar('sync_origin', default=None)
+
+_DATETIME_COLUMNS = tuple(
+    column.name for column in DepotItems.__table__.columns if isinstance(column.type, DateTime)
+)
+
+
+class ChangeKind:
+    ITEM: str = 'item'
+    DELETE: str = 'delete'
+    REFRESH: str = 'refresh'
+
+
+def enabled() -> bool:
+    return settings.EDGE_MODE or settings.SYNC_TOKEN is not None
+
+
+def local_origin() -> str:
+    return settings.EDGE_NODE_ID if settings.EDGE_MODE else CENTRAL_ORIGIN
+
+
+def _origin() -> str | None:
+    """
+    :return: Origin для записи в журнал или None, если писать не нужно.
+    """
+    if not enabled():
+        return None
+    origin = sync_origin.get()
+    if origin is None:
+        return local_origin()
+    return None if settings.EDGE_MODE else origin
+
+
+def encode_row(row: Mapping) -> str:
+    return json.dumps(
+        {key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()}
+    )
+
+
+def decode_row(data: str) -> dict:
+    row = json.loads(data)
+    for column in _DATETIME_COLUMNS:
+        if row.get(column) is not None:
+            row[column] = datetime.fromisoformat(row[column])
+    return row
+
+
+async def log_item_change(session: AsyncSession, item_id: int, before: Mapping, after: Mapping | None) -> None:
+    """
+    Пишет изменение предмета. after=None - предмет удален.
+    """
+    origin = _origin()
+    if origin is None:
+        return
+
+    if after is None:
+        values = {'kind': ChangeKind.DELETE, 'depot_id': before['depot_id'], 'row': None, 'quantity_delta': 0}
+    else:
+        # Снимок читается после UPDATE: в after только колонки сводок и событий
+        row = (await session.execute(
+            select(DepotItems.__table__).where(DepotItems.id == item_id)
+        )).mappings().one()
+        values = {
+            'kind': ChangeKind.ITEM,
+            'depot_id': after['depot_id'],
+            'previous_depot_id': before['depot_id'] if before['depot_id'] != after['depot_id'] else None,
+            'quantity_delta': (after['quantity'] or 0) - (before['quantity'] or 0),
+            'row': encode_row(row),
+        }
+
+    await session.execute(insert(SyncChange).values(
+        origin=origin, item_id=item_id, created_at=datetime.utcnow(), **values
+    ))
+
+
+async def log_item_changes(session: AsyncSession, changes: list[tuple[int, Mapping, Mapping]]) -> None:
+    """
+    Массовый вариант log_item_change для изменений без удалений:
+    снимки строк читаются одним SELECT, записи вставляются одним INSERT.
+    """
+    origin = _origin()
+    if origin is None or not changes:
+        return
+
+    rows = await session.execute(
+        select(DepotItems.__table__).where(DepotItems.id.in_([item_id for item_id, _, _ in changes]))
+    )
+    snapshots = {row['id']: row for row in rows.mappings()}
+    now = datetime.utcnow()
+
+    await session.execute(insert(SyncChange), [
+        {
+            'origin': origin,
+            'kind': ChangeKind.ITEM,
+            'item_id': item_id,
+            'depot_id': after['depot_id'],
+            'previous_depot_id': before['depot_id'] if before['depot_id'] != after['depot_id'] else None,
+            'quantity_delta': (after['quantity'] or 0) - (before['quantity'] or 0),
+            'row': encode_row(snapshots[item_id]),
+            'created_at': now,
+        }
+        for item_id, before, after in changes
+    ])
+
+
+async def log_depot_refresh(session: AsyncSession, depot_id: int) -> None:
+    origin = _origin()
+    if origin is None:
+        return
+
+    await session.execute(insert(SyncChange).values(
+        origin=origin, kind=ChangeKind.REFRESH, depot_id=depot_id,
+        quantity_delta=0, created_at=datetime.utcnow()
+    ))
+
+
+async def get_cursor(session: AsyncSession, key: str, lock: bool = False) -> int | None:
+    query = select(SyncState.value).where(SyncState.key == key)
+    if lock:
+        query = query.with_for_update()
+    return (await session.execute(query)).scalar_one_or_none()
+
+
+async def set_cursor(session: AsyncSession, key: str, value: int) -> None:
+    if await get_cursor(session, key) is None:
+        await session.execute(insert(SyncState).values(key=key, value=value))
+    else:
+        await session.execute(update(SyncState).where(SyncState.key == key).values(value=value))
@@ -0,0 +1,161 @@
+"""
+Исходная схема базы данных (то, что раньше создавал create_tables).
+
+Описание таблиц здесь намеренно зафиксировано копией, а не берется из
+src/db.py: модели будут меняться, а уже примененная миграция - нет.
+На базе, созданной старым create_tables, существующие таблицы пропускаются.
+"""
+from sqlalchemy import (
+    Boolean, Column, DateTime, Float, ForeignKey, Integer, MetaData, String, Table
+)
+
+REVISION = '0000'
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('login', String(255), nullable=False),
+    Column('name', String(255), nullable=False),
+    Column('surname', String(255), nullable=False),
+    Column('email', String(255), nullable=False),
+    Column('phone_number', String(20), nullable=False),
+    Column('group_id', Integer, nullable=False),
+    Column('city_id', Integer, nullable=False),
+    Column('prefix', String(10), nullable=False),
+    Column('password_hash', String(255), nullable=False),
+    Column('status', String(50), nullable=True),
+    Column('two_factor', Boolean),
+    Column('is_blocked', Boolean),
+    Column('requires_password_reset', Boolean),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'cities', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(255), nullable=False),
+    Column('country', String(255), nullable=False),
+)
+
+Table(
+    'group_users', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(255), nullable=False),
+    Column('rules', String(255)),
+)
+
+Table(
+    'depots', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(255), nullable=False),
+    Column('city_id', Integer, ForeignKey('cities.id'), nullable=False),
+    Column('address', String(255), nullable=False),
+    Column('contact_phone_number', Integer, nullable=True),
+    Column('contact_email', String(255), nullable=True),
+    Column('working_hours', String(255), nullable=False),
+    Column('postal_code', Integer, nullable=False),
+    Column('capacity', Integer, nullable=True),
+    Column('is_active', Boolean),
+    Column('description', String(255), nullable=True),
+    Column('coordinates', String(255), nullable=True),
+    Column('manager_name', String(255), nullable=True),
+    Column('last_inventory_date', DateTime, nullable=True),
+    Column('type_id', Integer, nullable=True),
+    Column('related_suppliers', String(255), nullable=True),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'depot_sections', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('depot_id', Integer, ForeignKey('depots.id'), nullable=False),
+    Column('section_name', String(100), nullable=False),
+    Column('cabinet_number', Integer, nullable=False),
+    Column('shelf_number', Integer, nullable=False),
+    Column('capacity', Integer, nullable=True),
+    Column('max_weight', Float, nullable=True),
+    Column('temperature_control', Boolean),
+    Column('humidity_control', Boolean),
+    Column('description', String(255), nullable=True),
+    Column('created_at', DateTime),
+)
+
+Table(
+    'suppliers', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(200), nullable=False),
+    Column('contact_person', String(100), nullable=True),
+    Column('contact_phone', String(20), nullable=False),
+    Column('contact_email', String(100), nullable=True),
+    Column('address', String(300), nullable=True),
+    Column('postal_code', String(20), nullable=True),
+    Column('country', String(100), nullable=False),
+    Column('registration_number', String(50), nullable=True),
+    Column('tax_identification_number', String(50), nullable=True),
+    Column('payment_terms', String(200), nullable=True),
+    Column('bank_details', String(255), nullable=True),
+    Column('average_delivery_time', Integer, nullable=True),
+    Column('reliability_rating', Float, nullable=True),
+    Column('compliance_certificates', String(255), nullable=True),
+    Column('preferred', Boolean),
+    Column('notes', String(500), nullable=True),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime),
+)
+
+Table(
+    'depot_items_type', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(250), nullable=False),
+)
+
+Table(
+    'depot_items', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('depot_id', Integer, ForeignKey('depots.id'), nullable=False),
+    Column('name', String(250), nullable=False),
+    Column('barcode', String(50), nullable=True),
+    Column('weight', Float, nullable=True),
+    Column('quantity', Integer),
+    Column('description', String(500), nullable=True),
+    Column('status', String(50), nullable=True),
+    Column('price', Float, nullable=True),
+    Column('depot_section', Integer, ForeignKey('depot_sections.id'), nullable=True),
+    Column('expiration_date', Integer, nullable=True),
+    Column('storage_conditions', String(255), nullable=True),
+    Column('supplier_id', Integer, ForeignKey('suppliers.id'), nullable=True),
+    Column('item_type', Integer, ForeignKey('depot_items_type.id'), nullable=True),
+    Column('image_url', String(255), nullable=True),
+    Column('received_at', DateTime, nullable=True),
+    Column('created_at', DateTime),
+    Column('updated_at', DateTime, nullable=True),
+)
+
+Table(
+    'company_cars', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('name', String(250), nullable=False),
+    Column('brand', String(100), nullable=False),
+    Column('model', String(100), nullable=False),
+    Column('vin_body_number', String(17), nullable=False),
+    Column('year', Integer, nullable=False),
+    Column('license_plates', String(100), nullable=True),
+    Column('vehicle_payload', Integer, nullable=False),
+    Column('fuel_type', String(100), nullable=True),
+)
+
+Table(
+    'attachment', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('uuid', String(100), nullable=False),
+    Column('file_path', String(250), nullable=False),
+    Column('attachment_type', String(100), nullable=False),
+    Column('file_extension', String(100), nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,29 @@
+"""
+Индексы на горячие колонки поиска.
+
+- users.login / users.email - уникальные, по ним идет проверка при
+  регистрации и авторизации;
+- depot_items / depot_sections - составные индексы по внешним ключам,
+  которые используются в JOIN и фильтрах.
+
+Перед применением на существующей базе нужно убедиться, что в users нет
+дублей по login и email, иначе создание уникального индекса упадет.
+"""
+from src.migrator import create_index
+
+REVISION = '0001'
+
+INDEXES = [
+    # (имя индекса, таблица, колонки, уникальный)
+    ('ix_users_login', 'users', ('login',), True),
+    ('ix_users_email', 'users', ('email',), True),
+    ('ix_depot_sections_depot_cabinet', 'depot_sections', ('depot_id', 'cabinet_number', 'shelf_number'), False),
+    ('ix_depot_items_depot_section', 'depot_items', ('depot_id', 'depot_section'), False),
+    ('ix_depot_items_depot_type', 'depot_items', ('depot_id', 'item_type'), False),
+    ('ix_depot_items_depot_supplier', 'depot_items', ('depot_id', 'supplier_id'), False),
+]
+
+
+def upgrade(connection) -> None:
+    for name, table, columns, unique in INDEXES:
+        create_index(connection, name, table, columns, unique=unique)
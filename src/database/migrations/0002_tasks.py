@@ -0,0 +1,38 @@
+"""
+Таблица фоновых задач TaskManager.
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+from src.migrator import create_index
+
+REVISION = '0002'
+
+metadata = MetaData()
+
+tasks = Table(
+    'tasks', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('task_type', String(50), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('priority', Integer, nullable=False),
+    Column('payload', Text, nullable=True),
+    Column('result', Text, nullable=True),
+    Column('error', Text, nullable=True),
+    Column('progress', Integer, nullable=False),
+    Column('attempts', Integer, nullable=False),
+    Column('max_attempts', Integer, nullable=False),
+    Column('idempotency_key', String(255), nullable=True),
+    Column('user_id', Integer, nullable=True),
+    Column('run_at', DateTime, nullable=False),
+    Column('created_at', DateTime),
+    Column('started_at', DateTime, nullable=True),
+    Column('finished_at', DateTime, nullable=True),
+)
+
+
+def upgrade(connection) -> None:
+    tasks.create(connection, checkfirst=True)
+
+    create_index(connection, 'ix_tasks_idempotency_key', 'tasks', ['idempotency_key'], unique=True)
+    create_index(connection, 'ix_tasks_status_run_at', 'tasks', ['status', 'task_type', 'run_at'])
+    create_index(connection, 'ix_tasks_user_id', 'tasks', ['user_id'])
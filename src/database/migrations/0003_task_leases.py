@@ -0,0 +1,16 @@
+"""
+Аренда задач воркерами: кто выполняет задачу и до какого времени.
+Просроченная аренда означает, что воркер упал, и задачу можно забрать снова.
+"""
+from sqlalchemy import Column, DateTime, String
+
+from src.migrator import add_column, create_index
+
+REVISION = '0003'
+
+
+def upgrade(connection) -> None:
+    add_column(connection, 'tasks', Column('locked_by', String(100), nullable=True))
+    add_column(connection, 'tasks', Column('lease_expires_at', DateTime, nullable=True))
+
+    create_index(connection, 'ix_tasks_status_lease', 'tasks', ['status', 'lease_expires_at'])
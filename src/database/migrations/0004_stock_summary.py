@@ -0,0 +1,86 @@
+"""
+Сводки остатков для отчетов (src/stock_summary.py) и их первичное
+заполнение по текущему содержимому depot_items.
+"""
+from sqlalchemy import (
+    Column, Float, Integer, MetaData, Table, column, func, insert, select, table
+)
+
+from src.migrator import create_index
+
+REVISION = '0004'
+
+metadata = MetaData()
+
+depot_stock_summary = Table(
+    'depot_stock_summary', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('depot_id', Integer, nullable=False),
+    Column('section_id', Integer, nullable=False),
+    Column('item_type_id', Integer, nullable=False),
+    Column('supplier_id', Integer, nullable=False),
+    Column('items_count', Integer, nullable=False),
+    Column('quantity', Integer, nullable=False),
+    Column('stock_value', Float, nullable=False),
+)
+
+depot_expiry_summary = Table(
+    'depot_expiry_summary', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('depot_id', Integer, nullable=False),
+    Column('expiration_day', Integer, nullable=False),
+    Column('items_count', Integer, nullable=False),
+    Column('quantity', Integer, nullable=False),
+)
+
+depot_items = table(
+    'depot_items',
+    column('depot_id', Integer), column('depot_section', Integer), column('item_type', Integer),
+    column('supplier_id', Integer), column('quantity', Integer), column('price', Float),
+    column('expiration_date', Integer),
+)
+
+
+def upgrade(connection) -> None:
+    depot_stock_summary.create(connection, checkfirst=True)
+    depot_expiry_summary.create(connection, checkfirst=True)
+
+    create_index(
+        connection, 'ix_depot_stock_summary_key', 'depot_stock_summary',
+        ['depot_id', 'section_id', 'item_type_id', 'supplier_id'], unique=True
+    )
+    create_index(
+        connection, 'ix_depot_expiry_summary_key', 'depot_expiry_summary',
+        ['depot_id', 'expiration_day'], unique=True
+    )
+
+    # Повторный запуск после сбоя не должен задвоить сводки
+    connection.execute(depot_stock_summary.delete())
+    connection.execute(depot_expiry_summary.delete())
+
+    key = (
+        depot_items.c.depot_id,
+        func.coalesce(depot_items.c.depot_section, 0),
+        func.coalesce(depot_items.c.item_type, 0),
+        func.coalesce(depot_items.c.supplier_id, 0),
+    )
+    connection.execute(insert(depot_stock_summary).from_select(
+        ['depot_id', 'section_id', 'item_type_id', 'supplier_id', 'items_count', 'quantity', 'stock_value'],
+        select(
+            *key,
+            func.count(),
+            func.coalesce(func.sum(depot_items.c.quantity), 0),
+            func.coalesce(func.sum(depot_items.c.quantity * depot_items.c.price), 0),
+        ).group_by(*key)
+    ))
+
+    day = depot_items.c.expiration_date // 86400
+    connection.execute(insert(depot_expiry_summary).from_select(
+        ['depot_id', 'expiration_day', 'items_count', 'quantity'],
+        select(
+            depot_items.c.depot_id, day, func.count(),
+            func.coalesce(func.sum(depot_items.c.quantity), 0),
+        )
+        .where(depot_items.c.expiration_date.is_not(None))
+        .group_by(depot_items.c.depot_id, day)
+    ))
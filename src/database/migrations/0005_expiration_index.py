@@ -0,0 +1,14 @@
+"""
+Индекс по срокам годности в рамках склада: подбор FEFO и оповещения
+о приближающемся окончании срока годности (src/expiration.py).
+"""
+from src.migrator import create_index
+
+REVISION = '0005'
+
+
+def upgrade(connection) -> None:
+    create_index(
+        connection, 'ix_depot_items_depot_expiration', 'depot_items',
+        ['depot_id', 'expiration_date']
+    )
@@ -0,0 +1,24 @@
+"""
+Индексы поиска (src/search.py):
+- FULLTEXT с парсером ngram по названию/описанию предметов и по
+  названию/контактному лицу поставщиков;
+- обычные индексы по названию для автодополнения (LIKE 'начало%').
+
+InnoDB обновляет FULLTEXT-индексы при каждой записи сам, отдельная
+синхронизация не нужна. На других СУБД создаются только обычные индексы.
+"""
+from src.migrator import create_fulltext_index, create_index
+
+REVISION = '0006'
+
+
+def upgrade(connection) -> None:
+    create_fulltext_index(
+        connection, 'ft_depot_items_name_description', 'depot_items', ['name', 'description']
+    )
+    create_fulltext_index(
+        connection, 'ft_suppliers_name_contact', 'suppliers', ['name', 'contact_person']
+    )
+
+    create_index(connection, 'ix_depot_items_name', 'depot_items', ['name'])
+    create_index(connection, 'ix_suppliers_name', 'suppliers', ['name'])
@@ -0,0 +1,15 @@
+"""
+Версия состояния пользователя для отзыва access-токенов (src/user_state.py).
+"""
+from sqlalchemy import Column, DateTime, Integer
+
+from src.migrator import add_column, create_index
+
+REVISION = '0007'
+
+
+def upgrade(connection) -> None:
+    add_column(connection, 'users', Column('state_version', Integer, nullable=False, server_default='0'))
+    add_column(connection, 'users', Column('state_changed_at', DateTime, nullable=True))
+
+    create_index(connection, 'ix_users_state_changed_at', 'users', ['state_changed_at'])
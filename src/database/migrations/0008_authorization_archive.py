@@ -0,0 +1,28 @@
+"""
+Архив авторизаций (src/auth_archive.py).
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+from src.migrator import create_index
+
+REVISION = '0008'
+
+metadata = MetaData()
+
+authorization_archive = Table(
+    'authorization_archive', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('user_id', Integer, nullable=False),
+    Column('auth_time', DateTime, nullable=False),
+    Column('ip', String(45), nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    authorization_archive.create(connection, checkfirst=True)
+
+    create_index(
+        connection, 'ix_authorization_archive_user_time', 'authorization_archive',
+        ['user_id', 'auth_time']
+    )
+    create_index(connection, 'ix_authorization_archive_time', 'authorization_archive', ['auth_time'])
@@ -0,0 +1,38 @@
+"""
+Журнал изменений и курсоры синхронизации узлов складов (src/sync.py).
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+from src.migrator import create_index
+
+REVISION = '0009'
+
+metadata = MetaData()
+
+sync_changes = Table(
+    'sync_changes', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('origin', String(50), nullable=False),
+    Column('kind', String(20), nullable=False),
+    Column('depot_id', Integer, nullable=False),
+    Column('previous_depot_id', Integer, nullable=True),
+    Column('item_id', Integer, nullable=True),
+    Column('quantity_delta', Integer, nullable=False),
+    Column('row', Text, nullable=True),
+    Column('created_at', DateTime, nullable=False),
+    sqlite_autoincrement=True,
+)
+
+sync_state = Table(
+    'sync_state', metadata,
+    Column('key', String(100), primary_key=True),
+    Column('value', Integer, nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    sync_changes.create(connection, checkfirst=True)
+    sync_state.create(connection, checkfirst=True)
+
+    create_index(connection, 'ix_sync_changes_depot_id', 'sync_changes', ['depot_id', 'id'])
+    create_index(connection, 'ix_sync_changes_previous_depot_id', 'sync_changes', ['previous_depot_id', 'id'])
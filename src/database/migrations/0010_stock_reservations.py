@@ -0,0 +1,38 @@
+"""
+Резервы остатков под заказы (src/reservations.py).
+"""
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+from src.migrator import add_column, create_index
+
+REVISION = '0010'
+
+metadata = MetaData()
+
+stock_reservations = Table(
+    'stock_reservations', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('item_id', Integer, nullable=False),
+    Column('depot_id', Integer, nullable=False),
+    Column('section_id', Integer, nullable=True),
+    Column('quantity', Integer, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('reference', String(100), nullable=True),
+    Column('user_id', Integer, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('expires_at', DateTime, nullable=False),
+    Column('closed_at', DateTime, nullable=True),
+)
+
+
+def upgrade(connection) -> None:
+    add_column(connection, 'depot_items', Column('reserved_quantity', Integer, nullable=False, server_default='0'))
+
+    stock_reservations.create(connection, checkfirst=True)
+
+    create_index(
+        connection, 'ix_stock_reservations_status_expires', 'stock_reservations', ['status', 'expires_at']
+    )
+    create_index(
+        connection, 'ix_stock_reservations_item_status', 'stock_reservations', ['item_id', 'status']
+    )
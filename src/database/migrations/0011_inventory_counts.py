@@ -0,0 +1,51 @@
+"""
+Инвентаризация: пересчеты и подсчитанные строки (src/inventory.py).
+"""
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table
+
+from src.migrator import create_index
+
+REVISION = '0011'
+
+metadata = MetaData()
+
+inventory_counts = Table(
+    'inventory_counts', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('depot_id', Integer, nullable=False),
+    Column('section_id', Integer, nullable=True),
+    Column('status', String(20), nullable=False),
+    Column('created_by', Integer, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('closed_at', DateTime, nullable=True),
+    Column('applied_lines', Integer, nullable=False),
+)
+
+inventory_count_lines = Table(
+    'inventory_count_lines', metadata,
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    Column('count_id', Integer, nullable=False),
+    Column('item_id', Integer, nullable=False),
+    Column('counted_quantity', Integer, nullable=False),
+    Column('expected_quantity', Integer, nullable=True),
+    Column('variance', Integer, nullable=True),
+    Column('approved', Boolean, nullable=False, server_default='0'),
+    Column('applied_at', DateTime, nullable=True),
+    Column('scanned_by', Integer, nullable=False),
+    Column('scanned_at', DateTime, nullable=False),
+)
+
+
+def upgrade(connection) -> None:
+    inventory_counts.create(connection, checkfirst=True)
+    inventory_count_lines.create(connection, checkfirst=True)
+
+    create_index(connection, 'ix_inventory_counts_depot_status', 'inventory_counts', ['depot_id', 'status'])
+    create_index(
+        connection, 'ix_inventory_count_lines_count_item', 'inventory_count_lines',
+        ['count_id', 'item_id'], unique=True
+    )
+    create_index(
+        connection, 'ix_inventory_count_lines_count_variance', 'inventory_count_lines',
+        ['count_id', 'variance']
+    )
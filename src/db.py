@@ -6,8 +6,8 @@ from sqlalchemy.orm import DeclarativeBase, sessionmaker, relationship
 
 from sqlalchemy import Column, Integer, String
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Boolean, 
-    DateTime, Float, ForeignKey
+    create_engine, event, Column, Integer, String, Boolean, 
+    DateTime, Float, ForeignKey, Index, Text
 )
 from config import settings
 
@@ -15,12 +15,35 @@ from config import settings
 engine = create_async_engine(settings.DATABASE_URL, echo=True)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+
+SQLITE_BUSY_TIMEOUT_MS = 30000
+
+if engine.dialect.name == 'sqlite':
+    @event.listens_for(engine.sync_engine, 'connect')
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        # Узел склада (EDGE_MODE): WAL позволяет читать во время записи,
+        # synchronous=NORMAL не ждет fsync на каждый коммит
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        # Пишущие транзакции ждут друг друга, а не падают с database is locked
+        cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+        cursor.close()
+
+
 class Base(DeclarativeBase):
     pass
 
 # Таблицы
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # Логин и email проверяются при каждой регистрации и авторизации
+        Index('ix_users_login', 'login', unique=True),
+        Index('ix_users_email', 'email', unique=True),
+        # Опрос изменений состояния пользователей (src/user_state.py)
+        Index('ix_users_state_changed_at', 'state_changed_at'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     login = Column(String(255), nullable=False)
@@ -37,6 +60,22 @@ class User(Base):
     is_blocked = Column(Boolean, default=False)
     requires_password_reset = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    state_version = Column(Integer, nullable=False, default=0, server_default='0') # Растет при блокировке, смене группы/пароля
+    state_changed_at = Column(DateTime, nullable=True) # Когда state_version изменилась последний раз
+
+
+class AuthorizationArchive(Base):
+    __tablename__ = 'authorization_archive'
+    __table_args__ = (
+        # История входов пользователя за период
+        Index('ix_authorization_archive_user_time', 'user_id', 'auth_time'),
+        Index('ix_authorization_archive_time', 'auth_time'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    auth_time = Column(DateTime, nullable=False, default=datetime.utcnow)
+    ip = Column(String(45), nullable=False) # 45 символов - запись IPv6 с IPv4-хвостом
 
 
 class City(Base):
@@ -89,6 +128,9 @@ class Depot(Base):
 
 class DepotSection(Base):
     __tablename__ = 'depot_sections'
+    __table_args__ = (
+        Index('ix_depot_sections_depot_cabinet', 'depot_id', 'cabinet_number', 'shelf_number'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     depot_id = Column(Integer, ForeignKey('depots.id'), nullable=False)
@@ -107,6 +149,21 @@ class DepotSection(Base):
 
 class DepotItems(Base):
     __tablename__ = 'depot_items'
+    __table_args__ = (
+        # Выборки предметов почти всегда идут в рамках одного склада,
+        # поэтому depot_id стоит первым во всех составных индексах
+        Index('ix_depot_items_depot_section', 'depot_id', 'depot_section'),
+        Index('ix_depot_items_depot_type', 'depot_id', 'item_type'),
+        Index('ix_depot_items_depot_supplier', 'depot_id', 'supplier_id'),
+        # Подбор FEFO и оповещения о сроках годности (src/expiration.py)
+        Index('ix_depot_items_depot_expiration', 'depot_id', 'expiration_date'),
+        # Поиск (api/search/dao.py): полнотекстовый и автодополнение по началу названия
+        Index(
+            'ft_depot_items_name_description', 'name', 'description',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+        Index('ix_depot_items_name', 'name'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     depot_id = Column(Integer, ForeignKey('depots.id'), nullable=False)
@@ -114,6 +171,7 @@ class DepotItems(Base):
     barcode = Column(String(50), nullable=True)
     weight = Column(Float, nullable=True)
     quantity = Column(Integer, default=0)
+    reserved_quantity = Column(Integer, nullable=False, default=0, server_default='0') # Удержано активными резервами (src/reservations.py)
     description = Column(String(500), nullable=True)
     status = Column(String(50), nullable=True)
     price = Column(Float, nullable=True)
@@ -135,6 +193,13 @@ class DepotItems(Base):
 
 class Supplier(Base):
     __tablename__ = 'suppliers'
+    __table_args__ = (
+        Index(
+            'ft_suppliers_name_contact', 'name', 'contact_person',
+            mysql_prefix='FULLTEXT', mysql_with_parser='ngram'
+        ),
+        Index('ix_suppliers_name', 'name'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String(200), nullable=False)
@@ -186,8 +251,189 @@ class Attachment(Base):
     attachment_type = Column(String(100), nullable=False) # Тип вложения: видео, фото, файл
     file_extension = Column(String(100), nullable=False) # Расширение файла
 
-async def create_tables():
-    async with engine.begin() as conn:
-        print('Создание таблицы')
-        await conn.run_sync(Base.metadata.create_all)
-        print('Таблица была успешно создана')
+
+class DepotStockSummary(Base):
+    """
+    Сводка остатков по складу в разрезе секции, типа и поставщика.
+    Поддерживается инкрементально (src/stock_summary.py), отсутствующая
+    секция/тип/поставщик хранится как 0, чтобы работал уникальный ключ.
+    """
+    __tablename__ = 'depot_stock_summary'
+    __table_args__ = (
+        Index(
+            'ix_depot_stock_summary_key',
+            'depot_id', 'section_id', 'item_type_id', 'supplier_id', unique=True
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    depot_id = Column(Integer, nullable=False)
+    section_id = Column(Integer, nullable=False, default=0)
+    item_type_id = Column(Integer, nullable=False, default=0)
+    supplier_id = Column(Integer, nullable=False, default=0)
+    items_count = Column(Integer, nullable=False, default=0) # Количество позиций (строк depot_items)
+    quantity = Column(Integer, nullable=False, default=0) # Сумма quantity
+    stock_value = Column(Float, nullable=False, default=0) # Сумма quantity * price
+
+
+class DepotExpirySummary(Base):
+    """
+    Остатки склада по дню окончания срока годности (дни от начала эпохи).
+    """
+    __tablename__ = 'depot_expiry_summary'
+    __table_args__ = (
+        Index('ix_depot_expiry_summary_key', 'depot_id', 'expiration_day', unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    depot_id = Column(Integer, nullable=False)
+    expiration_day = Column(Integer, nullable=False)
+    items_count = Column(Integer, nullable=False, default=0)
+    quantity = Column(Integer, nullable=False, default=0)
+
+
+class StockReservation(Base):
+    """
+    Резерв количества предмета под заказ на время подбора
+    (src/reservations.py). Активные резервы предмета в сумме равны
+    depot_items.reserved_quantity.
+    """
+    __tablename__ = 'stock_reservations'
+    __table_args__ = (
+        # Поиск истекших резервов сборщиком
+        Index('ix_stock_reservations_status_expires', 'status', 'expires_at'),
+        Index('ix_stock_reservations_item_status', 'item_id', 'status'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    item_id = Column(Integer, nullable=False) # Без внешнего ключа: предмет можно удалить, история резервов остается
+    depot_id = Column(Integer, nullable=False)
+    section_id = Column(Integer, nullable=True) # Секция, из которой берется товар
+    quantity = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False) # active, committed, released, expired
+    reference = Column(String(100), nullable=True) # Номер заказа или другой внешний ID
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+    closed_at = Column(DateTime, nullable=True)
+
+
+class InventoryCount(Base):
+    """
+    Инвентаризация склада или одной секции (src/inventory.py).
+    """
+    __tablename__ = 'inventory_counts'
+    __table_args__ = (
+        Index('ix_inventory_counts_depot_status', 'depot_id', 'status'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    depot_id = Column(Integer, nullable=False)
+    section_id = Column(Integer, nullable=True) # Пересчет одной секции, None - весь склад
+    status = Column(String(20), nullable=False) # open, applying, closed, cancelled
+    created_by = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    closed_at = Column(DateTime, nullable=True)
+    applied_lines = Column(Integer, nullable=False, default=0) # Сколько корректировок применено
+
+
+class InventoryCountLine(Base):
+    """
+    Подсчитанное количество предмета. Учетное количество и расхождение
+    заполняются при расчете расхождений одним UPDATE на весь пересчет.
+    """
+    __tablename__ = 'inventory_count_lines'
+    __table_args__ = (
+        # Повторный скан предмета заменяет прошлый
+        Index('ix_inventory_count_lines_count_item', 'count_id', 'item_id', unique=True),
+        Index('ix_inventory_count_lines_count_variance', 'count_id', 'variance'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    count_id = Column(Integer, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    counted_quantity = Column(Integer, nullable=False)
+    expected_quantity = Column(Integer, nullable=True) # NULL - предмета нет на складе/в секции пересчета
+    variance = Column(Integer, nullable=True) # counted - expected
+    approved = Column(Boolean, nullable=False, default=False, server_default='0')
+    applied_at = Column(DateTime, nullable=True)
+    scanned_by = Column(Integer, nullable=False)
+    scanned_at = Column(DateTime, nullable=False)
+
+
+class SyncChange(Base):
+    """
+    Журнал изменений depot_items для синхронизации узлов складов
+    (src/sync.py). id - курсор синхронизации.
+    """
+    __tablename__ = 'sync_changes'
+    __table_args__ = (
+        # Выборка изменений склада после курсора
+        Index('ix_sync_changes_depot_id', 'depot_id', 'id'),
+        Index('ix_sync_changes_previous_depot_id', 'previous_depot_id', 'id'),
+        # Без AUTOINCREMENT SQLite после очистки журнала выдает ID заново,
+        # и центр отбросил бы их как уже примененные
+        {'sqlite_autoincrement': True},
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    origin = Column(String(50), nullable=False) # Узел, на котором сделано изменение
+    kind = Column(String(20), nullable=False) # item, delete, refresh
+    depot_id = Column(Integer, nullable=False)
+    previous_depot_id = Column(Integer, nullable=True) # Склад до перемещения
+    item_id = Column(Integer, nullable=True)
+    quantity_delta = Column(Integer, nullable=False, default=0)
+    row = Column(Text, nullable=True) # Состояние предмета после изменения, JSON
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SyncState(Base):
+    """
+    Курсоры синхронизации: что узел уже отправил и получил, а центр -
+    до какого изменения применил пачки каждого узла.
+    """
+    __tablename__ = 'sync_state'
+
+    key = Column(String(100), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+class Task(Base):
+    __tablename__ = 'tasks'
+    __table_args__ = (
+        # Ключ идемпотентности: повторная постановка той же задачи
+        # возвращает уже существующую
+        Index('ix_tasks_idempotency_key', 'idempotency_key', unique=True),
+        # Выборка готовых к запуску задач воркером
+        Index('ix_tasks_status_run_at', 'status', 'task_type', 'run_at'),
+        Index('ix_tasks_user_id', 'user_id'),
+        # Поиск задач с просроченной арендой
+        Index('ix_tasks_status_lease', 'status', 'lease_expires_at'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    task_type = Column(String(50), nullable=False) # Тип задачи из TaskManager.TASK_TYPE_LIST
+    status = Column(String(20), nullable=False, default='pending') # pending, running, done, failed
+    priority = Column(Integer, nullable=False, default=0) # Чем больше, тем раньше выполнится
+    payload = Column(Text, nullable=True) # Аргументы задачи, JSON как строка
+    result = Column(Text, nullable=True) # Результат задачи, JSON как строка
+    error = Column(Text, nullable=True) # Текст последней ошибки
+    progress = Column(Integer, nullable=False, default=0) # Прогресс в процентах
+    attempts = Column(Integer, nullable=False, default=0) # Сколько раз задача запускалась
+    max_attempts = Column(Integer, nullable=False, default=3)
+    idempotency_key = Column(String(255), nullable=True)
+    user_id = Column(Integer, nullable=True) # Кто поставил задачу
+    locked_by = Column(String(100), nullable=True) # ID воркера, который выполняет задачу
+    lease_expires_at = Column(DateTime, nullable=True) # До какого времени задача закреплена за воркером
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow) # Не раньше этого времени
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def set_payload(self, payload: dict):
+        """Преобразуем аргументы задачи в строку JSON"""
+        self.payload = json.dumps(payload, ensure_ascii=False)
+
+    def get_payload(self) -> dict:
+        """Преобразуем строку JSON обратно в аргументы задачи"""
+        return json.loads(self.payload) if self.payload else {}
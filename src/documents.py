@@ -0,0 +1,166 @@
+"""
+Генерация актов о списании («Акт о списании») в формате docx.
+
+Стили (шрифты, размеры, цвета) задаются один раз в шаблоне, который
+собирается при первом обращении в процессе и дальше переиспользуется
+в виде байтов. Для каждого акта документ открывается из этих байтов,
+а ячейкам назначается готовый стиль абзаца вместо настройки шрифта
+каждого run в цикле.
+
+Модуль намеренно не импортирует ничего из БД и S3: функции рендеринга
+выполняются в пуле процессов (render_pool), и дочерним процессам не
+нужно поднимать подключения.
+"""
+import io
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.enum.table import WD_TABLE_ALIGNMENT
+from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
+from docx.shared import Emu, Pt, RGBColor
+
+GRAY = RGBColor(128, 128, 128)
+
+PRODUCT_HEADERS = ['№', 'Артикул', 'Товар', 'Кол-во']
+
+# Ширины колонок таблицы товаров (те же, что в tests/__generate_docx_akt__.py)
+PRODUCT_WIDTHS = [Emu(20), Emu(1090000), Emu(9900000), Emu(900000)]
+ORG_WIDTHS = [Emu(200), Emu(100000000)]
+
+
+def _add_paragraph_style(doc, name: str, size: int, bold: bool = False,
+                         color: RGBColor | None = None,
+                         alignment=WD_PARAGRAPH_ALIGNMENT.LEFT) -> None:
+    style = doc.styles.add_style(name, WD_STYLE_TYPE.PARAGRAPH)
+    style.base_style = doc.styles['Normal']
+    style.font.size = Pt(size)
+    style.font.bold = bold
+    if color is not None:
+        style.font.color.rgb = color
+    style.paragraph_format.alignment = alignment
+
+
+@lru_cache(maxsize=1)
+def template_bytes() -> bytes:
+    """
+    Пустой документ со всеми стилями акта. Собирается один раз на процесс.
+    """
+    doc = Document()
+
+    normal = doc.styles['Normal']
+    normal.font.name = 'Calibri'
+    normal.font.size = Pt(12)
+
+    _add_paragraph_style(doc, 'ActOrgLabel', 10, color=GRAY)
+    _add_paragraph_style(doc, 'ActOrgValue', 10)
+    _add_paragraph_style(doc, 'ActHeaderCell', 10, bold=True)
+    _add_paragraph_style(doc, 'ActHeaderCellCenter', 10, bold=True, alignment=WD_PARAGRAPH_ALIGNMENT.CENTER)
+    _add_paragraph_style(doc, 'ActCell', 10)
+    _add_paragraph_style(doc, 'ActCellCenter', 10, alignment=WD_PARAGRAPH_ALIGNMENT.CENTER)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _quantity(value) -> str:
+    text = str(value)
+    return text if 'шт' in text else f'{text} шт'
+
+
+def _set_style(paragraph, style_id: str) -> None:
+    # paragraph.style = 'Имя' каждый раз ищет стиль по имени перебором всех
+    # стилей документа; ID наших стилей известны заранее (add_style делает
+    # ID из имени), поэтому ставим pStyle напрямую
+    paragraph._p.style = style_id
+
+
+def _fill_rows(rows, values_list: list[list[str]], styles: list[str]) -> None:
+    for row, values in zip(rows, values_list):
+        for cell, value, style in zip(row.cells, values, styles):
+            paragraph = cell.paragraphs[0]
+            paragraph.text = value
+            _set_style(paragraph, style)
+
+
+def _set_widths(table, widths) -> None:
+    table.autofit = False
+    for column, width in zip(table.columns, widths):
+        column.width = width
+
+
+def render_act(data: dict) -> bytes:
+    """
+    Рендерит акт о списании и возвращает содержимое docx.
+    :param data: Данные акта в формате tests/__example_data_for_docx_akt__.json.
+    """
+    doc = Document(io.BytesIO(template_bytes()))
+
+    header = doc.add_paragraph()
+    header.add_run(data['header']['company']).bold = True
+    run = header.add_run('\t\t\tID: ' + str(data.get('barcode_data', '')))
+    run.font.color.rgb = GRAY
+
+    title = doc.add_paragraph()
+    title.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
+    title.add_run(data['header']['act']).bold = True
+
+    org_data = data['org_data']
+    org_table = doc.add_table(rows=len(org_data), cols=2)
+    _set_widths(org_table, ORG_WIDTHS)
+    for row, (label, value) in zip(org_table.rows, org_data):
+        label_cell, value_cell = row.cells
+        label_cell.paragraphs[0].text = label
+        _set_style(label_cell.paragraphs[0], 'ActOrgLabel')
+        value_cell.paragraphs[0].text = value
+        _set_style(value_cell.paragraphs[0], 'ActOrgValue')
+
+    doc.add_paragraph()
+
+    headers = data.get('product_data_headers', PRODUCT_HEADERS)
+    products = [
+        [str(number), str(article), str(name), _quantity(quantity)]
+        for number, article, name, quantity in data['product_data']
+    ]
+    product_table = doc.add_table(rows=len(products) + 1, cols=4)
+    product_table.style = 'Table Grid'
+    product_table.alignment = WD_TABLE_ALIGNMENT.LEFT
+    _set_widths(product_table, PRODUCT_WIDTHS)
+
+    table_rows = product_table.rows
+    _fill_rows(
+        table_rows[:1], [headers],
+        ['ActHeaderCell', 'ActHeaderCell', 'ActHeaderCellCenter', 'ActHeaderCell']
+    )
+    _fill_rows(
+        table_rows[1:], products,
+        ['ActCell', 'ActCell', 'ActCell', 'ActCellCenter']
+    )
+
+    doc.add_paragraph()
+    doc.add_paragraph('\n'.join(data.get('signatures', [])))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _init_worker() -> None:
+    # Шаблон собирается один раз при старте процесса пула
+    template_bytes()
+
+
+@lru_cache(maxsize=1)
+def _pool(workers: int | None = None) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker)
+
+
+def render_pool(workers: int | None = None) -> ProcessPoolExecutor:
+    """
+    Общий пул процессов для рендеринга актов; создается при первом обращении.
+    """
+    return _pool(workers)
@@ -0,0 +1,161 @@
+"""
+Уведомления об изменении остатков для дашбордов и терминалов сканеров
+вместо опроса эндпоинтов предметов.
+
+ItemDAO после коммита публикует событие в брокер процесса (количество,
+секция, склад, статус предмета). Подписчики (WebSocket и SSE,
+api/events/router.py) получают события, отфильтрованные по складам и
+секциям.
+
+Слияние: брокер копит события STOCK_EVENTS_WINDOW_MS и рассылает пачкой;
+несколько изменений одного предмета за это время превращаются в одно
+событие с последним состоянием. У каждого подписчика есть свой набор
+неотправленных событий, тоже по одному на предмет, - медленный клиент
+получает последнее состояние, а не всю историю. Если набор превысил
+STOCK_EVENTS_MAX_PENDING, он сбрасывается, и клиенту уходит событие
+resync: перечитать данные целиком.
+
+Брокер живет в памяти процесса: подписчик получает изменения, сделанные
+через воркер, к которому он подключен.
+"""
+import asyncio
+
+from src.logger import _logger
+from config import settings
+
+# Колонки предмета, изменение которых публикуется
+TRACKED_COLUMNS = ('depot_id', 'depot_section', 'quantity', 'status')
+
+
+class StockEventType:
+    ITEM: str = 'item'         # Изменился или удален предмет
+    DEPOT: str = 'depot'       # Массовое изменение склада: перечитать склад
+    RESYNC: str = 'resync'     # Подписчик не успевал: перечитать все
+
+
+def _merge(old: dict | None, new: dict) -> dict:
+    # При слиянии сохраняется самое раннее прежнее положение предмета,
+    # чтобы подписчик старого склада/секции узнал о перемещении
+    if old is not None and 'previous' in old:
+        return {**new, 'previous': old['previous']}
+    return new
+
+
+class StockSubscription:
+
+    def __init__(self, depot_ids: set[int] | None, section_ids: set[int] | None) -> None:
+        self.depot_ids = depot_ids
+        self.section_ids = section_ids
+        self._pending: dict[tuple, dict] = {}
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    def matches(self, event: dict) -> bool:
+        places = [(event.get('depot_id'), event.get('section_id'))]
+        if 'previous' in event:
+            places.append((event['previous']['depot_id'], event['previous']['section_id']))
+
+        return any(
+            (self.depot_ids is None or depot_id in self.depot_ids)
+            and (self.section_ids is None or event['type'] == StockEventType.DEPOT or section_id in self.section_ids)
+            for depot_id, section_id in places
+        )
+
+    def offer(self, key: tuple, event: dict) -> None:
+        if self._overflowed:
+            return
+
+        self._pending[key] = _merge(self._pending.get(key), event)
+        if len(self._pending) > settings.STOCK_EVENTS_MAX_PENDING:
+            self._pending = {}
+            self._overflowed = True
+        self._ready.set()
+
+    async def next_batch(self) -> list[dict]:
+        """
+        Ждет событий и забирает все накопленные.
+        """
+        await self._ready.wait()
+        self._ready.clear()
+
+        if self._overflowed:
+            self._overflowed = False
+            return [{'type': StockEventType.RESYNC}]
+
+        batch, self._pending = list(self._pending.values()), {}
+        return batch
+
+
+class StockEventBroker:
+
+    def __init__(self) -> None:
+        self._buffer: dict[tuple, dict] = {}
+        self._subscribers: set[StockSubscription] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def subscribe(self, depot_ids: set[int] | None = None, section_ids: set[int] | None = None) -> StockSubscription | None:
+        """
+        :return: None, если достигнут лимит подписчиков процесса.
+        """
+        if len(self._subscribers) >= settings.STOCK_EVENTS_MAX_SUBSCRIBERS:
+            _logger.warning('Достигнут лимит подписчиков на изменения остатков')
+            return None
+
+        subscription = StockSubscription(depot_ids, section_ids)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StockSubscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, key: tuple, event: dict) -> None:
+        if not self._subscribers:
+            return
+
+        self._buffer[key] = _merge(self._buffer.get(key), event)
+        if self._flush_handle is None:
+            # Таймер вместо фоновой задачи: без подписчиков и изменений брокер ничего не делает
+            self._flush_handle = asyncio.get_running_loop().call_later(
+                settings.STOCK_EVENTS_WINDOW_MS / 1000, self._flush
+            )
+
+    def _flush(self) -> None:
+        self._flush_handle = None
+        batch, self._buffer = self._buffer, {}
+        for subscription in self._subscribers:
+            for key, event in batch.items():
+                if subscription.matches(event):
+                    subscription.offer(key, event)
+
+    def publish_item(self, item_id: int, before: dict | None, after: dict | None) -> None:
+        """
+        Публикует изменение предмета. after=None - предмет удален.
+        Изменения колонок вне TRACKED_COLUMNS (цена, описание) не публикуются.
+        """
+        if before is not None and after is not None and all(
+            before.get(column) == after.get(column) for column in TRACKED_COLUMNS
+        ):
+            return
+
+        state = after if after is not None else before
+        event = {
+            'type': StockEventType.ITEM,
+            'item_id': item_id,
+            'depot_id': state['depot_id'],
+            'section_id': state.get('depot_section'),
+            'quantity': after.get('quantity') if after is not None else None,
+            'status': state.get('status'),
+            'deleted': after is None,
+        }
+        if before is not None and after is not None and (
+            (before['depot_id'], before.get('depot_section')) != (after['depot_id'], after.get('depot_section'))
+        ):
+            event['previous'] = {'depot_id': before['depot_id'], 'section_id': before.get('depot_section')}
+
+        self.publish((StockEventType.ITEM, item_id), event)
+
+    def publish_depot(self, depot_id: int) -> None:
+        self.publish((StockEventType.DEPOT, depot_id), {'type': StockEventType.DEPOT, 'depot_id': depot_id})
+
+
+stock_events = StockEventBroker()
@@ -0,0 +1,315 @@
+"""
+Индекс сроков годности: подбор FEFO (first expired, first out) и
+оповещения о приближающемся окончании срока годности.
+
+В памяти процесса для каждого склада хранится min-куча (срок годности,
+ID предмета) на каждый товар (штрихкод, а при его отсутствии название).
+Куча склада загружается при первом обращении запросом по индексу
+ix_depot_items_depot_expiration и перечитывается раз в EXPIRATION_INDEX_TTL
+секунд - так подтягиваются изменения, сделанные другими процессами.
+Изменения через ItemDAO применяются к куче сразу.
+
+Подбираются только непросроченные предметы и только свободный остаток
+(quantity - reserved_quantity): резервы (src/reservations.py) передаются
+в индекс через refresh/adjust_reserved.
+
+Удаление из кучи ленивое: при изменении предмета в кучу добавляется новая
+запись, а старая остается и отбрасывается, когда доходит до вершины и не
+совпадает с актуальным состоянием предмета (_items).
+"""
+import asyncio
+import heapq
+import time
+
+from datetime import timedelta
+from typing import Mapping
+
+from sqlalchemy import select
+
+from api.task.dao import TaskDAO
+from src.db import Depot, DepotItems, async_session_maker
+from src.manager import TaskManager
+from src.logger import _logger
+from config import settings
+
+SECONDS_PER_DAY = 86400
+
+# Колонки предмета, нужные индексу
+INDEX_COLUMNS = (
+    DepotItems.id, DepotItems.depot_id, DepotItems.barcode, DepotItems.name,
+    DepotItems.quantity, DepotItems.reserved_quantity, DepotItems.expiration_date,
+)
+
+
+def product_key(barcode: str | None, name: str | None) -> str:
+    return barcode or (name or '').strip().lower()
+
+
+class ExpirationIndex:
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        # ID склада -> товар -> куча (срок годности, ID предмета)
+        self._heaps: dict[int, dict[str, list[tuple[int, int]]]] = {}
+        # ID предмета -> (склад, товар, срок годности, количество, резерв)
+        self._items: dict[int, tuple[int, str, int, int, int]] = {}
+        self._loaded_at: dict[int, float] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def invalidate(self, depot_id: int) -> None:
+        """
+        Сбрасывает кучи склада; при следующем обращении они загрузятся заново.
+        """
+        for heap in self._heaps.pop(depot_id, {}).values():
+            for _, item_id in heap:
+                self._items.pop(item_id, None)
+        self._loaded_at.pop(depot_id, None)
+
+    async def _load(self, depot_id: int) -> None:
+        query = (
+            select(*INDEX_COLUMNS)
+            .where(
+                DepotItems.depot_id == depot_id,
+                # Просроченное не подбирается; диапазон идет по ix_depot_items_depot_expiration
+                DepotItems.expiration_date >= int(time.time()),
+                DepotItems.quantity > 0
+            )
+            .order_by(DepotItems.expiration_date)
+        )
+        async with async_session_maker() as session:
+            rows = (await session.execute(query)).all()
+
+        self.invalidate(depot_id)
+        heaps: dict[str, list[tuple[int, int]]] = {}
+        for row in rows:
+            key = product_key(row.barcode, row.name)
+            self._items[row.id] = (depot_id, key, row.expiration_date, row.quantity, row.reserved_quantity or 0)
+            # Строки отсортированы по сроку, поэтому список уже является кучей
+            heaps.setdefault(key, []).append((row.expiration_date, row.id))
+
+        self._heaps[depot_id] = heaps
+        self._loaded_at[depot_id] = time.monotonic()
+
+    async def _ensure_loaded(self, depot_id: int) -> None:
+        loaded_at = self._loaded_at.get(depot_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self._ttl:
+            return
+
+        lock = self._locks.setdefault(depot_id, asyncio.Lock())
+        async with lock:
+            loaded_at = self._loaded_at.get(depot_id)
+            if loaded_at is None or time.monotonic() - loaded_at >= self._ttl:
+                await self._load(depot_id)
+
+    def update(self, item_id: int, row: Mapping | None) -> None:
+        """
+        Применяет изменение предмета. row=None - предмет удален.
+        Склады, которые еще не загружены, не затрагиваются. Если в row
+        нет reserved_quantity (ItemDAO его не читает), резерв сохраняется.
+        """
+        # Старая запись в куче станет неактуальной и отбросится при извлечении
+        previous = self._items.pop(item_id, None)
+
+        if row is None or row['depot_id'] not in self._heaps:
+            return
+        if row.get('expiration_date') is None or not row.get('quantity') or row['quantity'] <= 0:
+            return
+        if row['expiration_date'] < int(time.time()):
+            return
+
+        reserved = row.get('reserved_quantity', previous[4] if previous is not None else 0) or 0
+        key = product_key(row.get('barcode'), row.get('name'))
+        self._items[item_id] = (row['depot_id'], key, row['expiration_date'], row['quantity'], reserved)
+        heapq.heappush(
+            self._heaps[row['depot_id']].setdefault(key, []),
+            (row['expiration_date'], item_id)
+        )
+
+    def refresh(self, item_id: int, quantity: int, reserved: int) -> None:
+        """
+        Точные значения предмета, прочитанные в транзакции резерва.
+        """
+        if (current := self._items.get(item_id)) is not None:
+            self._items[item_id] = (*current[:3], quantity or 0, reserved)
+
+    def adjust_reserved(self, item_id: int, delta: int) -> None:
+        if (current := self._items.get(item_id)) is not None:
+            self._items[item_id] = (*current[:4], current[4] + delta)
+
+    def _pick(self, depot_id: int, key: str, quantity: int) -> list[dict]:
+        heap = self._heaps.get(depot_id, {}).get(key)
+        if not heap:
+            return []
+
+        now = int(time.time())
+        picks, taken, seen = [], [], set()
+        remaining = quantity
+        while heap and remaining > 0:
+            expiration_date, item_id = heapq.heappop(heap)
+            current = self._items.get(item_id)
+            if current is None or current[:3] != (depot_id, key, expiration_date) or item_id in seen:
+                # Неактуальная запись - просто не возвращаем ее в кучу
+                continue
+            if expiration_date < now:
+                # Срок истек, пока запись лежала в куче: она больше не понадобится
+                self._items.pop(item_id, None)
+                continue
+
+            seen.add(item_id)
+            taken.append((expiration_date, item_id))
+            # Зарезервированное занято под заказы; после отмены резерва предмет снова подбирается
+            available = current[3] - current[4]
+            if available <= 0:
+                continue
+            take = min(available, remaining)
+            remaining -= take
+            picks.append({
+                'item_id': item_id,
+                'expiration_date': expiration_date,
+                'available': available,
+                'take': take,
+            })
+
+        for entry in taken:
+            heapq.heappush(heap, entry)
+        return picks
+
+    async def pick(self, depot_id: int, barcode: str, quantity: int) -> list[dict]:
+        """
+        Подбор по FEFO: какие предметы и сколько взять, начиная с
+        ближайшего срока годности. Результат сверяется с БД; если куча
+        устарела (изменения из другого процесса), она перечитывается.
+        """
+        key = product_key(barcode, None)
+        await self._ensure_loaded(depot_id)
+        picks = self._pick(depot_id, key, quantity)
+        if not picks:
+            return picks
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(
+                    DepotItems.id, DepotItems.depot_id, DepotItems.quantity,
+                    DepotItems.reserved_quantity, DepotItems.expiration_date
+                )
+                .where(DepotItems.id.in_([pick['item_id'] for pick in picks]))
+            )
+            actual = {row.id: row for row in result}
+
+        if any(
+            (row := actual.get(pick['item_id'])) is None
+            or (row.depot_id, (row.quantity or 0) - row.reserved_quantity, row.expiration_date)
+            != (depot_id, pick['available'], pick['expiration_date'])
+            for pick in picks
+        ):
+            async with self._locks.setdefault(depot_id, asyncio.Lock()):
+                await self._load(depot_id)
+            picks = self._pick(depot_id, key, quantity)
+
+        return picks
+
+
+expiration_index = ExpirationIndex(ttl=settings.EXPIRATION_INDEX_TTL)
+
+
+@TaskManager.handler('check_item_stock', concurrency=1)
+async def near_expiry_alerts(payload: dict, task_id: int) -> dict:
+    """
+    Оповещение (в лог) о предметах, срок годности которых попал в
+    ближайшие EXPIRY_ALERT_DAYS дней с прошлого запуска. Текущий список
+    таких предметов отдает expiring_items.
+
+    Водяные знаки прошлого запуска (горизонт и максимальный ID предмета)
+    хранятся в результате предыдущей задачи. Читаются только предметы, чей
+    срок попал между прошлым и текущим горизонтом, плюс новые предметы
+    (id больше прошлого максимума) - оба условия идут по индексам.
+    """
+    horizon = int(time.time()) + settings.EXPIRY_ALERT_DAYS * SECONDS_PER_DAY
+    previous = await TaskDAO.last_result('check_item_stock') or {}
+    low = previous.get('horizon')
+    last_item_id = previous.get('last_item_id', 0)
+
+    async with async_session_maker() as session:
+        depot_ids = (await session.execute(select(Depot.id))).scalars().all()
+        max_item_id = (await session.execute(select(DepotItems.id).order_by(DepotItems.id.desc()).limit(1))).scalar()
+
+        base = select(*INDEX_COLUMNS).where(
+            DepotItems.quantity > 0,
+            DepotItems.expiration_date <= horizon
+        )
+        # Срок пересек горизонт с прошлого запуска (ix_depot_items_depot_expiration)
+        crossed = base.where(DepotItems.depot_id.in_(depot_ids))
+        if low is not None:
+            crossed = crossed.where(DepotItems.expiration_date > low)
+        rows = {row.id: row for row in await session.execute(crossed)} if depot_ids else {}
+
+        # Новые предметы, сразу поступившие с коротким сроком (диапазон по первичному ключу)
+        if low is not None:
+            for row in await session.execute(base.where(DepotItems.id > last_item_id)):
+                rows.setdefault(row.id, row)
+
+    depots: dict[int, int] = {}
+    for row in rows.values():
+        depots[row.depot_id] = depots.get(row.depot_id, 0) + 1
+
+    for depot_id, count in depots.items():
+        _logger.warning(
+            f'Истекает срок годности: {count} предметов',
+            extra={'DepotId': depot_id, 'TaskId': task_id}
+        )
+
+    return {
+        'horizon': horizon,
+        'last_item_id': max(max_item_id or 0, last_item_id),
+        'alerts': len(rows),
+    }
+
+
+async def expiring_items(depot_id: int | None = None) -> dict:
+    """
+    Предметы со свободным остатком, срок годности которых истекает в
+    ближайшие EXPIRY_ALERT_DAYS дней (включая уже истекший), по складам -
+    не больше EXPIRY_ALERT_MAX_ITEMS на склад, ближайшие сроки первыми.
+    Каждый склад читается диапазоном по ix_depot_items_depot_expiration.
+    """
+    horizon = int(time.time()) + settings.EXPIRY_ALERT_DAYS * SECONDS_PER_DAY
+    conditions = [
+        DepotItems.expiration_date <= horizon,
+        DepotItems.quantity - DepotItems.reserved_quantity > 0,
+    ]
+
+    async with async_session_maker() as session:
+        if depot_id is not None:
+            depot_ids = [depot_id]
+        else:
+            depot_ids = (await session.execute(select(Depot.id))).scalars().all()
+
+        depots = {}
+        for current in depot_ids:
+            rows = (await session.execute(
+                select(*INDEX_COLUMNS)
+                .where(DepotItems.depot_id == current, *conditions)
+                .order_by(DepotItems.expiration_date)
+                .limit(settings.EXPIRY_ALERT_MAX_ITEMS)
+            )).all()
+            if rows:
+                depots[current] = [
+                    {
+                        'item_id': row.id,
+                        'name': row.name,
+                        'barcode': row.barcode,
+                        'available': row.quantity - row.reserved_quantity,
+                        'expiration_date': row.expiration_date,
+                    }
+                    for row in rows
+                ]
+
+    return {'horizon': horizon, 'depots': depots}
+
+
+if settings.EXPIRY_ALERT_INTERVAL_MINUTES:
+    TaskManager.periodic(
+        'near_expiry_alerts',
+        'check_item_stock',
+        interval=timedelta(minutes=settings.EXPIRY_ALERT_INTERVAL_MINUTES)
+    )
@@ -0,0 +1,213 @@
+"""
+Потоковый экспорт склада в CSV, XLSX или Parquet.
+
+Строки depot_items вместе с названиями склада, секции, поставщика и типа
+читаются через серверный курсор пачками по EXPORT_FETCH_SIZE, сразу
+дописываются во временный файл и после этого загружаются в S3 по частям
+(multipart upload). В памяти одновременно находятся одна пачка строк
+и одна часть загрузки, поэтому память не зависит от числа строк.
+"""
+import asyncio
+import csv
+import os
+import tempfile
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from api.task.dao import TaskDAO
+from src.db import (
+    Depot, DepotItems, DepotItemsType, DepotSection, Supplier, async_session_maker
+)
+from src.manager import S3Data, TaskManager
+from src.s3 import _S3Connector
+from src.logger import _logger
+from config import settings
+
+EXPORT_COLUMNS = (
+    ('id', DepotItems.id),
+    ('depot_id', DepotItems.depot_id),
+    ('depot', Depot.name),
+    ('section_id', DepotItems.depot_section),
+    ('section', DepotSection.section_name),
+    ('name', DepotItems.name),
+    ('barcode', DepotItems.barcode),
+    ('quantity', DepotItems.quantity),
+    ('price', DepotItems.price),
+    ('weight', DepotItems.weight),
+    ('status', DepotItems.status),
+    ('item_type_id', DepotItems.item_type),
+    ('item_type', DepotItemsType.name),
+    ('supplier_id', DepotItems.supplier_id),
+    ('supplier', Supplier.name),
+    ('expiration_date', DepotItems.expiration_date),
+    ('received_at', DepotItems.received_at),
+    ('created_at', DepotItems.created_at),
+    ('updated_at', DepotItems.updated_at),
+)
+
+HEADER = [name for name, _ in EXPORT_COLUMNS]
+
+
+def export_query(depot_id: int | None = None):
+    query = (
+        select(*(column.label(name) for name, column in EXPORT_COLUMNS))
+        .select_from(DepotItems)
+        .join(Depot, Depot.id == DepotItems.depot_id)
+        .outerjoin(DepotSection, DepotSection.id == DepotItems.depot_section)
+        .outerjoin(DepotItemsType, DepotItemsType.id == DepotItems.item_type)
+        .outerjoin(Supplier, Supplier.id == DepotItems.supplier_id)
+        .order_by(DepotItems.id)
+    )
+    if depot_id is not None:
+        query = query.where(DepotItems.depot_id == depot_id)
+    return query
+
+
+class CsvExportWriter:
+    def __init__(self, path: str) -> None:
+        # utf-8-sig, чтобы Excel корректно открывал кириллицу
+        self._file = open(path, 'w', encoding='utf-8-sig', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(HEADER)
+
+    def write(self, rows: list[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class XlsxExportWriter:
+    def __init__(self, path: str) -> None:
+        # openpyxl нужен только для XLSX, поэтому импортируется здесь
+        from openpyxl import Workbook
+
+        self._path = path
+        # write_only пишет строки во временный XML на диске, а не держит лист в памяти
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet('depot_items')
+        self._sheet.append(HEADER)
+
+    def write(self, rows: list[tuple]) -> None:
+        for row in rows:
+            self._sheet.append(row)
+
+    def close(self) -> None:
+        self._workbook.save(self._path)
+
+
+class ParquetExportWriter:
+    def __init__(self, path: str) -> None:
+        # pyarrow - необязательная зависимость, нужна только для Parquet
+        import pyarrow
+        import pyarrow.parquet
+
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ('id', pyarrow.int64()), ('depot_id', pyarrow.int64()), ('depot', pyarrow.string()),
+            ('section_id', pyarrow.int64()), ('section', pyarrow.string()), ('name', pyarrow.string()),
+            ('barcode', pyarrow.string()), ('quantity', pyarrow.int64()), ('price', pyarrow.float64()),
+            ('weight', pyarrow.float64()), ('status', pyarrow.string()), ('item_type_id', pyarrow.int64()),
+            ('item_type', pyarrow.string()), ('supplier_id', pyarrow.int64()), ('supplier', pyarrow.string()),
+            ('expiration_date', pyarrow.int64()), ('received_at', pyarrow.timestamp('us')),
+            ('created_at', pyarrow.timestamp('us')), ('updated_at', pyarrow.timestamp('us')),
+        ])
+        self._writer = pyarrow.parquet.ParquetWriter(path, self._schema, compression='zstd')
+
+    def write(self, rows: list[tuple]) -> None:
+        # Каждая пачка становится отдельной row group
+        columns = list(zip(*rows))
+        self._writer.write_batch(self._pa.record_batch(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema
+        ))
+
+    def close(self) -> None:
+        self._writer.close()
+
+
+EXPORT_WRITERS = {
+    'csv': CsvExportWriter,
+    'xlsx': XlsxExportWriter,
+    'parquet': ParquetExportWriter,
+}
+
+
+async def export_to_file(
+    path: str,
+    file_format: str,
+    depot_id: int | None = None
+) -> int:
+    """
+    Пишет экспорт в файл на диске.
+    :return: Количество выгруженных строк.
+    """
+    writer = await asyncio.to_thread(EXPORT_WRITERS[file_format], path)
+    rows_count = 0
+
+    try:
+        async with async_session_maker() as session:
+            # stream() открывает серверный курсор, yield_per задает размер выборки
+            result = await session.stream(
+                export_query(depot_id).execution_options(yield_per=settings.EXPORT_FETCH_SIZE)
+            )
+            async for partition in result.partitions():
+                rows = [tuple(row) for row in partition]
+                await asyncio.to_thread(writer.write, rows)
+                rows_count += len(rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    return rows_count
+
+
+@TaskManager.handler('export_data', concurrency=1)
+async def export_data(payload: dict, task_id: int) -> dict:
+    """
+    Обработчик задачи экспорта. Результат - ключ файла в S3; ссылку на
+    скачивание выдает GET /data/export/{task_id}.
+    """
+    file_format = payload.get('format', 'csv')
+    if file_format not in EXPORT_WRITERS:
+        raise ValueError(f'Неподдерживаемый формат экспорта: {file_format}')
+
+    depot_id = payload.get('depot_id')
+    file_name = (
+        f'depot_items{f"_{depot_id}" if depot_id else ""}_'
+        f'{datetime.utcnow():%Y%m%d_%H%M%S}.{file_format}'
+    )
+    file_key = f'exports/{task_id}/{file_name}'
+
+    fd, path = tempfile.mkstemp(suffix=f'.{file_format}')
+    os.close(fd)
+    try:
+        rows_count = await export_to_file(path, file_format, depot_id)
+        await TaskDAO.set_progress(task_id, 90)
+
+        size = os.path.getsize(path)
+        async with _S3Connector(S3Data) as s3:
+            await s3.multipart_upload(path, file_key)
+    finally:
+        os.unlink(path)
+
+    _logger.info(f'Экспорт завершен: {rows_count} строк', extra={'TaskId': task_id, 'FileKey': file_key})
+    return {
+        'file_key': file_key,
+        'file_name': file_name,
+        'format': file_format,
+        'rows': rows_count,
+        'size': size,
+    }
+
+
+# Без S3 выгрузке некуда писать; узел склада (EDGE_MODE) хранит только свой склад
+if settings.EXPORT_NIGHTLY_FORMAT and settings.S3_BUCKET_NAME and not settings.EDGE_MODE:
+    TaskManager.periodic(
+        'nightly_export',
+        'export_data',
+        interval=timedelta(days=1),
+        offset=timedelta(hours=settings.EXPORT_NIGHTLY_HOUR),
+        payload={'format': settings.EXPORT_NIGHTLY_FORMAT}
+    )
@@ -0,0 +1,355 @@
+"""
+Потоковый импорт складских предметов и поставщиков из CSV/XLSX.
+
+Файл не загружается в память целиком:
+1. строки читаются из файла по одной (csv.DictReader / openpyxl read_only);
+2. валидируются пачками по IMPORT_BATCH_SIZE через DepotItemsStructure/SupplierModel;
+3. внешние ключи (склад, секция, поставщик, тип предмета) разрешаются по
+   справочникам, загруженным в память один раз перед импортом;
+4. каждая пачка записывается одним bulk INSERT.
+
+В памяти одновременно находятся только справочники и одна пачка строк,
+поэтому потребление памяти не зависит от размера файла.
+"""
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+
+from datetime import datetime
+from typing import Iterator
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from api.item.dao import ItemDAO
+from api.models import DepotItemsStructure, SupplierModel
+from api.task.dao import TaskDAO
+from src.db import (
+    Depot, DepotItems, DepotItemsType, DepotSection, Supplier, async_session_maker
+)
+from src.manager import S3Data, TaskManager
+from src.s3 import _S3Connector
+from src.logger import _logger
+from config import settings
+
+
+class ImportKind:
+    ITEMS: str = 'items'
+    SUPPLIERS: str = 'suppliers'
+
+
+SUPPORTED_KINDS = (ImportKind.ITEMS, ImportKind.SUPPLIERS)
+SUPPORTED_FORMATS = ('csv', 'xlsx')
+
+
+class RowSource:
+    """
+    Построчное чтение файла импорта. Значения-пустые строки приводятся к None.
+    """
+
+    def __init__(self, path: str, file_format: str) -> None:
+        if file_format not in SUPPORTED_FORMATS:
+            raise ValueError(f'Неподдерживаемый формат файла: {file_format}')
+
+        self._size = os.path.getsize(path) or 1
+        self._file = None
+        self._workbook = None
+        self._total_rows = 0
+        self._row_number = 1  # Строка 1 - заголовок
+
+        if file_format == 'csv':
+            self._file = open(path, 'rb')
+            text = io.TextIOWrapper(self._file, encoding='utf-8-sig', newline='')
+            self._rows = csv.DictReader(text)
+        else:
+            # openpyxl нужен только для XLSX, поэтому импортируется здесь
+            from openpyxl import load_workbook
+
+            self._workbook = load_workbook(path, read_only=True, data_only=True)
+            sheet = self._workbook.active
+            self._total_rows = sheet.max_row or 0
+            self._rows = self._iter_sheet(sheet)
+
+    @staticmethod
+    def _iter_sheet(sheet) -> Iterator[dict]:
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for values in rows:
+            yield dict(zip(header, values))
+
+    def next_batch(self, size: int) -> list[tuple[int, dict]]:
+        """
+        Возвращает до size строк в виде (номер строки в файле, данные).
+        """
+        batch = []
+        for raw in self._rows:
+            self._row_number += 1
+            row = {
+                key.strip(): (None if value == '' else value)
+                for key, value in raw.items() if key
+            }
+            if any(value is not None for value in row.values()):
+                batch.append((self._row_number, row))
+            if len(batch) >= size:
+                break
+        return batch
+
+    def progress(self) -> int:
+        if self._file is not None:
+            return int(self._file.tell() * 100 / self._size)
+        if self._total_rows:
+            return int(self._row_number * 100 / self._total_rows)
+        return 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        if self._workbook is not None:
+            self._workbook.close()
+
+
+def _as_id(value) -> int | None:
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def _key(value) -> str:
+    return str(value).strip().lower()
+
+
+class ReferenceMaps:
+    """
+    Справочники для разрешения внешних ключей без запросов на каждую строку.
+    Значение в файле может быть как ID, так и названием.
+    """
+
+    def __init__(self) -> None:
+        self.depots: dict[str, int] = {}
+        self.depot_ids: set[int] = set()
+        # (склад, название секции) -> ID секции
+        self.sections: dict[tuple[int, str], int] = {}
+        # ID секции -> ID склада
+        self.section_depots: dict[int, int] = {}
+        self.suppliers: dict[str, int] = {}
+        self.supplier_ids: set[int] = set()
+        self.item_types: dict[str, int] = {}
+        self.item_type_ids: set[int] = set()
+
+    @classmethod
+    async def load(cls) -> 'ReferenceMaps':
+        maps = cls()
+        async with async_session_maker() as session:
+            for row in await session.execute(select(Depot.id, Depot.name)):
+                maps.depots[_key(row.name)] = row.id
+                maps.depot_ids.add(row.id)
+
+            query = select(DepotSection.id, DepotSection.depot_id, DepotSection.section_name)
+            for row in await session.execute(query):
+                maps.sections[(row.depot_id, _key(row.section_name))] = row.id
+                maps.section_depots[row.id] = row.depot_id
+
+            for row in await session.execute(select(Supplier.id, Supplier.name)):
+                maps.suppliers[_key(row.name)] = row.id
+                maps.supplier_ids.add(row.id)
+
+            for row in await session.execute(select(DepotItemsType.id, DepotItemsType.name)):
+                maps.item_types[_key(row.name)] = row.id
+                maps.item_type_ids.add(row.id)
+
+        return maps
+
+    @staticmethod
+    def _resolve(value, ids: set[int], by_name: dict[str, int], title: str) -> int | None:
+        if value is None:
+            return None
+
+        value_id = _as_id(value)
+        if value_id is not None and value_id in ids:
+            return value_id
+
+        if (resolved := by_name.get(_key(value))) is not None:
+            return resolved
+
+        raise ValueError(f'{title} «{value}» не найден')
+
+    def resolve_item(self, row: dict) -> dict:
+        data = dict(row)
+
+        depot_id = self._resolve(
+            data.pop('depot', None) or data.get('depot_id'), self.depot_ids, self.depots, 'Склад'
+        )
+        if depot_id is None:
+            raise ValueError('Не указан склад')
+        data['depot_id'] = depot_id
+
+        section = data.pop('section', None) or data.get('depot_section')
+        if section is not None:
+            section_id = _as_id(section)
+            if section_id is None or self.section_depots.get(section_id) != depot_id:
+                section_id = self.sections.get((depot_id, _key(section)))
+            if section_id is None:
+                raise ValueError(f'Секция «{section}» не найдена на складе {depot_id}')
+            data['depot_section'] = section_id
+
+        data['supplier_id'] = self._resolve(
+            data.pop('supplier', None) or data.get('supplier_id'),
+            self.supplier_ids, self.suppliers, 'Поставщик'
+        )
+        data['item_type'] = self._resolve(
+            data.get('item_type'), self.item_type_ids, self.item_types, 'Тип предмета'
+        )
+        return data
+
+
+def _validation_errors(e: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+        for error in e.errors()
+    ]
+
+
+def _split_list(value) -> list[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    return [part.strip() for part in str(value).split(',') if part.strip()]
+
+
+def prepare_items(
+    maps: ReferenceMaps,
+    batch: list[tuple[int, dict]]
+) -> tuple[list[dict], list[dict]]:
+    """
+    Валидирует пачку строк предметов.
+    :return: (строки для вставки, ошибки по строкам)
+    """
+    now = datetime.utcnow()
+    rows, errors = [], []
+    for row_number, raw in batch:
+        try:
+            data = maps.resolve_item(raw)
+            data.setdefault('created_at', now)
+            item = DepotItemsStructure.model_validate(data)
+        except ValidationError as e:
+            errors.append({'row': row_number, 'errors': _validation_errors(e)})
+        except ValueError as e:
+            errors.append({'row': row_number, 'errors': [str(e)]})
+        else:
+            rows.append(item.model_dump(exclude={'id'}))
+    return rows, errors
+
+
+def prepare_suppliers(batch: list[tuple[int, dict]]) -> tuple[list[dict], list[dict]]:
+    """
+    Валидирует пачку строк поставщиков.
+    :return: (строки для вставки, ошибки по строкам)
+    """
+    rows, errors = [], []
+    for row_number, raw in batch:
+        data = dict(raw)
+        try:
+            if isinstance(data.get('bank_details'), str):
+                data['bank_details'] = json.loads(data['bank_details'])
+            for field in ('product_categories', 'compliance_certificates'):
+                data[field] = _split_list(data.get(field))
+            supplier = SupplierModel.model_validate(data)
+        except ValidationError as e:
+            errors.append({'row': row_number, 'errors': _validation_errors(e)})
+        except ValueError as e:
+            errors.append({'row': row_number, 'errors': [f'bank_details: {e}']})
+        else:
+            row = supplier.model_dump(exclude={'id', 'product_categories'})
+            # В таблице suppliers эти поля хранятся строками
+            row['bank_details'] = json.dumps(row['bank_details'] or {}, ensure_ascii=False)
+            row['compliance_certificates'] = ','.join(row['compliance_certificates'] or [])
+            rows.append(row)
+    return rows, errors
+
+
+async def import_file(
+    path: str,
+    file_format: str,
+    kind: str,
+    task_id: int | None = None
+) -> dict:
+    """
+    Импортирует файл и возвращает сводку: сколько строк вставлено,
+    сколько отклонено и ошибки по строкам (не больше IMPORT_MAX_ERRORS).
+    """
+    if kind not in SUPPORTED_KINDS:
+        raise ValueError(f'Неподдерживаемый тип импорта: {kind}')
+
+    if kind == ImportKind.ITEMS:
+        maps = await ReferenceMaps.load()
+        model, prepare = DepotItems, lambda batch: prepare_items(maps, batch)
+    else:
+        model, prepare = Supplier, prepare_suppliers
+
+    source = await asyncio.to_thread(RowSource, path, file_format)
+    inserted, failed, errors = 0, 0, []
+    last_progress = -1
+
+    try:
+        while True:
+            # Чтение и валидация - синхронная работа, уводим ее из event loop
+            batch = await asyncio.to_thread(source.next_batch, settings.IMPORT_BATCH_SIZE)
+            if not batch:
+                break
+
+            rows, batch_errors = await asyncio.to_thread(prepare, batch)
+
+            if rows:
+                if kind == ImportKind.ITEMS:
+                    # Вместе с предметами обновляются сводки остатков
+                    await ItemDAO.add_items(rows)
+                else:
+                    async with async_session_maker() as session:
+                        await session.execute(insert(model), rows)
+                        await session.commit()
+                inserted += len(rows)
+
+            failed += len(batch_errors)
+            errors.extend(batch_errors[:settings.IMPORT_MAX_ERRORS - len(errors)])
+
+            progress = source.progress()
+            if task_id is not None and progress != last_progress:
+                await TaskDAO.set_progress(task_id, progress)
+                last_progress = progress
+    finally:
+        source.close()
+
+    return {'kind': kind, 'inserted': inserted, 'failed': failed, 'errors': errors}
+
+
+@TaskManager.handler('import_data', concurrency=1)
+async def import_data(payload: dict, task_id: int) -> dict:
+    """
+    Обработчик задачи импорта. Файл заранее загружен в S3 (payload['file_key']),
+    здесь он потоком скачивается во временный файл и импортируется.
+    """
+    file_format = payload['format']
+
+    fd, path = tempfile.mkstemp(suffix=f'.{file_format}')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            async with _S3Connector(S3Data) as s3:
+                await s3.download_fileobj(payload['file_key'], tmp)
+
+        result = await import_file(path, file_format, payload['kind'], task_id)
+    finally:
+        os.unlink(path)
+
+    _logger.info(
+        f'Импорт завершен: вставлено {result["inserted"]}, отклонено {result["failed"]}',
+        extra={'TaskId': task_id, 'Kind': payload['kind']}
+    )
+    return result
@@ -0,0 +1,36 @@
+"""
+Инвентаризация (цикличный пересчет) больших складов.
+
+Сканеры присылают подсчеты пачками (POST /inventory/{id}/lines), строки
+пересчета вставляются bulk upsert'ом по уникальному (count_id, item_id).
+Расхождения с учетом считаются одним UPDATE с коррелированным подзапросом
+к depot_items по всему пересчету, утверждение - одним UPDATE по фильтру.
+
+Закрытие идет фоновой задачей close_inventory_count: утвержденные
+корректировки применяются порциями по INVENTORY_APPLY_CHUNK предметов,
+каждая порция - отдельная транзакция вместе со сводками остатков и
+журналом изменений. Примененные строки помечаются applied_at, поэтому
+повтор задачи после сбоя продолжает с места остановки. В конце у склада
+обновляется last_inventory_date.
+"""
+from api.inventory.dao import InventoryCountDAO
+from api.task.dao import TaskDAO
+from src.manager import TaskManager
+from src.logger import _logger
+
+
+@TaskManager.handler('close_inventory_count', concurrency=1)
+async def close_inventory_count(payload: dict, task_id: int) -> dict:
+    count_id = payload['count_id']
+
+    async def on_progress(done: int, total: int) -> None:
+        # 100% выставляет менеджер задач после закрытия пересчета
+        await TaskDAO.set_progress(task_id, min(99, done * 100 // max(total, 1)))
+
+    result = await InventoryCountDAO.apply(count_id, on_progress)
+
+    _logger.info(
+        f'Инвентаризация закрыта: применено корректировок {result["applied"]}',
+        extra={'TaskId': task_id, 'CountId': count_id, 'Clamped': result['clamped']}
+    )
+    return result
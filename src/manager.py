@@ -8,18 +8,17 @@
 # ...
 
 import time 
-import pyotp 
-import qrcode 
 import io
 import os
-import aiohttp
 import uuid as uuid_generate
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
 from packaging.version import Version as _versionCompare
 
 from api.models import UserStructure
-from src.db import Attachment, async_session_maker
+from api.task.dao import TaskDAO, TaskStatus
+from src.db import Attachment, Task, async_session_maker
 from src.s3 import _S3Connector, _S3Config
 from src.logger import _logger
 from config import settings
@@ -30,6 +29,10 @@ class TwoFactor:
         self, 
         secret_key: str = settings.SECRET_KEY
     ) -> None:
+        # pyotp, qrcode и aiohttp нужны редко и импортируются при первом
+        # использовании, чтобы не замедлять старт воркеров
+        import pyotp
+
         self.secret_key = secret_key
         self.totp = pyotp.TOTP(self.secret_key)
 
@@ -49,6 +52,8 @@ class TwoFactor:
             issuer_name=issuer_name
         )
 
+        import qrcode
+
         qr_img = qrcode.make(uri)
         buffer = io.BytesIO()
         qr_img.save(buffer, format='PNG')
@@ -73,6 +78,8 @@ class SystemManager:
 
     async def check_updates(self) -> bool:
         """Проверка обновлений"""
+        import aiohttp
+
         async with aiohttp.ClientSession() as session:
             # В URL указан тестовый сервер, ожидается ответ в таком формате:
             # {"version": "0.2 Beta"}
@@ -176,15 +183,16 @@ class AttachmentManager:
     @staticmethod
     async def upload(
         file_name: str, 
-        file_content: bytes
+        file_content: bytes,
+        attachment_type: str = AttachmentType.FILE
     ) -> FileObj:
-        uuid = uuid_generate.uuid4()
+        uuid = str(uuid_generate.uuid4())
 
         file_extension = os.path.splitext(file_name)[1].lstrip('.')
         obj = FileObj(
             name=uuid, 
             extension=file_extension,
-            attachment_type=AttachmentType.FILE
+            attachment_type=attachment_type
         )
         full_file_name = obj.__str__()
 
@@ -199,7 +207,7 @@ class AttachmentManager:
         attachment_data = Attachment(
             uuid=uuid,
             file_path=full_file_name,
-            attachment_type='file',
+            attachment_type=attachment_type,
             file_extension=file_extension
         )
 
@@ -354,6 +362,9 @@ class UserManager:
         """
         ...
 
+TaskHandler = Callable[[dict, int], Awaitable[dict | None]]
+
+
 class TaskManager:
     TASK_TYPE_LIST = [
         'delete_user',         # Удаление пользователя
@@ -368,6 +379,7 @@ class TaskManager:
         'delete_item',         # Удаление товара
         'move_item',           # Перемещение товара между складами
         'check_item_stock',    # Проверка наличия товара на складе
+        'close_inventory_count', # Применение корректировок инвентаризации
 
         'create_task',         # Создание новой задачи
         'update_task',         # Обновление задачи
@@ -384,6 +396,11 @@ class TaskManager:
         'send_notification',   # Отправка уведомлений пользователям
     ]
 
+    # Зарегистрированные обработчики: тип задачи -> (корутина, лимит параллельности)
+    _handlers: dict[str, tuple[TaskHandler, int]] = {}
+    # Периодические задачи: имя -> параметры постановки
+    _periodic: dict[str, dict] = {}
+
     def __init__(self):
         pass
 
@@ -401,10 +418,98 @@ class TaskManager:
         if task_type not in self.TASK_TYPE_LIST:
             raise ValueError(f"Недопустимый тип задачи: {task_type}")
         return True
-    
+
+    @classmethod
+    def handler(
+        cls,
+        task_type: str,
+        concurrency: int = settings.TASK_DEFAULT_CONCURRENCY
+    ) -> Callable[[TaskHandler], TaskHandler]:
+        """
+        Регистрирует обработчик задач данного типа.
+
+        Обработчик - корутина handler(payload: dict, task_id: int), которая
+        возвращает словарь с результатом или None.
+        :param concurrency: Сколько задач этого типа один воркер
+            выполняет одновременно.
+        """
+        cls().check_task_type(task_type)
+
+        def decorator(func: TaskHandler) -> TaskHandler:
+            cls._handlers[task_type] = (func, concurrency)
+            return func
+
+        return decorator
+
+    @classmethod
+    def registered_handlers(cls) -> dict[str, tuple[TaskHandler, int]]:
+        return cls._handlers
+
+    @classmethod
+    def periodic(
+        cls,
+        name: str,
+        task_type: str,
+        interval: timedelta,
+        payload: dict | None = None,
+        offset: timedelta = timedelta(0),
+        priority: int = 0
+    ) -> None:
+        """
+        Регистрирует периодическую задачу, например ночной экспорт.
+
+        Запуски привязаны к слотам от начала эпохи: interval=1 день и
+        offset=2 часа дают запуск каждый день в 02:00 UTC. Каждый слот
+        ставится в очередь с ключом идемпотентности, поэтому при любом
+        количестве воркеров задача за слот создается ровно один раз.
+        """
+        cls().check_task_type(task_type)
+        cls._periodic[name] = {
+            'task_type': task_type,
+            'interval': interval,
+            'payload': payload or {},
+            'offset': offset,
+            'priority': priority,
+        }
+
+    @classmethod
+    def registered_periodic(cls) -> dict[str, dict]:
+        return cls._periodic
+
     async def create_task(
         self,
-        task: str | None = None,
+        task: str,
         time: datetime | None = None,
-    ):
-        ...
\ No newline at end of file
+        payload: dict | None = None,
+        priority: int = 0,
+        idempotency_key: str | None = None,
+        user_id: int | None = None,
+        max_attempts: int = 3,
+    ) -> int:
+        """
+        Ставит задачу в очередь и сразу возвращает ее ID, выполнение
+        идет в фоновом воркере (src/tasks.py).
+        :param task: Тип задачи.
+        :param time: Не запускать раньше этого времени (UTC).
+        :param payload: Аргументы обработчика.
+        :param priority: Чем больше, тем раньше задача будет взята в работу.
+        :param idempotency_key: Повторный вызов с тем же ключом вернет
+            ID уже созданной задачи.
+        :return: ID задачи.
+        """
+        self.check_task_type(task)
+
+        task_obj = Task(
+            task_type=task,
+            status=TaskStatus.PENDING,
+            priority=priority,
+            idempotency_key=idempotency_key,
+            user_id=user_id,
+            max_attempts=max_attempts,
+            progress=0,
+            attempts=0,
+            run_at=time or datetime.utcnow()
+        )
+        task_obj.set_payload(payload or {})
+
+        return await TaskDAO.enqueue(task_obj)
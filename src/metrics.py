@@ -0,0 +1,281 @@
+"""
+Метрики запросов в формате Prometheus.
+
+MetricsMiddleware на каждый запрос прибавляет к счетчикам маршрута
+(метод + шаблон пути вида /group/{group_id}, а не фактический путь -
+чтобы число рядов не зависело от ID): количество по классам статусов
+(2xx, 4xx ...), гистограмму длительности, время в БД и в S3.
+
+Время в БД и S3 копится в объекте запроса, который лежит в contextvar:
+SQLAlchemy-события before/after_cursor_execute и события botocore
+before/after-call прибавляют к нему длительность вызова. Контекст
+наследуется дочерними задачами и greenlet'ами SQLAlchemy, поэтому
+учитываются и параллельные запросы внутри одного HTTP-запроса.
+
+Счетчики - обычные списки в памяти воркера. Все изменения выполняются в
+одном потоке event loop без await между чтением и записью, поэтому
+блокировки не нужны. Каждый uvicorn-воркер раз в METRICS_FLUSH_SECONDS
+сохраняет свои счетчики в METRICS_DIR/metrics-<pid>.json, а /metrics
+складывает файлы всех воркеров. Без METRICS_DIR отдаются метрики только
+обслужившего запрос процесса.
+"""
+import asyncio
+import bisect
+import contextvars
+import json
+import os
+import time
+
+from pathlib import Path
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.db import engine
+from src.logger import _logger
+from config import settings
+
+# Границы гистограммы длительности запроса, в секундах
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STATUS_CLASSES = ('1xx', '2xx', '3xx', '4xx', '5xx')
+
+# Раскладка списка счетчиков маршрута
+_STATUS = 0
+_BUCKETS = _STATUS + len(STATUS_CLASSES)
+_DURATION_SUM = _BUCKETS + len(LATENCY_BUCKETS) + 1  # +1 - корзина +Inf
+_DB_SECONDS = _DURATION_SUM + 1
+_DB_QUERIES = _DB_SECONDS + 1
+_S3_SECONDS = _DB_QUERIES + 1
+_S3_CALLS = _S3_SECONDS + 1
+_SIZE = _S3_CALLS + 1
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestTimings:
+    __slots__ = ('db_seconds', 'db_queries', 's3_seconds', 's3_calls')
+
+    def __init__(self) -> None:
+        self.db_seconds = 0.0
+        self.db_queries = 0
+        self.s3_seconds = 0.0
+        self.s3_calls = 0
+
+
+_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar('request_timings', default=None)
+
+
+class Metrics:
+
+    def __init__(self) -> None:
+        # 'метод route' -> счетчики (раскладка _STATUS ... _S3_CALLS)
+        self._routes: dict[str, list[float]] = {}
+        self._writer: asyncio.Task | None = None
+
+    def observe(self, method: str, route: str, status: int, duration: float, timings: RequestTimings) -> None:
+        counters = self._routes.get(f'{method} {route}')
+        if counters is None:
+            counters = self._routes[f'{method} {route}'] = [0] * _SIZE
+
+        status_class = min(max(status // 100, 1), 5) - 1
+        counters[_STATUS + status_class] += 1
+        counters[_BUCKETS + bisect.bisect_left(LATENCY_BUCKETS, duration)] += 1
+        counters[_DURATION_SUM] += duration
+        counters[_DB_SECONDS] += timings.db_seconds
+        counters[_DB_QUERIES] += timings.db_queries
+        counters[_S3_SECONDS] += timings.s3_seconds
+        counters[_S3_CALLS] += timings.s3_calls
+
+    def snapshot(self) -> dict[str, list[float]]:
+        return {key: list(counters) for key, counters in self._routes.items()}
+
+    @staticmethod
+    def _path(pid: int) -> Path:
+        return Path(settings.METRICS_DIR) / f'metrics-{pid}.json'
+
+    def _write(self, data: str) -> None:
+        path = self._path(os.getpid())
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(data)
+        # Замена атомарна: читатель видит либо старый, либо новый файл
+        os.replace(tmp, path)
+
+    def collect(self) -> dict[str, list[float]]:
+        """
+        Счетчики всех воркеров. Свои берутся из памяти, чужие - из файлов.
+        Файлы завершившихся воркеров тоже учитываются: счетчики Prometheus
+        не должны уменьшаться.
+        """
+        total = self.snapshot()
+        if not settings.METRICS_DIR:
+            return total
+
+        own = self._path(os.getpid()).name
+        for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+            if path.name == own:
+                continue
+            try:
+                routes = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            for key, counters in routes.items():
+                if len(counters) != _SIZE:
+                    continue
+                current = total.setdefault(key, [0] * _SIZE)
+                for index, value in enumerate(counters):
+                    current[index] += value
+        return total
+
+    def render(self) -> str:
+        """
+        Текстовый формат Prometheus (text/plain; version=0.0.4).
+        """
+        routes = sorted(self.collect().items())
+        lines = []
+
+        def family(name: str, kind: str, description: str) -> None:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def labels(key: str, **extra: str) -> str:
+            method, route = key.split(' ', 1)
+            pairs = {'method': method, 'route': route, **extra}
+            return ','.join(f'{name}="{_escape(value)}"' for name, value in pairs.items())
+
+        family('http_requests_total', 'counter', 'Requests by route and status class')
+        for key, counters in routes:
+            for index, status_class in enumerate(STATUS_CLASSES):
+                if counters[_STATUS + index]:
+                    lines.append(f'http_requests_total{{{labels(key, status=status_class)}}} {counters[_STATUS + index]:g}')
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency')
+        for key, counters in routes:
+            cumulative = 0
+            for index, bound in enumerate(LATENCY_BUCKETS + (float('inf'),)):
+                cumulative += counters[_BUCKETS + index]
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(f'http_request_duration_seconds_bucket{{{labels(key, le=le)}}} {cumulative:g}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels(key)}}} {counters[_DURATION_SUM]:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels(key)}}} {cumulative:g}')
+
+        for name, index, description in (
+            ('http_request_db_seconds_total', _DB_SECONDS, 'Time spent in DB queries'),
+            ('http_request_db_queries_total', _DB_QUERIES, 'DB queries executed'),
+            ('http_request_s3_seconds_total', _S3_SECONDS, 'Time spent in S3 calls'),
+            ('http_request_s3_calls_total', _S3_CALLS, 'S3 calls made'),
+        ):
+            family(name, 'counter', description)
+            for key, counters in routes:
+                lines.append(f'{name}{{{labels(key)}}} {counters[index]:.6g}')
+
+        return '\n'.join(lines) + '\n'
+
+    async def _write_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_SECONDS)
+            try:
+                # Снимок берется в потоке event loop, в отдельном потоке только запись файла
+                await asyncio.to_thread(self._write, json.dumps(self.snapshot()))
+            except OSError as e:
+                _logger.error(f'Не удалось сохранить метрики: {e}')
+
+    async def start(self) -> None:
+        if settings.METRICS_DIR:
+            Path(settings.METRICS_DIR).mkdir(parents=True, exist_ok=True)
+            self._writer = asyncio.create_task(self._write_loop())
+
+    async def stop(self) -> None:
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+            try:
+                self._write(json.dumps(self.snapshot()))
+            except OSError as e:
+                _logger.error(f'Не удалось сохранить метрики: {e}')
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            # Маршрут FastAPI кладет в scope при сопоставлении пути
+            route = scope.get('route')
+            metrics.observe(
+                scope['method'],
+                getattr(route, 'path', UNMATCHED_ROUTE),
+                status_code,
+                time.perf_counter() - started,
+                timings
+            )
+
+
+@event.listens_for(engine.sync_engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _timings.get() is not None:
+        conn.info.setdefault('metrics_started', []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = _timings.get()
+    started = conn.info.get('metrics_started')
+    if timings is not None and started:
+        timings.db_seconds += time.perf_counter() - started.pop()
+        timings.db_queries += 1
+
+
+@event.listens_for(engine.sync_engine, 'handle_error')
+def _handle_error(exception_context):
+    # Запрос с ошибкой не доходит до after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('metrics_started'):
+        connection.info['metrics_started'].pop()
+
+
+def _before_s3_call(context: dict, **kwargs) -> None:
+    if _timings.get() is not None:
+        context['metrics_started'] = time.perf_counter()
+
+
+def _after_s3_call(context: dict, **kwargs) -> None:
+    timings = _timings.get()
+    started = context.get('metrics_started')
+    if timings is not None and started is not None:
+        timings.s3_seconds += time.perf_counter() - started
+        timings.s3_calls += 1
+
+
+def instrument_s3_client(client) -> None:
+    """
+    Подключает учет времени S3 к клиенту aioboto3.
+    """
+    client.meta.events.register('before-call.s3', _before_s3_call)
+    client.meta.events.register('after-call.s3', _after_s3_call)
@@ -0,0 +1,281 @@
+"""
+Версионные миграции схемы базы данных.
+
+Миграции лежат в src/database/migrations в файлах вида NNNN_описание.py
+и применяются строго по порядку номеров. В каждом файле должна быть
+функция upgrade(connection), которая получает синхронное соединение
+SQLAlchemy (вызывается через run_sync).
+
+Для каждой примененной миграции в таблице schema_migrations хранится
+контрольная сумма файла. Если уже примененный файл изменили, миграции
+не запустятся - такие изменения нужно оформлять новой миграцией.
+
+Применение миграций:
+    python -m src.migrator          # применить все новые миграции
+    python -m src.migrator --check  # код возврата 1, если база не на head
+"""
+import asyncio
+import hashlib
+import importlib.util
+import sys
+
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import (
+    Column, DateTime, MetaData, String, Table, inspect, select, text
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.db import engine
+from src.logger import _logger
+
+MIGRATIONS_DIR = Path(__file__).parent / 'database' / 'migrations'
+
+# Имя блокировки MySQL, чтобы миграции не запускались параллельно
+# из нескольких процессов
+MIGRATION_LOCK_NAME = 'depot_manager_migrations'
+MIGRATION_LOCK_TIMEOUT = 300
+
+_metadata = MetaData()
+
+schema_migrations = Table(
+    'schema_migrations', _metadata,
+    Column('revision', String(32), primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('checksum', String(64), nullable=False),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+
+class MigrationChecksumError(RuntimeError):
+    """Файл уже примененной миграции был изменен."""
+
+
+@dataclass(frozen=True)
+class Migration:
+    revision: str
+    name: str
+    path: Path
+    checksum: str
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location(
+            f'_migration_{self.revision}', self.path
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    """
+    Возвращает список миграций, отсортированный по номеру ревизии.
+    """
+    migrations = []
+    for path in sorted(directory.glob('[0-9]*_*.py')):
+        revision, _, name = path.stem.partition('_')
+        migrations.append(Migration(
+            revision=revision,
+            name=name,
+            path=path,
+            checksum=hashlib.sha256(path.read_bytes()).hexdigest()
+        ))
+
+    revisions = [migration.revision for migration in migrations]
+    if len(revisions) != len(set(revisions)):
+        raise RuntimeError(f'Дублирующиеся номера миграций: {revisions}')
+
+    return migrations
+
+
+def _applied(connection) -> dict[str, str]:
+    if not inspect(connection).has_table(schema_migrations.name):
+        return {}
+
+    rows = connection.execute(
+        select(schema_migrations.c.revision, schema_migrations.c.checksum)
+    )
+    return {row.revision: row.checksum for row in rows}
+
+
+def _pending(migrations: list[Migration], applied: dict[str, str]) -> list[Migration]:
+    pending = []
+    for migration in migrations:
+        checksum = applied.get(migration.revision)
+        if checksum is None:
+            pending.append(migration)
+        elif checksum != migration.checksum:
+            raise MigrationChecksumError(
+                f'Миграция {migration.revision}_{migration.name} была изменена после применения'
+            )
+    return pending
+
+
+async def is_at_head() -> bool:
+    """
+    Быстрая проверка при старте: один SELECT по schema_migrations
+    и сверка контрольных сумм файлов, без рефлексии всей схемы.
+    """
+    migrations = discover()
+    async with engine.connect() as conn:
+        applied = await conn.run_sync(_applied)
+
+    return not _pending(migrations, applied)
+
+
+def _upgrade(connection, migrations: list[Migration]) -> list[str]:
+    is_mysql = connection.dialect.name == 'mysql'
+    if is_mysql:
+        locked = connection.execute(
+            text('SELECT GET_LOCK(:name, :timeout)'),
+            {'name': MIGRATION_LOCK_NAME, 'timeout': MIGRATION_LOCK_TIMEOUT}
+        ).scalar()
+        if locked != 1:
+            raise RuntimeError('Не удалось получить блокировку для применения миграций')
+
+    try:
+        schema_migrations.create(connection, checkfirst=True)
+        connection.commit()
+
+        # Состояние перечитываем уже под блокировкой: другой процесс
+        # мог применить миграции, пока мы ее ждали
+        applied_now = []
+        for migration in _pending(migrations, _applied(connection)):
+            _logger.info(f'Применение миграции {migration.revision}_{migration.name}')
+
+            migration.load().upgrade(connection)
+            connection.execute(schema_migrations.insert().values(
+                revision=migration.revision,
+                name=migration.name,
+                checksum=migration.checksum,
+                applied_at=datetime.utcnow()
+            ))
+            # DDL в MySQL не транзакционен, поэтому фиксируем каждую
+            # миграцию отдельно
+            connection.commit()
+            applied_now.append(migration.revision)
+
+        return applied_now
+    finally:
+        if is_mysql:
+            connection.execute(
+                text('SELECT RELEASE_LOCK(:name)'), {'name': MIGRATION_LOCK_NAME}
+            )
+
+
+async def migrate() -> list[str]:
+    """
+    Применяет все непримененные миграции.
+    :return: Список номеров примененных миграций.
+    """
+    migrations = discover()
+
+    async with engine.connect() as conn:
+        applied = await conn.run_sync(_applied)
+        if not _pending(migrations, applied):
+            return []
+
+        return await conn.run_sync(_upgrade, migrations)
+
+
+# Хелперы для файлов миграций
+
+def create_index(
+    connection,
+    name: str,
+    table: str,
+    columns: list[str] | tuple[str, ...],
+    unique: bool = False
+) -> bool:
+    """
+    Создает индекс, если его еще нет.
+
+    На MySQL индекс строится онлайн (ALGORITHM=INPLACE, LOCK=NONE), то есть
+    без блокировки записи в таблицу - это важно для больших таблиц вроде
+    depot_items. Если онлайн-построение невозможно, MySQL вернет ошибку,
+    а не заблокирует таблицу молча.
+    :return: True, если индекс был создан.
+    """
+    existing = {index['name'] for index in inspect(connection).get_indexes(table)}
+    if name in existing:
+        return False
+
+    statement = (
+        f'CREATE {"UNIQUE " if unique else ""}INDEX {name} '
+        f'ON {table} ({", ".join(columns)})'
+    )
+    if connection.dialect.name == 'mysql':
+        statement += ' ALGORITHM=INPLACE LOCK=NONE'
+
+    connection.execute(text(statement))
+    return True
+
+
+def create_fulltext_index(
+    connection,
+    name: str,
+    table: str,
+    columns: list[str] | tuple[str, ...],
+    parser: str | None = 'ngram'
+) -> bool:
+    """
+    Создает FULLTEXT-индекс (только MySQL), если его еще нет.
+
+    Парсер ngram режет текст на n-граммы (ngram_token_size, по умолчанию 2)
+    и не зависит от пробелов и языка, поэтому подходит для кириллицы и
+    поиска по части слова. FULLTEXT нельзя построить с LOCK=NONE, поэтому
+    на время построения запись в таблицу блокируется (LOCK=SHARED).
+    :return: True, если индекс был создан.
+    """
+    if connection.dialect.name != 'mysql':
+        return False
+
+    existing = {index['name'] for index in inspect(connection).get_indexes(table)}
+    if name in existing:
+        return False
+
+    statement = f'CREATE FULLTEXT INDEX {name} ON {table} ({", ".join(columns)})'
+    if parser:
+        statement += f' WITH PARSER {parser}'
+    statement += ' ALGORITHM=INPLACE LOCK=SHARED'
+
+    connection.execute(text(statement))
+    return True
+
+
+def add_column(connection, table: str, column: Column) -> bool:
+    """
+    Добавляет колонку, если ее еще нет.
+    :return: True, если колонка была добавлена.
+    """
+    existing = {col['name'] for col in inspect(connection).get_columns(table)}
+    if column.name in existing:
+        return False
+
+    column_type = column.type.compile(dialect=connection.dialect)
+    statement = f'ALTER TABLE {table} ADD COLUMN {column.name} {column_type}'
+    if not column.nullable:
+        statement += ' NOT NULL'
+    if column.server_default is not None:
+        default = column.server_default.arg
+        statement += f' DEFAULT {default.text if hasattr(default, "text") else repr(str(default))}'
+
+    connection.execute(text(statement))
+    return True
+
+
+if __name__ == '__main__':
+    if '--check' in sys.argv:
+        at_head = asyncio.run(is_at_head())
+        print('База на актуальной ревизии' if at_head else 'Есть непримененные миграции')
+        sys.exit(0 if at_head else 1)
+
+    try:
+        applied = asyncio.run(migrate())
+    except (SQLAlchemyError, MigrationChecksumError) as e:
+        _logger.error(f'Ошибка применения миграций: {e}')
+        sys.exit(1)
+
+    print(f'Применены миграции: {", ".join(applied)}' if applied else 'Новых миграций нет')
@@ -0,0 +1,81 @@
+"""
+Схема OpenAPI строится не при импорте приложения, а при первом запросе
+/docs или /openapi.json, и кэшируется.
+
+Схему можно построить заранее при сборке (scripts/build_openapi.py) и
+указать путь к файлу в OPENAPI_SCHEMA_PATH - тогда воркер только читает
+JSON. В файле хранится отпечаток маршрутов (методы и пути); если код
+изменился, а файл нет, схема строится заново.
+"""
+import hashlib
+import json
+
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.openapi.utils import get_openapi
+
+from src.logger import _logger
+from config import settings
+
+FINGERPRINT_KEY = 'x-routes-fingerprint'
+
+
+def routes_fingerprint(app: FastAPI) -> str:
+    """
+    Дешевый отпечаток набора маршрутов, без генерации схем моделей.
+    """
+    routes = sorted(
+        f'{",".join(sorted(getattr(route, "methods", None) or ()))} {route.path}'
+        for route in app.routes
+    )
+    return hashlib.blake2b('\n'.join(routes).encode(), digest_size=16).hexdigest()
+
+
+def build_schema(app: FastAPI) -> dict:
+    schema = get_openapi(
+        title=app.title,
+        version=app.version,
+        description=app.description,
+        routes=app.routes,
+        tags=app.openapi_tags,
+    )
+    schema['components']['securitySchemes'] = {
+        'BearerAuth': {
+            'type': 'http',
+            'scheme': 'bearer',
+            'bearerFormat': 'JWT'
+        }
+    }
+    schema['security'] = [{'BearerAuth': []}]
+    schema[FINGERPRINT_KEY] = routes_fingerprint(app)
+    return schema
+
+
+def _load_prebuilt(app: FastAPI) -> dict | None:
+    if not settings.OPENAPI_SCHEMA_PATH:
+        return None
+
+    path = Path(settings.OPENAPI_SCHEMA_PATH)
+    try:
+        schema = json.loads(path.read_bytes())
+    except (OSError, ValueError) as e:
+        _logger.warning(f'Не удалось прочитать готовую схему OpenAPI: {e}')
+        return None
+
+    if schema.get(FINGERPRINT_KEY) != routes_fingerprint(app):
+        _logger.warning('Готовая схема OpenAPI устарела, строится заново', extra={'Path': str(path)})
+        return None
+    return schema
+
+
+def install(app: FastAPI) -> None:
+    """
+    Подменяет app.openapi ленивой версией с кэшем.
+    """
+    def openapi() -> dict:
+        if app.openapi_schema is None:
+            app.openapi_schema = _load_prebuilt(app) or build_schema(app)
+        return app.openapi_schema
+
+    app.openapi = openapi
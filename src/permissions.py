@@ -0,0 +1,172 @@
+"""
+Проверка прав по правилам групп (GroupUsers.rules).
+
+Правила группы - JSON-список ID правил (Rule). При загрузке каждая
+группа компилируется в битовую маску (int, бит N - правило N), и
+проверка права в запросе - это одна операция над числом из словаря в
+памяти, без запросов к БД и без json.loads.
+
+Маски всех групп загружаются одним запросом при старте и
+перечитываются в фоне раз в PERMISSIONS_REFRESH_SECONDS - так
+подтягиваются изменения, сделанные в других процессах. Изменения через
+GroupDAO и создание группы применяются к кэшу сразу.
+"""
+import asyncio
+import json
+import time
+import zlib
+
+from fastapi import Depends
+from sqlalchemy import select
+from typing import Annotated, Callable
+
+from api.models import CurrentUser
+from src.db import GroupUsers, async_session_maker
+from src.logger import _logger
+from config import settings
+from exceptions import PermissionDeniedException
+
+# Как часто при обращении к неизвестной группе можно перечитывать кэш
+MISS_RELOAD_INTERVAL = 5.0
+
+
+class Rule:
+    ADMIN: int = 0           # Все права
+    MANAGE_GROUPS: int = 1   # Создание, изменение и удаление групп
+    MANAGE_USERS: int = 2    # Управление пользователями
+    MANAGE_ITEMS: int = 3    # Изменение остатков, списание
+    IMPORT_DATA: int = 4     # Импорт данных
+    EXPORT_DATA: int = 5     # Экспорт данных
+    VIEW_REPORTS: int = 6    # Просмотр отчетов
+    DISPATCH: int = 7        # Планирование доставки
+    VIEW_LOGS: int = 8       # Просмотр логов
+
+
+ALL_RULES = ~0
+
+
+def compile_rules(rules: list[int]) -> int:
+    """
+    Список ID правил -> битовая маска. Правило ADMIN дает все права.
+    """
+    if Rule.ADMIN in rules:
+        return ALL_RULES
+
+    mask = 0
+    for rule in rules:
+        if isinstance(rule, int) and rule >= 0:
+            mask |= 1 << rule
+    return mask
+
+
+def _parse_rules(group_id: int, raw: str | None) -> list[int]:
+    try:
+        rules = json.loads(raw) if raw else []
+    except ValueError:
+        _logger.error('Некорректные правила группы', extra={'GroupId': group_id})
+        return []
+    return rules if isinstance(rules, list) else []
+
+
+class PermissionCache:
+
+    def __init__(self) -> None:
+        self._masks: dict[int, int] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._refresher: asyncio.Task | None = None
+
+    async def load(self) -> None:
+        async with async_session_maker() as session:
+            result = await session.execute(select(GroupUsers.id, GroupUsers.rules))
+            masks = {
+                group_id: compile_rules(_parse_rules(group_id, rules))
+                for group_id, rules in result
+            }
+
+        # Словарь заменяется целиком, читатели никогда не видят его частично
+        self._masks = masks
+        self._loaded_at = time.monotonic()
+
+    def set_group(self, group_id: int, rules: list[int]) -> None:
+        self._masks = {**self._masks, group_id: compile_rules(rules)}
+
+    def drop_group(self, group_id: int) -> None:
+        self._masks = {key: mask for key, mask in self._masks.items() if key != group_id}
+
+    async def _reload_on_miss(self) -> None:
+        # Неизвестная группа: возможно, ее только что создали в другом
+        # процессе. Перечитываем не чаще раза в MISS_RELOAD_INTERVAL
+        async with self._lock:
+            if self._loaded_at is None or time.monotonic() - self._loaded_at >= MISS_RELOAD_INTERVAL:
+                await self.load()
+
+    async def _mask(self, group_id: int) -> int:
+        mask = self._masks.get(group_id)
+        if mask is None:
+            await self._reload_on_miss()
+            mask = self._masks.get(group_id, 0)
+        return mask
+
+    async def allows(self, group_id: int, rule: int) -> bool:
+        return bool(await self._mask(group_id) >> rule & 1)
+
+    async def version(self, group_id: int) -> int:
+        """
+        Версия прав группы (claim pv access-токена) - отпечаток маски.
+        Одинаков во всех процессах и меняется вместе с правилами группы.
+        """
+        return zlib.crc32(str(await self._mask(group_id)).encode())
+
+    async def is_current_version(self, group_id: int, version: int) -> bool:
+        """
+        Выдан ли токен при текущих правах группы. При расхождении кэш
+        перечитывается (не чаще раза в MISS_RELOAD_INTERVAL): токен мог
+        выдать процесс, который узнал об изменении раньше этого.
+        """
+        if await self.version(group_id) == version:
+            return True
+        await self._reload_on_miss()
+        return await self.version(group_id) == version
+
+    async def _refresh_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load()
+            except Exception as e:
+                # Остаемся на прошлых масках до следующей попытки
+                _logger.error(f'Не удалось обновить права групп: {e}')
+
+    async def start(self) -> None:
+        await self.load()
+        self._refresher = asyncio.create_task(self._refresh_loop(settings.PERMISSIONS_REFRESH_SECONDS))
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+
+permission_cache = PermissionCache()
+
+
+def require_rule(rule: int) -> Callable:
+    """
+    Зависимость FastAPI: текущий пользователь, если у его группы есть правило rule.
+
+    Пример:
+    --------
+    current_user: Annotated[CurrentUser, Depends(require_rule(Rule.MANAGE_GROUPS))]
+    """
+    # src.auth сам использует permission_cache, поэтому импортируется здесь
+    from src.auth import get_current_user
+
+    async def dependency(
+        current_user: Annotated[CurrentUser, Depends(get_current_user)]
+    ) -> CurrentUser:
+        if not await permission_cache.allows(current_user.group_id, rule):
+            raise PermissionDeniedException
+        return current_user
+
+    return dependency
@@ -0,0 +1,150 @@
+"""
+Профилирование запросов в работающем воркере (pyinstrument).
+
+Профиль снимается с отдельного запроса в двух случаях:
+- запрос пришел с заголовком X-Profile и токеном пользователя с правом
+  ADMIN;
+- администратор открыл окно профилирования (POST /profiler/window) -
+  тогда профилируется заданная доля запросов до конца окна. Окно
+  открывается в воркере, который обработал запрос; при нескольких
+  воркерах для точечной диагностики удобнее заголовок.
+
+pyinstrument работает в async-режиме: в профиль попадает только
+контекст профилируемого запроса (обработчик маршрута, вызовы DAO,
+работа AttachmentManager и S3), включая время ожидания в await, а
+параллельные запросы не примешиваются. Результат сохраняется в формате
+speedscope (https://www.speedscope.app) в PROFILER_OUTPUT_DIR или в S3
+(PROFILER_STORAGE='s3'), имя профиля возвращается в заголовке
+X-Profile-Id.
+
+При PROFILER_ENABLED=False middleware не подключается вовсе. pyinstrument -
+необязательная зависимость, он импортируется только при первом профиле.
+"""
+import asyncio
+import io
+import random
+import time
+
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.auth import get_current_user
+from src.manager import S3Data
+from src.permissions import Rule, permission_cache
+from src.s3 import _S3Connector
+from src.logger import _logger
+from config import settings
+
+PROFILE_HEADER = b'x-profile'
+
+
+class ProfileStorage:
+    LOCAL: str = 'local'
+    S3: str = 's3'
+
+
+class ProfilerWindow:
+
+    def __init__(self) -> None:
+        self.until: float = 0.0
+        self.sample_rate: float = 0.0
+
+    @property
+    def active(self) -> bool:
+        return self.until > time.monotonic()
+
+    def open(self, seconds: int, sample_rate: float) -> None:
+        self.until = time.monotonic() + seconds
+        self.sample_rate = sample_rate
+
+    def close(self) -> None:
+        self.until = 0.0
+
+    def remaining(self) -> int:
+        return max(0, int(self.until - time.monotonic()))
+
+
+profiler_window = ProfilerWindow()
+
+
+def _render(profiler) -> bytes:
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    return profiler.output(SpeedscopeRenderer()).encode()
+
+
+async def save_profile(profile_id: str, profiler) -> str:
+    """
+    Сохраняет профиль и возвращает путь к файлу или ключ в S3.
+    """
+    data = await asyncio.to_thread(_render, profiler)
+    file_name = f'{profile_id}.speedscope.json'
+
+    if settings.PROFILER_STORAGE == ProfileStorage.S3:
+        key = f'profiles/{file_name}'
+        async with _S3Connector(S3Data) as s3:
+            await s3.upload_fileobj(fileobj=io.BytesIO(data), key=key)
+        return key
+
+    path = Path(settings.PROFILER_OUTPUT_DIR) / file_name
+    await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+    await asyncio.to_thread(path.write_bytes, data)
+    return str(path)
+
+
+async def _is_admin(scope: Scope) -> bool:
+    authorization = next((value for name, value in scope['headers'] if name == b'authorization'), b'')
+    scheme, _, token = authorization.decode('latin-1').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return False
+
+    try:
+        user = await get_current_user(token)
+    except Exception:
+        return False
+    return await permission_cache.allows(user.group_id, Rule.ADMIN)
+
+
+class ProfilerMiddleware:
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def _should_profile(self, scope: Scope) -> bool:
+        if any(name == PROFILE_HEADER for name, _ in scope['headers']):
+            return await _is_admin(scope)
+        return profiler_window.active and random.random() < profiler_window.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not await self._should_profile(scope):
+            return await self.app(scope, receive, send)
+
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            _logger.error('Профилирование запрошено, но pyinstrument не установлен')
+            return await self.app(scope, receive, send)
+
+        profile_id = f'{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid4().hex[:8]}'
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                message['headers'] = [*message.get('headers', []), (b'x-profile-id', profile_id.encode())]
+            await send(message)
+
+        profiler = Profiler(interval=settings.PROFILER_INTERVAL, async_mode='enabled')
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            try:
+                location = await save_profile(profile_id, profiler)
+                _logger.info('Сохранен профиль запроса', extra={
+                    'ProfileId': profile_id, 'Path': scope['path'], 'Location': location
+                })
+            except Exception as e:
+                _logger.error(f'Не удалось сохранить профиль запроса: {e}', extra={'ProfileId': profile_id})
@@ -0,0 +1,207 @@
+"""
+Ограничение частоты запросов (token bucket) для авторизации и
+эндпоинтов, которые дергают сканеры (поиск, подбор по штрихкоду).
+
+Каждому маршруту из ROUTE_LIMITS соответствует набор корзин: по IP и,
+для авторизации, по логину. Корзина вмещает burst жетонов и
+пополняется со скоростью rate жетонов в секунду; запрос забирает
+жетон. Если в любой корзине жетонов нет, middleware сразу отвечает 429
+с Retry-After - до роутера, зависимостей и обращений к БД.
+
+Состояние хранится в бэкенде:
+- MemoryBackend - OrderedDict в памяти процесса, не больше
+  RATE_LIMIT_MAX_KEYS корзин, давно не использованные вытесняются.
+  Вытесненная корзина равна полной, так что вытеснение только
+  немного смягчает лимит. Лимиты у каждого воркера свои.
+- RedisBackend (RATE_LIMIT_REDIS_URL) - общие для всех воркеров
+  корзины, пополнение и списание выполняются атомарно Lua-скриптом.
+  Нужен пакет redis; при недоступности Redis запросы пропускаются.
+"""
+import math
+import time
+
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi import status
+from starlette.datastructures import QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.logger import _logger
+from src.responses import JSONResponse
+from config import settings
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float  # Жетонов в секунду
+    burst: int   # Емкость корзины
+
+
+class LimitKey:
+    IP: str = 'ip'
+    LOGIN: str = 'login'
+
+
+@dataclass(frozen=True)
+class RouteLimit:
+    method: str
+    # Путь, оканчивающийся на '/', задает префикс
+    path: str
+    limits: tuple[tuple[str, RateLimit], ...]
+
+    def matches(self, method: str, path: str) -> bool:
+        if method != self.method:
+            return False
+        return path == self.path or (self.path.endswith('/') and path.startswith(self.path))
+
+
+ROUTE_LIMITS = (
+    RouteLimit('GET', '/account/authorization', (
+        (LimitKey.IP, RateLimit(rate=10 / 60, burst=10)),
+        # По логину строже: перебор паролей одной учетной записи с разных IP
+        (LimitKey.LOGIN, RateLimit(rate=5 / 300, burst=5)),
+    )),
+    RouteLimit('POST', '/account/refresh', (
+        (LimitKey.IP, RateLimit(rate=1, burst=20)),
+    )),
+    RouteLimit('POST', '/account/registration', (
+        (LimitKey.IP, RateLimit(rate=5 / 3600, burst=5)),
+    )),
+    RouteLimit('GET', '/search/', (
+        (LimitKey.IP, RateLimit(rate=20, burst=40)),
+    )),
+    RouteLimit('GET', '/item/fefo', (
+        (LimitKey.IP, RateLimit(rate=10, burst=20)),
+    )),
+)
+
+
+class MemoryBackend:
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        # Ключ -> (жетоны, время последнего обновления)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        """
+        Забирает жетон из корзины.
+        :return: 0, если жетон есть, иначе через сколько секунд он появится.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / limit.rate
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+# KEYS[1] - корзина; ARGV - rate, burst. Время берется у Redis, чтобы
+# часы воркеров не влияли на пополнение
+TAKE_SCRIPT = '''
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+'''
+
+
+class RedisBackend:
+
+    def __init__(self, url: str) -> None:
+        # Необязательная зависимость: нужна только при общем бэкенде
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(url)
+        self._take = self._redis.register_script(TAKE_SCRIPT)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        try:
+            wait = await self._take(keys=[f'ratelimit:{key}'], args=[limit.rate, limit.burst])
+        except Exception as e:
+            # Лимитер не должен ронять API вместе с Redis
+            _logger.error(f'Не удалось проверить лимит запросов: {e}')
+            return 0.0
+        return float(wait)
+
+
+def create_backend() -> MemoryBackend | RedisBackend:
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisBackend(settings.RATE_LIMIT_REDIS_URL)
+    return MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def client_ip(scope: Scope) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        for name, value in scope['headers']:
+            if name == b'x-forwarded-for':
+                return value.decode('latin-1').split(',')[0].strip()
+    client = scope.get('client')
+    return client[0] if client else 'unknown'
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware. Читает только путь, заголовки и query-параметры,
+    тело запроса не трогает.
+    """
+
+    def __init__(self, app: ASGIApp, backend: MemoryBackend | RedisBackend | None = None) -> None:
+        self.app = app
+        self.backend = backend or create_backend()
+
+    def _keys(self, scope: Scope, route: RouteLimit) -> list[tuple[str, RateLimit]]:
+        keys = []
+        for kind, limit in route.limits:
+            if kind == LimitKey.IP:
+                value = client_ip(scope)
+            else:
+                value = QueryParams(scope['query_string']).get('login', '').strip().lower()
+                if not value:
+                    continue
+            keys.append((f'{route.path}:{kind}:{value}', limit))
+        return keys
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not settings.RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        route = next((route for route in ROUTE_LIMITS if route.matches(scope['method'], scope['path'])), None)
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        for key, limit in self._keys(scope, route):
+            wait = await self.backend.take(key, limit)
+            if wait > 0:
+                _logger.warning('Превышен лимит запросов', extra={'Key': key})
+                response = JSONResponse(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    content={'message': 'Слишком много запросов, попробуйте позже'},
+                    headers={'Retry-After': str(math.ceil(wait))}
+                )
+                return await response(scope, receive, send)
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,171 @@
+"""
+Отчеты и документы, которые строятся фоновой задачей generate_report.
+
+Конкретный отчет выбирается по payload['report']; построители
+регистрируются декоратором report_builder.
+"""
+import asyncio
+import time
+
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import select
+
+from src.db import Depot, DepotItems, async_session_maker
+from src.documents import render_act, render_pool
+from src.stock_summary import reconcile
+from src.manager import AttachmentManager, AttachmentType, TaskManager
+from src.logger import _logger
+from config import settings
+
+ReportBuilder = Callable[[dict, int], Awaitable[dict]]
+
+REPORT_BUILDERS: dict[str, ReportBuilder] = {}
+
+MONTHS = [
+    'января', 'февраля', 'марта', 'апреля', 'мая', 'июня',
+    'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря'
+]
+
+
+def report_builder(name: str) -> Callable[[ReportBuilder], ReportBuilder]:
+    def decorator(func: ReportBuilder) -> ReportBuilder:
+        REPORT_BUILDERS[name] = func
+        return func
+    return decorator
+
+
+@TaskManager.handler('generate_report', concurrency=2)
+async def generate_report(payload: dict, task_id: int) -> dict:
+    report = payload.get('report')
+    if report not in REPORT_BUILDERS:
+        raise ValueError(f'Неизвестный отчет: {report}')
+    return await REPORT_BUILDERS[report](payload, task_id)
+
+
+async def load_write_off_acts(acts: list[dict]) -> list[dict]:
+    """
+    Собирает данные актов о списании одним запросом по всем предметам
+    всех актов и одним запросом по складам.
+    :return: Данные актов в формате src.documents.render_act.
+    """
+    item_ids = {item_id for act in acts for item_id in act['item_ids']}
+    depot_ids = {act['depot_id'] for act in acts}
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(
+                DepotItems.id, DepotItems.depot_id, DepotItems.name,
+                DepotItems.barcode, DepotItems.quantity
+            ).where(DepotItems.id.in_(item_ids))
+        )
+        items = {row.id: row for row in result}
+
+        result = await session.execute(
+            select(Depot.id, Depot.name).where(Depot.id.in_(depot_ids))
+        )
+        depots = {row.id: row.name for row in result}
+
+    today = datetime.utcnow()
+    acts_data = []
+    for act in acts:
+        if act['depot_id'] not in depots:
+            raise ValueError(f'Склад {act["depot_id"]} не найден')
+
+        products = []
+        for item_id in act['item_ids']:
+            item = items.get(item_id)
+            if item is None or item.depot_id != act['depot_id']:
+                raise ValueError(f'Предмет {item_id} не найден на складе {act["depot_id"]}')
+            products.append([len(products) + 1, item.barcode or item.id, item.name, item.quantity])
+
+        acts_data.append({
+            'header': {
+                'company': f'Автоматическая система «{settings.AppName}»',
+                'act': (
+                    f'АКТ о списании товаров № {act["number"]} '
+                    f'от {today.day} {MONTHS[today.month - 1]} {today.year} г.'
+                ),
+            },
+            'barcode_data': f'{act["depot_id"]}-{act["number"]}',
+            'org_data': [
+                ['Организация', act.get('organization') or ''],
+                ['Подразделение', act.get('department') or ''],
+                ['Склад', f'Склад «{depots[act["depot_id"]]}»'],
+            ],
+            'product_data': products,
+            'signatures': act.get('signatures') or [],
+        })
+
+    return acts_data
+
+
+@report_builder('write_off_acts')
+async def build_write_off_acts(payload: dict, task_id: int) -> dict:
+    """
+    Пакетная генерация актов о списании: рендеринг параллельно в пуле
+    процессов, каждый готовый акт сразу загружается в S3 как вложение.
+    """
+    started = time.perf_counter()
+    acts = payload['acts']
+    acts_data = await load_write_off_acts(acts)
+
+    loop = asyncio.get_running_loop()
+    pool = render_pool(settings.DOCUMENT_WORKERS)
+    upload_limit = asyncio.Semaphore(settings.DOCUMENT_UPLOAD_CONCURRENCY)
+    attachments = AttachmentManager()
+
+    async def render_and_upload(act: dict, data: dict) -> dict:
+        content = await loop.run_in_executor(pool, render_act, data)
+        async with upload_limit:
+            file = await AttachmentManager.upload(
+                file_name=f'act_{act["number"]}.docx',
+                file_content=content,
+                attachment_type=AttachmentType.DOCUMENT
+            )
+        return {
+            'number': act['number'],
+            'depot_id': act['depot_id'],
+            'file': str(file),
+            'url': attachments.file_url(str(file)),
+        }
+
+    files = await asyncio.gather(*(
+        render_and_upload(act, data) for act, data in zip(acts, acts_data)
+    ))
+
+    elapsed = time.perf_counter() - started
+    _logger.info(
+        f'Сгенерировано актов: {len(files)} за {elapsed:.1f} c',
+        extra={'TaskId': task_id}
+    )
+    return {
+        'acts': files,
+        'seconds': round(elapsed, 3),
+        'acts_per_second': round(len(files) / elapsed, 2) if elapsed else None,
+    }
+
+
+@report_builder('reconcile_stock_summary')
+async def reconcile_stock_summary(payload: dict, task_id: int) -> dict:
+    """
+    Сверка сводок остатков с depot_items. Результат - сколько строк
+    сводок пришлось исправить; в норме 0.
+    """
+    async with async_session_maker() as session:
+        result = await reconcile(session)
+        await session.commit()
+
+    if result['stock_rows_fixed'] or result['expiry_rows_fixed']:
+        _logger.warning('Сводки остатков расходились с depot_items', extra={'TaskId': task_id, **result})
+    return result
+
+
+if settings.STOCK_SUMMARY_RECONCILE_HOURS:
+    TaskManager.periodic(
+        'stock_summary_reconcile',
+        'generate_report',
+        interval=timedelta(hours=settings.STOCK_SUMMARY_RECONCILE_HOURS),
+        payload={'report': 'reconcile_stock_summary'}
+    )
@@ -0,0 +1,187 @@
+"""
+Резервы остатков под заказы на время подбора.
+
+Резерв удерживает количество предмета до подтверждения (commit -
+количество списывается), отмены (release) или истечения срока. Сумма
+активных резервов предмета хранится в depot_items.reserved_quantity.
+
+Резервирование - один условный UPDATE:
+    reserved_quantity = reserved_quantity + :q
+    WHERE id = :id AND quantity - reserved_quantity >= :q
+Проверка и прибавка выполняются атомарно под блокировкой строки в БД,
+поэтому параллельные резервы (в том числе из разных воркеров) не
+продают больше, чем есть. Подтверждение, отмена и истечение сначала
+переводят резерв из active в новый статус тем же приемом (UPDATE ...
+WHERE status = 'active') - резерв закрывается ровно один раз.
+
+Свободный остаток (available-to-promise = quantity - reserved_quantity)
+отдается из индекса в памяти (AvailabilityIndex): склад загружается
+целиком и перечитывается раз в AVAILABILITY_INDEX_TTL, изменения через
+ItemDAO и резервы этого процесса применяются сразу. Индекс только
+показывает остаток - резерв всегда проверяется в БД.
+
+ReservationSweeper раз в RESERVATION_SWEEP_SECONDS закрывает истекшие
+резервы и возвращает их количество в свободный остаток.
+"""
+import asyncio
+import time
+
+from collections.abc import Mapping
+
+from sqlalchemy import select
+
+from src.db import DepotItems, async_session_maker
+from src.expiration import product_key
+from src.logger import _logger
+from config import settings
+
+
+class ReservationStatus:
+    ACTIVE: str = 'active'
+    COMMITTED: str = 'committed'
+    RELEASED: str = 'released'
+    EXPIRED: str = 'expired'
+
+
+class AvailabilityIndex:
+
+    def __init__(self, ttl: float) -> None:
+        self._ttl = ttl
+        # ID склада -> товар -> ID предмета -> [секция, количество, резерв]
+        self._depots: dict[int, dict[str, dict[int, list]]] = {}
+        # ID предмета -> (склад, товар)
+        self._items: dict[int, tuple[int, str]] = {}
+        self._loaded_at: dict[int, float] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+
+    def invalidate(self, depot_id: int) -> None:
+        for entries in self._depots.pop(depot_id, {}).values():
+            for item_id in entries:
+                self._items.pop(item_id, None)
+        self._loaded_at.pop(depot_id, None)
+
+    async def _load(self, depot_id: int) -> None:
+        query = select(
+            DepotItems.id, DepotItems.barcode, DepotItems.name, DepotItems.depot_section,
+            DepotItems.quantity, DepotItems.reserved_quantity
+        ).where(DepotItems.depot_id == depot_id)
+        async with async_session_maker() as session:
+            rows = (await session.execute(query)).all()
+
+        self.invalidate(depot_id)
+        products: dict[str, dict[int, list]] = {}
+        for row in rows:
+            key = product_key(row.barcode, row.name)
+            self._items[row.id] = (depot_id, key)
+            products.setdefault(key, {})[row.id] = [row.depot_section, row.quantity or 0, row.reserved_quantity]
+
+        self._depots[depot_id] = products
+        self._loaded_at[depot_id] = time.monotonic()
+
+    async def _ensure_loaded(self, depot_id: int) -> None:
+        loaded_at = self._loaded_at.get(depot_id)
+        if loaded_at is not None and time.monotonic() - loaded_at < self._ttl:
+            return
+
+        async with self._locks.setdefault(depot_id, asyncio.Lock()):
+            loaded_at = self._loaded_at.get(depot_id)
+            if loaded_at is None or time.monotonic() - loaded_at >= self._ttl:
+                await self._load(depot_id)
+
+    def _entry(self, item_id: int) -> list | None:
+        location = self._items.get(item_id)
+        if location is None:
+            return None
+        depot_id, key = location
+        return self._depots[depot_id][key][item_id]
+
+    def update(self, item_id: int, row: Mapping | None) -> None:
+        """
+        Применяет изменение предмета из ItemDAO. row=None - предмет удален.
+        Резерв предмета сохраняется: ItemDAO его не меняет.
+        """
+        entry = self._entry(item_id)
+        reserved = entry[2] if entry is not None else 0
+        location = self._items.pop(item_id, None)
+        if location is not None:
+            self._depots[location[0]][location[1]].pop(item_id, None)
+
+        if row is None or row['depot_id'] not in self._depots:
+            return
+
+        key = product_key(row.get('barcode'), row.get('name'))
+        self._items[item_id] = (row['depot_id'], key)
+        self._depots[row['depot_id']].setdefault(key, {})[item_id] = [
+            row.get('depot_section'), row.get('quantity') or 0, reserved
+        ]
+
+    def refresh(self, item_id: int, quantity: int, reserved: int) -> None:
+        """
+        Точные значения предмета, прочитанные в транзакции резерва.
+        """
+        if (entry := self._entry(item_id)) is not None:
+            entry[1], entry[2] = quantity or 0, reserved
+
+    def adjust_reserved(self, item_id: int, delta: int) -> None:
+        if (entry := self._entry(item_id)) is not None:
+            entry[2] += delta
+
+    async def available(self, depot_id: int, barcode: str, section_id: int | None = None) -> dict:
+        """
+        Свободный остаток товара на складе (или в секции) по предметам.
+        """
+        await self._ensure_loaded(depot_id)
+        items = [
+            {
+                'item_id': item_id,
+                'section_id': section,
+                'quantity': quantity,
+                'reserved': reserved,
+                'available': max(quantity - reserved, 0),
+            }
+            for item_id, (section, quantity, reserved) in self._depots[depot_id].get(product_key(barcode, None), {}).items()
+            if section_id is None or section == section_id
+        ]
+        return {'available': sum(item['available'] for item in items), 'items': items}
+
+
+availability_index = AvailabilityIndex(ttl=settings.AVAILABILITY_INDEX_TTL)
+
+
+class ReservationSweeper:
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+
+    async def _loop(self) -> None:
+        # api.reservation.dao сам использует индекс, поэтому импортируется здесь
+        from api.reservation.dao import ReservationDAO
+
+        while True:
+            await asyncio.sleep(settings.RESERVATION_SWEEP_SECONDS)
+            try:
+                expired = 0
+                while True:
+                    count = await ReservationDAO.expire_due(settings.RESERVATION_SWEEP_BATCH)
+                    expired += count
+                    if count < settings.RESERVATION_SWEEP_BATCH:
+                        break
+                if expired:
+                    _logger.info('Закрыты истекшие резервы', extra={'Expired': expired})
+            except Exception as e:
+                _logger.error(f'Не удалось закрыть истекшие резервы: {e}')
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+reservation_sweeper = ReservationSweeper()
@@ -0,0 +1,43 @@
+"""
+Общий класс JSON-ответа на orjson.
+
+orjson сам сериализует datetime, date, UUID и dataclass, а через
+_default - pydantic-модели и строки DAO (RowMapping, Row), поэтому
+в роутерах не нужно вручную копировать поля в словари и вызывать str().
+"""
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any
+
+import orjson
+
+from fastapi.responses import JSONResponse as _JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(obj: Any) -> Any:
+    """Типы, которые orjson не умеет сериализовать сам."""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Mapping):
+        # RowMapping из result.mappings()
+        return dict(obj)
+    if isinstance(obj, Row):
+        return obj._asdict()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Тип {type(obj).__name__} не сериализуется в JSON')
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class JSONResponse(_JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
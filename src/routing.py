@@ -0,0 +1,265 @@
+"""
+Планирование загрузки машин (company_cars) и маршрутов доставки по складам.
+
+1. Загрузка: отправки раскладываются по машинам в пределах
+   vehicle_payload методом first-fit decreasing (сначала самые тяжелые
+   отправки, сначала самые грузоподъемные машины).
+2. Маршрут: для каждой машины строится объезд ее складов - жадный
+   «ближайший сосед» с последующим улучшением 2-opt.
+
+Матрица расстояний (гаверсинус) и оценка перестановок 2-opt считаются
+векторно в NumPy, поэтому план на сотни точек строится за доли секунды.
+Вычисления синхронные и выполняются в потоке (asyncio.to_thread).
+"""
+import asyncio
+import time
+
+import numpy as np
+
+from sqlalchemy import func, select
+
+from api.models import DispatchPlanRequest
+from src.db import Depot, DepotCompanyCars, DepotItems, async_session_maker
+from config import settings
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def parse_coordinates(value: str | None) -> tuple[float, float] | None:
+    """
+    Координаты склада хранятся строкой «широта, долгота».
+    """
+    if not value:
+        return None
+    try:
+        lat, lon = (float(part) for part in value.replace(';', ',').split(','))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
+
+def distance_matrix(coordinates: np.ndarray) -> np.ndarray:
+    """
+    Попарные расстояния по дуге большого круга в километрах.
+    :param coordinates: Массив (n, 2) из широт и долгот в градусах.
+    """
+    radians = np.radians(coordinates)
+    lat, lon = radians[:, 0:1], radians[:, 1:2]
+    a = (
+        np.sin((lat - lat.T) / 2) ** 2
+        + np.cos(lat) * np.cos(lat.T) * np.sin((lon - lon.T) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def pack_loads(weights: np.ndarray, capacities: np.ndarray) -> np.ndarray:
+    """
+    First-fit decreasing: каждая отправка (от самой тяжелой) попадает в
+    первую машину (от самой грузоподъемной), где еще хватает места.
+    :return: Индекс машины для каждой отправки, -1 - не поместилась.
+    """
+    assignment = np.full(len(weights), -1, dtype=np.int64)
+    car_order = np.argsort(-capacities, kind='stable')
+    remaining = capacities[car_order].astype(np.float64)
+
+    for shipment in np.argsort(-weights, kind='stable'):
+        fits = remaining >= weights[shipment]
+        if not fits.any():
+            continue
+        slot = int(np.argmax(fits))
+        remaining[slot] -= weights[shipment]
+        assignment[shipment] = car_order[slot]
+
+    return assignment
+
+
+def _nearest_neighbour(matrix: np.ndarray, stops: int) -> list[int]:
+    """
+    Жадный маршрут от точки 0 по точкам 1..stops.
+    """
+    visited = np.zeros(len(matrix), dtype=bool)
+    visited[0] = True
+    visited[stops + 1:] = True
+    route, current = [0], 0
+    for _ in range(stops):
+        current = int(np.argmin(np.where(visited, np.inf, matrix[current])))
+        visited[current] = True
+        route.append(current)
+    return route
+
+
+def _two_opt(route: np.ndarray, matrix: np.ndarray, max_passes: int) -> np.ndarray:
+    """
+    Улучшение 2-opt: разворот участка route[i:j+1], если он сокращает путь.
+    Первая и последняя точки маршрута не двигаются. Для каждого i все
+    варианты j оцениваются одним векторным выражением.
+    """
+    n = len(route)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 2):
+            js = np.arange(i + 1, n - 1)
+            a, b = route[i - 1], route[i]
+            c, d = route[js], route[js + 1]
+            delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = js[best]
+                route[i:j + 1] = route[i:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return route
+
+
+def plan_route(matrix: np.ndarray, return_to_origin: bool = True) -> tuple[list[int], float]:
+    """
+    Маршрут от точки 0 через все остальные точки матрицы.
+    :return: (порядок точек без начальной, длина маршрута в км)
+    """
+    stops = len(matrix) - 1
+    if stops <= 0:
+        return [], 0.0
+
+    if return_to_origin:
+        work = matrix
+        end = 0
+    else:
+        # Фиктивная конечная точка на нулевом расстоянии от всех:
+        # открытый маршрут сводится к замкнутому с фиксированным концом
+        work = np.zeros((stops + 2, stops + 2))
+        work[:stops + 1, :stops + 1] = matrix
+        end = stops + 1
+
+    route = np.array(_nearest_neighbour(work, stops) + [end])
+    route = _two_opt(route, work, settings.ROUTING_MAX_PASSES)
+    distance = float(work[route[:-1], route[1:]].sum())
+    return [int(point) for point in route[1:-1]], distance
+
+
+def build_plan(
+    origin: tuple[float, float],
+    shipments: list[dict],
+    cars: list[dict],
+    return_to_origin: bool = True
+) -> dict:
+    """
+    Синхронная часть планирования, без обращений к БД.
+    :param shipments: [{'depot_id', 'coordinates', 'weight'}]
+    :param cars: [{'id', 'name', 'vehicle_payload'}]
+    """
+    started = time.perf_counter()
+
+    weights = np.array([shipment['weight'] for shipment in shipments], dtype=np.float64)
+    capacities = np.array([car['vehicle_payload'] for car in cars], dtype=np.float64)
+    assignment = pack_loads(weights, capacities) if cars else np.full(len(shipments), -1)
+
+    # Точка 0 - склад отправления, дальше уникальные склады-получатели
+    depot_ids = list(dict.fromkeys(shipment['depot_id'] for shipment in shipments))
+    point_of = {depot_id: index + 1 for index, depot_id in enumerate(depot_ids)}
+    coordinates = {shipment['depot_id']: shipment['coordinates'] for shipment in shipments}
+    matrix = distance_matrix(np.array([origin] + [coordinates[depot_id] for depot_id in depot_ids]))
+
+    plans, total_distance = [], 0.0
+    for car_index, car in enumerate(cars):
+        loaded = np.flatnonzero(assignment == car_index)
+        if not len(loaded):
+            continue
+
+        # Отправки одной машины на один склад - одна остановка
+        stops: dict[int, list[int]] = {}
+        for shipment in loaded:
+            stops.setdefault(point_of[shipments[shipment]['depot_id']], []).append(int(shipment))
+
+        points = [0] + list(stops)
+        order, distance = plan_route(matrix[np.ix_(points, points)], return_to_origin)
+        total_distance += distance
+
+        plans.append({
+            'car_id': car['id'],
+            'name': car['name'],
+            'payload': car['vehicle_payload'],
+            'load': round(float(weights[loaded].sum()), 3),
+            'distance_km': round(distance, 3),
+            'stops': [
+                {
+                    'depot_id': depot_ids[points[point] - 1],
+                    'shipments': stops[points[point]],
+                    'weight': round(float(weights[stops[points[point]]].sum()), 3),
+                }
+                for point in order
+            ],
+        })
+
+    return {
+        'cars': plans,
+        'unassigned': [
+            {'shipment': int(index), 'depot_id': shipments[index]['depot_id'], 'reason': 'Не помещается ни в одну машину'}
+            for index in np.flatnonzero(assignment == -1)
+        ],
+        'total_distance_km': round(total_distance, 3),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+async def plan_dispatch(request: DispatchPlanRequest) -> dict:
+    """
+    Загружает склады, машины и веса предметов (по одному запросу на
+    каждое) и строит план в отдельном потоке.
+    """
+    depot_ids = {request.origin_depot_id} | {shipment.depot_id for shipment in request.shipments}
+    item_ids = {
+        item_id
+        for shipment in request.shipments if shipment.weight is None
+        for item_id in shipment.item_ids
+    }
+
+    async with async_session_maker() as session:
+        result = await session.execute(
+            select(Depot.id, Depot.coordinates).where(Depot.id.in_(depot_ids))
+        )
+        depots = {row.id: parse_coordinates(row.coordinates) for row in result}
+
+        query = select(DepotCompanyCars.id, DepotCompanyCars.name, DepotCompanyCars.vehicle_payload)
+        if request.car_ids is not None:
+            query = query.where(DepotCompanyCars.id.in_(request.car_ids))
+        cars = [dict(row) for row in (await session.execute(query.order_by(DepotCompanyCars.id))).mappings()]
+
+        item_weights = {}
+        if item_ids:
+            result = await session.execute(
+                select(
+                    DepotItems.id,
+                    func.coalesce(DepotItems.weight, 0) * func.coalesce(DepotItems.quantity, 0)
+                ).where(DepotItems.id.in_(item_ids))
+            )
+            item_weights = {item_id: float(weight) for item_id, weight in result}
+
+    origin = depots.get(request.origin_depot_id)
+    if origin is None:
+        raise ValueError('У склада отправления не указаны координаты')
+
+    shipments, skipped = [], []
+    for index, shipment in enumerate(request.shipments):
+        coordinates = depots.get(shipment.depot_id)
+        if coordinates is None:
+            skipped.append({'shipment': index, 'depot_id': shipment.depot_id, 'reason': 'Нет координат склада'})
+            continue
+        weight = shipment.weight
+        if weight is None:
+            weight = sum(item_weights.get(item_id, 0.0) for item_id in shipment.item_ids)
+        shipments.append({'index': index, 'depot_id': shipment.depot_id, 'coordinates': coordinates, 'weight': weight})
+
+    plan = await asyncio.to_thread(build_plan, origin, shipments, cars, request.return_to_origin)
+
+    # Индексы отправок в плане - позиции в запросе
+    for car in plan['cars']:
+        for stop in car['stops']:
+            stop['shipments'] = [shipments[index]['index'] for index in stop['shipments']]
+    for entry in plan['unassigned']:
+        entry['shipment'] = shipments[entry['shipment']]['index']
+    plan['unassigned'].extend(skipped)
+
+    return plan
@@ -1,6 +1,6 @@
 import asyncio
-import aioboto3
-from botocore.config import Config
+
+from src.metrics import instrument_s3_client
 
 
 class _S3Config:
@@ -26,7 +26,12 @@ class _S3Connector:
         self.region_name = s3_config.region_name
         self.aws_access_key_id = s3_config.aws_access_key_id
         self.aws_secret_access_key = s3_config.aws_secret_access_key
-        
+
+        # aioboto3 и botocore импортируются при первом подключении к S3:
+        # вместе они заметно замедляют старт воркеров
+        import aioboto3
+        from botocore.config import Config
+
         self.session = aioboto3.Session()
         self.client_args = {
             'service_name': 's3',
@@ -40,6 +45,7 @@ class _S3Connector:
 
     async def __aenter__(self):
         self.client = await self.session.client(**self.client_args).__aenter__()
+        instrument_s3_client(self.client)
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -70,6 +76,59 @@ class _S3Connector:
         # Возвращаем URL, учитывая кастомный endpoint
         return f"{self.client.meta.endpoint_url}/{self.bucket_name}/{key}"
 
+    async def download_fileobj(self, key, fileobj):
+        """Скачивает объект из S3 в файловый объект потоком, не держа его в памяти"""
+        if not self.client:
+            raise AttributeError("S3 client is not initialized.")
+        await self.client.download_fileobj(self.bucket_name, key, fileobj)
+
+    async def multipart_upload(self, path, key, part_size: int = 8 * 1024 * 1024):
+        """
+        Загружает файл с диска в S3 по частям (multipart upload).
+        В памяти одновременно находится только одна часть размером part_size
+        (минимум 5 МБ по требованиям S3, кроме последней части).
+        """
+        if not self.client:
+            raise AttributeError("S3 client is not initialized.")
+
+        upload = await self.client.create_multipart_upload(Bucket=self.bucket_name, Key=key)
+        upload_id = upload['UploadId']
+        parts = []
+        try:
+            with open(path, 'rb') as file:
+                while chunk := await asyncio.to_thread(file.read, part_size):
+                    part = await self.client.upload_part(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        UploadId=upload_id,
+                        PartNumber=len(parts) + 1,
+                        Body=chunk
+                    )
+                    parts.append({'ETag': part['ETag'], 'PartNumber': len(parts) + 1})
+
+            await self.client.complete_multipart_upload(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': parts}
+            )
+        except BaseException:
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=key, UploadId=upload_id
+            )
+            raise
+
+    async def presigned_url(self, key, expires_in: int = 3600, filename: str | None = None):
+        """Временная ссылка на скачивание объекта"""
+        if not self.client:
+            raise AttributeError("S3 client is not initialized.")
+        params = {'Bucket': self.bucket_name, 'Key': key}
+        if filename:
+            params['ResponseContentDisposition'] = f'attachment; filename="{filename}"'
+        return await self.client.generate_presigned_url(
+            'get_object', Params=params, ExpiresIn=expires_in
+        )
+
     async def list_objects(self):
         if not self.client:
             raise AttributeError("S3 client is not initialized.")
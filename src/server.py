@@ -0,0 +1,98 @@
+"""
+Запуск API (python app.py).
+
+Миграции применяются один раз в родительском процессе до старта
+воркеров, а не в каждом воркере. Затем uvicorn запускает
+SERVER_WORKERS процессов (по умолчанию - по числу CPU) на uvloop и
+httptools, если они установлены.
+
+По SIGTERM/SIGINT uvicorn перестает принимать соединения, ждет
+завершения запросов в работе (загрузки файлов и т.п.) не дольше
+SERVER_GRACEFUL_TIMEOUT секунд, после чего выполняет shutdown lifespan:
+фоновые задачи дорабатывают, архив авторизаций сбрасывается в БД.
+
+SERVER_RELOAD=True - режим разработки: один процесс с перезапуском
+при изменении кода.
+"""
+import asyncio
+import importlib.util
+import os
+import tempfile
+
+from pathlib import Path
+
+import uvicorn
+
+from src.db import engine
+from src.migrator import migrate
+from src.logger import _logger
+from config import settings
+
+
+def worker_count() -> int:
+    if settings.EDGE_MODE:
+        # Синхронизация узла склада (src/sync.py) живет в одном процессе
+        return 1
+    if settings.SERVER_WORKERS:
+        return settings.SERVER_WORKERS
+    return os.cpu_count() or 1
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+async def _migrate_once() -> None:
+    applied = await migrate()
+    if applied:
+        _logger.info('Применены миграции', extra={'Revisions': applied})
+    # Соединения родителя не должны оставаться в пуле: воркеры открывают свои
+    await engine.dispose()
+
+
+def _prepare_metrics_dir(workers: int) -> None:
+    """
+    Метрики нескольких воркеров складываются через файлы (src/metrics.py).
+    Без заданного METRICS_DIR используется временный каталог; файлы
+    прошлого запуска удаляются, чтобы не суммировать чужие счетчики.
+    """
+    if workers > 1 and not settings.METRICS_DIR:
+        # Воркеры читают настройки из окружения при импорте config
+        os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='depot-metrics-')
+        return
+
+    if settings.METRICS_DIR:
+        for path in Path(settings.METRICS_DIR).glob('metrics-*.json'):
+            path.unlink(missing_ok=True)
+
+
+def run() -> None:
+    asyncio.run(_migrate_once())
+
+    if settings.SERVER_RELOAD:
+        uvicorn.run(
+            app='app:api',
+            host=settings.SERVER_HOST,
+            port=settings.SERVER_PORT,
+            reload=True
+        )
+        return
+
+    workers = worker_count()
+    _prepare_metrics_dir(workers)
+
+    uvicorn.run(
+        app='app:api',
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        workers=workers,
+        loop='uvloop' if _installed('uvloop') else 'asyncio',
+        http='httptools' if _installed('httptools') else 'h11',
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        proxy_headers=settings.RATE_LIMIT_TRUST_FORWARDED,
+        # Запросы по маршрутам считаются в /metrics; построчный лог доступа
+        # на каждый запрос в проде только нагружает воркеры
+        access_log=False
+    )
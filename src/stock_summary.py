@@ -0,0 +1,227 @@
+"""
+Материализованные сводки остатков для отчетов.
+
+depot_stock_summary хранит количество позиций, сумму quantity и стоимость
+(quantity * price) в разрезе склад / секция / тип / поставщик,
+depot_expiry_summary - остатки по дню окончания срока годности.
+Отчеты читают только сводки, число их строк зависит от числа складов и
+справочников, а не от числа предметов.
+
+Сводки обновляются в той же транзакции, что и depot_items: изменение
+предмета превращается в дельту (StockDelta), которая прибавляется к
+строкам сводки через upsert. Дельты коммутативны, поэтому параллельные
+транзакции не мешают друг другу. Расхождения (прямые правки в БД,
+ошибки) исправляет периодическая сверка reconcile().
+"""
+import importlib
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db import DepotExpirySummary, DepotItems, DepotStockSummary
+
+SECONDS_PER_DAY = 86400
+
+# Колонки depot_items, от которых зависят сводки
+SUMMARY_COLUMNS = (
+    DepotItems.depot_id, DepotItems.depot_section, DepotItems.item_type,
+    DepotItems.supplier_id, DepotItems.quantity, DepotItems.price,
+    DepotItems.expiration_date,
+)
+
+# Допустимая погрешность стоимости при сверке (сумма float копит ошибку округления)
+VALUE_TOLERANCE = 0.01
+
+def expiration_day(expiration_date: int | None) -> int | None:
+    """
+    expiration_date хранится как unix-время в секундах.
+    """
+    if expiration_date is None:
+        return None
+    return expiration_date // SECONDS_PER_DAY
+
+
+class StockDelta:
+    """
+    Накопитель изменений сводок: ключ сводки -> прибавка к счетчикам.
+    """
+
+    def __init__(self) -> None:
+        # (depot_id, section_id, item_type_id, supplier_id) -> [items_count, quantity, stock_value]
+        self.stock: dict[tuple[int, int, int, int], list] = {}
+        # (depot_id, expiration_day) -> [items_count, quantity]
+        self.expiry: dict[tuple[int, int], list[int]] = {}
+
+    @classmethod
+    def of(cls, rows, sign: int = 1) -> 'StockDelta':
+        delta = cls()
+        for row in rows:
+            delta.add(row, sign)
+        return delta
+
+    def add(self, row, sign: int = 1) -> None:
+        """
+        Добавляет (sign=1) или вычитает (sign=-1) строку depot_items.
+        :param row: Словарь или mapping с колонками SUMMARY_COLUMNS.
+        """
+        quantity = row.get('quantity') or 0
+        price = row.get('price') or 0
+
+        key = (
+            row['depot_id'],
+            row.get('depot_section') or 0,
+            row.get('item_type') or 0,
+            row.get('supplier_id') or 0,
+        )
+        counters = self.stock.setdefault(key, [0, 0, 0.0])
+        counters[0] += sign
+        counters[1] += sign * quantity
+        counters[2] += sign * quantity * price
+
+        day = expiration_day(row.get('expiration_date'))
+        if day is not None:
+            counters = self.expiry.setdefault((row['depot_id'], day), [0, 0])
+            counters[0] += sign
+            counters[1] += sign * quantity
+
+    def stock_rows(self) -> list[dict]:
+        # Сортировка по ключу: параллельные транзакции блокируют строки
+        # сводки в одном порядке и не уходят в deadlock
+        return [
+            {
+                'depot_id': key[0], 'section_id': key[1], 'item_type_id': key[2],
+                'supplier_id': key[3], 'items_count': count, 'quantity': quantity,
+                'stock_value': value,
+            }
+            for key, (count, quantity, value) in sorted(self.stock.items())
+            if count or quantity or abs(value) >= VALUE_TOLERANCE
+        ]
+
+    def expiry_rows(self) -> list[dict]:
+        return [
+            {'depot_id': key[0], 'expiration_day': key[1], 'items_count': count, 'quantity': quantity}
+            for key, (count, quantity) in sorted(self.expiry.items())
+            if count or quantity
+        ]
+
+
+def _upsert(dialect_name: str, model, rows: list[dict], keys: tuple[str, ...], counters: tuple[str, ...]):
+    table = model.__table__
+    # Модуль диалекта импортируется по имени: грузится только используемый
+    dialect = importlib.import_module(f'sqlalchemy.dialects.{dialect_name}')
+
+    if dialect_name == 'mysql':
+        statement = dialect.insert(table).values(rows)
+        return statement.on_duplicate_key_update({
+            name: table.c[name] + statement.inserted[name] for name in counters
+        })
+
+    statement = dialect.insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: table.c[name] + statement.excluded[name] for name in counters}
+    )
+
+
+async def apply_stock_delta(session: AsyncSession, delta: StockDelta) -> None:
+    """
+    Прибавляет дельту к сводкам в текущей транзакции сессии.
+    Коммит остается за вызывающим кодом - вместе с изменением depot_items.
+    """
+    dialect_name = session.bind.dialect.name
+
+    if rows := delta.stock_rows():
+        await session.execute(_upsert(
+            dialect_name, DepotStockSummary, rows,
+            ('depot_id', 'section_id', 'item_type_id', 'supplier_id'),
+            ('items_count', 'quantity', 'stock_value')
+        ))
+
+    if rows := delta.expiry_rows():
+        await session.execute(_upsert(
+            dialect_name, DepotExpirySummary, rows,
+            ('depot_id', 'expiration_day'),
+            ('items_count', 'quantity')
+        ))
+
+
+async def _actual(session: AsyncSession) -> StockDelta:
+    """
+    Сводки, посчитанные заново по depot_items (GROUP BY на стороне БД).
+    """
+    actual = StockDelta()
+
+    query = select(
+        DepotItems.depot_id,
+        func.coalesce(DepotItems.depot_section, 0),
+        func.coalesce(DepotItems.item_type, 0),
+        func.coalesce(DepotItems.supplier_id, 0),
+        func.count(),
+        func.coalesce(func.sum(DepotItems.quantity), 0),
+        func.coalesce(func.sum(DepotItems.quantity * DepotItems.price), 0),
+    ).group_by(
+        DepotItems.depot_id,
+        func.coalesce(DepotItems.depot_section, 0),
+        func.coalesce(DepotItems.item_type, 0),
+        func.coalesce(DepotItems.supplier_id, 0),
+    )
+    for depot_id, section_id, item_type_id, supplier_id, count, quantity, value in await session.execute(query):
+        actual.stock[(depot_id, section_id, item_type_id, supplier_id)] = [count, int(quantity), float(value)]
+
+    day = DepotItems.expiration_date // SECONDS_PER_DAY
+    query = (
+        select(DepotItems.depot_id, day, func.count(), func.coalesce(func.sum(DepotItems.quantity), 0))
+        .where(DepotItems.expiration_date.is_not(None))
+        .group_by(DepotItems.depot_id, day)
+    )
+    for depot_id, expiration, count, quantity in await session.execute(query):
+        actual.expiry[(depot_id, int(expiration))] = [count, int(quantity)]
+
+    return actual
+
+
+async def reconcile(session: AsyncSession) -> dict:
+    """
+    Сверяет сводки с depot_items и исправляет расхождения.
+
+    Фактические и материализованные значения читаются в одной транзакции,
+    то есть из одного снимка; разница применяется как обычная дельта,
+    поэтому сверка не затирает изменения, закоммиченные параллельно.
+    :return: Количество исправленных строк сводок.
+    """
+    actual = await _actual(session)
+
+    stored = StockDelta()
+    for row in await session.execute(select(DepotStockSummary.__table__)):
+        stored.stock[(row.depot_id, row.section_id, row.item_type_id, row.supplier_id)] = [
+            row.items_count, row.quantity, row.stock_value
+        ]
+    for row in await session.execute(select(DepotExpirySummary.__table__)):
+        stored.expiry[(row.depot_id, row.expiration_day)] = [row.items_count, row.quantity]
+
+    drift = StockDelta()
+    for key in actual.stock.keys() | stored.stock.keys():
+        real = actual.stock.get(key, [0, 0, 0.0])
+        saved = stored.stock.get(key, [0, 0, 0.0])
+        drift.stock[key] = [real[0] - saved[0], real[1] - saved[1], real[2] - saved[2]]
+    for key in actual.expiry.keys() | stored.expiry.keys():
+        real = actual.expiry.get(key, [0, 0])
+        saved = stored.expiry.get(key, [0, 0])
+        drift.expiry[key] = [real[0] - saved[0], real[1] - saved[1]]
+
+    stock_fixed, expiry_fixed = len(drift.stock_rows()), len(drift.expiry_rows())
+    await apply_stock_delta(session, drift)
+
+    # Строки без остатков больше не нужны отчетам
+    await session.execute(
+        delete(DepotStockSummary).where(
+            DepotStockSummary.items_count == 0, DepotStockSummary.quantity == 0
+        )
+    )
+    await session.execute(
+        delete(DepotExpirySummary).where(
+            DepotExpirySummary.items_count == 0, DepotExpirySummary.quantity == 0
+        )
+    )
+
+    return {'stock_rows_fixed': stock_fixed, 'expiry_rows_fixed': expiry_fixed}
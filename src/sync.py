@@ -0,0 +1,158 @@
+"""
+Узел склада (EDGE_MODE): то же приложение на локальной SQLite с
+синхронизацией с центральной БД.
+
+Сканирование и движения по складу выполняются в локальной БД и не
+зависят от связи с центром. Каждое изменение предмета пишется в журнал
+sync_changes (src/changelog.py). Фоновая задача каждые
+EDGE_SYNC_INTERVAL_SECONDS:
+- отправляет журнал пачками по SYNC_BATCH_SIZE (POST /sync/push) и
+  удаляет отправленное; центр помнит последний примененный ID узла,
+  поэтому повтор после обрыва ничего не задваивает;
+- забирает изменения склада из журнала центра после своего курсора
+  (GET /sync/pull) и применяет их вместе со сдвигом курсора.
+
+Конфликты: количество передается дельтами, поэтому приход на узле и
+расход в центре за одно и то же время складываются без потерь.
+Остальные колонки - last writer wins по updated_at (часы узла и центра
+должны быть синхронизированы).
+
+Предметы создаются только в центре. При первом запуске, после массового
+изменения склада в центре (refresh) и раз в EDGE_SNAPSHOT_SECONDS узел
+загружает снимок (GET /sync/snapshot): предметы склада и справочники
+(пользователи, группы, склады), нужные для работы без центра.
+
+Без связи с центром ошибки только пишутся в лог, журнал копится и
+уходит при восстановлении связи. Синхронизация выполняется в одном
+процессе, поэтому узел запускается с одним воркером (src/server.py).
+"""
+import asyncio
+import time
+
+from api.sync.dao import SyncDAO
+from src.changelog import ChangeKind
+from src.events import stock_events
+from src.expiration import expiration_index
+from src.reservations import availability_index
+from src.responses import dumps
+from src.logger import _logger
+from config import settings
+
+
+class SyncRequestError(Exception):
+    pass
+
+
+class EdgeSync:
+
+    def __init__(self) -> None:
+        self._task: asyncio.Task | None = None
+        self._snapshot_at: float | None = None
+
+    async def _request(self, http, method: str, path: str, **kwargs) -> dict:
+        async with http.request(
+            method,
+            f'{settings.EDGE_CENTRAL_URL.rstrip("/")}{path}',
+            headers={'X-Sync-Token': settings.SYNC_TOKEN or '', 'Content-Type': 'application/json'},
+            **kwargs
+        ) as response:
+            if response.status != 200:
+                raise SyncRequestError(f'{method} {path}: HTTP {response.status}')
+            return (await response.json())['data']
+
+    async def push(self, http) -> int:
+        """
+        :return: Сколько изменений отправлено.
+        """
+        sent = 0
+        while changes := await SyncDAO.local_changes(settings.SYNC_BATCH_SIZE):
+            data = await self._request(http, 'POST', '/sync/push', data=dumps({
+                'origin': settings.EDGE_NODE_ID, 'changes': changes
+            }))
+            await SyncDAO.mark_pushed(data['applied'])
+            sent += len(changes)
+            if len(changes) < settings.SYNC_BATCH_SIZE:
+                break
+        return sent
+
+    async def snapshot(self, http) -> None:
+        data = await self._request(http, 'GET', '/sync/snapshot', params={
+            'depot_id': settings.EDGE_DEPOT_ID, 'origin': settings.EDGE_NODE_ID
+        })
+        await SyncDAO.apply_snapshot(settings.EDGE_DEPOT_ID, data)
+        self._snapshot_at = time.monotonic()
+
+        # Локальные кэши и подписчики перечитывают склад целиком
+        expiration_index.invalidate(settings.EDGE_DEPOT_ID)
+        availability_index.invalidate(settings.EDGE_DEPOT_ID)
+        stock_events.publish_depot(settings.EDGE_DEPOT_ID)
+        _logger.info('Загружен снимок склада', extra={
+            'DepotId': settings.EDGE_DEPOT_ID, 'Items': len(data['items']), 'Cursor': data['cursor']
+        })
+
+    async def pull(self, http) -> int:
+        """
+        :return: Сколько изменений применено.
+        """
+        applied = 0
+        while True:
+            cursor = await SyncDAO.pulled_cursor()
+            if cursor is None:
+                await self.snapshot(http)
+                return applied
+
+            data = await self._request(http, 'GET', '/sync/pull', params={
+                'depot_id': settings.EDGE_DEPOT_ID,
+                'after': cursor,
+                'limit': settings.SYNC_BATCH_SIZE,
+                'origin': settings.EDGE_NODE_ID,
+            })
+            if any(change['kind'] == ChangeKind.REFRESH for change in data['changes']):
+                await self.snapshot(http)
+                return applied
+
+            if data['cursor'] == cursor:
+                return applied
+            await SyncDAO.apply_pulled(settings.EDGE_DEPOT_ID, data['changes'], data['cursor'])
+            applied += len(data['changes'])
+
+    async def sync_once(self) -> None:
+        import aiohttp
+
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=60)) as http:
+            # Сначала отправка: снимок накладывает на себя только неотправленное
+            pushed = await self.push(http)
+            if self._snapshot_at is not None and time.monotonic() - self._snapshot_at >= settings.EDGE_SNAPSHOT_SECONDS:
+                await self.snapshot(http)
+            pulled = await self.pull(http)
+
+        if pushed or pulled:
+            _logger.info('Синхронизация с центром', extra={'Pushed': pushed, 'Pulled': pulled})
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.sync_once()
+            except Exception as e:
+                _logger.warning(f'Нет синхронизации с центром: {e}')
+            await asyncio.sleep(settings.EDGE_SYNC_INTERVAL_SECONDS)
+
+    async def start(self) -> None:
+        if settings.EDGE_CENTRAL_URL is None or settings.EDGE_DEPOT_ID is None:
+            _logger.error('EDGE_MODE без EDGE_CENTRAL_URL или EDGE_DEPOT_ID: синхронизация выключена')
+            return
+        # Отсчет до планового снимка; первый снимок загрузится без курсора
+        self._snapshot_at = time.monotonic()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+edge_sync = EdgeSync()
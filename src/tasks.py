@@ -0,0 +1,242 @@
+"""
+Фоновый воркер задач TaskManager.
+
+Задачи хранятся в таблице tasks, поэтому переживают перезапуск
+приложения. Воркер периодически забирает готовые к запуску задачи
+(с учетом приоритета и run_at) и выполняет их в asyncio с отдельным
+лимитом параллельности на каждый тип. Упавшая задача повторяется
+с экспоненциальной задержкой, пока не исчерпает max_attempts.
+
+Воркеров может быть несколько - как внутри процессов API, так и
+отдельными процессами/нодами:
+    python -m src.tasks
+
+Задача забирается через SELECT ... FOR UPDATE SKIP LOCKED и
+закрепляется за воркером на TASK_LEASE_SECONDS. Пока задача выполняется,
+воркер продлевает аренду (heartbeat). Если воркер упал, аренда истекает
+и любой другой воркер возвращает задачу в очередь.
+"""
+import asyncio
+import importlib
+import os
+import signal
+import socket
+import uuid
+
+from datetime import datetime, timedelta
+
+from api.task.dao import TaskDAO
+from src.db import Task
+from src.manager import TaskManager
+from src.logger import _logger
+from config import settings
+
+# Модули, в которых обработчики регистрируются через TaskManager.handler.
+# Импортируются при старте воркера.
+TASK_HANDLER_MODULES: list[str] = [
+    'src.importer',
+    'src.exporter',
+    'src.reports',
+    'src.expiration',
+    'src.inventory',
+]
+
+
+def load_handlers() -> None:
+    for module in TASK_HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def retry_delay(attempt: int) -> timedelta:
+    """Экспоненциальная задержка перед повтором: 5с, 10с, 20с ... до TASK_RETRY_MAX_DELAY."""
+    seconds = settings.TASK_RETRY_BASE_DELAY * 2 ** max(attempt - 1, 0)
+    return timedelta(seconds=min(seconds, settings.TASK_RETRY_MAX_DELAY))
+
+
+class TaskWorker:
+    def __init__(
+        self,
+        poll_interval: float = settings.TASK_POLL_INTERVAL,
+        lease: timedelta = timedelta(seconds=settings.TASK_LEASE_SECONDS),
+        heartbeat_interval: float = settings.TASK_HEARTBEAT_INTERVAL
+    ) -> None:
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.heartbeat_interval = heartbeat_interval
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._running: dict[str, set[asyncio.Task]] = {}
+        # ID задачи в БД -> asyncio-задача, которая ее выполняет
+        self._jobs: dict[int, asyncio.Task] = {}
+        self._loop_task: asyncio.Task | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._schedule_task: asyncio.Task | None = None
+        # Имя периодической задачи -> последний поставленный слот
+        self._scheduled_slots: dict[str, int] = {}
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        load_handlers()
+        self._stopping.clear()
+        self._loop_task = asyncio.create_task(self._loop())
+        self._heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        self._schedule_task = asyncio.create_task(self._schedule_loop())
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        Останавливает выборку новых задач и ждет завершения уже
+        запущенных не дольше timeout секунд.
+        """
+        self._stopping.set()
+        if self._loop_task is not None:
+            await self._loop_task
+        if self._schedule_task is not None:
+            self._schedule_task.cancel()
+
+        # Heartbeat продолжает работать, пока задачи дорабатывают
+        running = list(self._jobs.values())
+        if running:
+            _, pending = await asyncio.wait(running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.wait(pending)
+
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+
+    def _free_slots(self, task_type: str, concurrency: int) -> int:
+        return concurrency - len(self._running.get(task_type, ()))
+
+    async def _poll(self) -> int:
+        claimed_total = 0
+        for task_type, (handler, concurrency) in TaskManager.registered_handlers().items():
+            free = self._free_slots(task_type, concurrency)
+            if free <= 0:
+                continue
+
+            for task in await TaskDAO.claim_due(task_type, free, self.worker_id, self.lease):
+                running = self._running.setdefault(task_type, set())
+                job = asyncio.create_task(self._execute(handler, task))
+                running.add(job)
+                self._jobs[task.id] = job
+                job.add_done_callback(running.discard)
+                job.add_done_callback(lambda _, task_id=task.id: self._jobs.pop(task_id, None))
+                claimed_total += 1
+
+        return claimed_total
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                claimed = await self._poll()
+            except Exception as e:
+                _logger.error(f'Ошибка выборки фоновых задач: {e}')
+                claimed = 0
+
+            if claimed:
+                # Есть работа - сразу проверяем, не появилось ли еще
+                continue
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _heartbeat_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                task_ids = list(self._jobs)
+                owned = await TaskDAO.heartbeat(self.worker_id, task_ids, self.lease)
+
+                # Аренду не успели продлить и задачу уже забрал другой
+                # воркер - прекращаем ее выполнение здесь
+                for task_id in set(task_ids) - owned:
+                    if job := self._jobs.get(task_id):
+                        _logger.warning(f'Задача {task_id} потеряла аренду и будет остановлена')
+                        job.cancel()
+
+                reclaimed = await TaskDAO.reclaim_expired()
+                if reclaimed:
+                    _logger.warning(f'Возвращено в очередь задач с истекшей арендой: {reclaimed}')
+            except Exception as e:
+                _logger.error(f'Ошибка продления аренды задач: {e}')
+
+    async def _schedule_periodic(self) -> None:
+        epoch = datetime(1970, 1, 1)
+        now = datetime.utcnow()
+        manager = TaskManager()
+
+        for name, job in TaskManager.registered_periodic().items():
+            slot = int((now - epoch - job['offset']) / job['interval'])
+            if self._scheduled_slots.get(name) == slot:
+                continue
+
+            await manager.create_task(
+                job['task_type'],
+                time=epoch + job['offset'] + slot * job['interval'],
+                payload=job['payload'],
+                priority=job['priority'],
+                idempotency_key=f'periodic:{name}:{slot}'
+            )
+            self._scheduled_slots[name] = slot
+
+    async def _schedule_loop(self) -> None:
+        while True:
+            try:
+                await self._schedule_periodic()
+            except Exception as e:
+                _logger.error(f'Ошибка постановки периодических задач: {e}')
+            await asyncio.sleep(settings.TASK_SCHEDULE_TICK)
+
+    async def _execute(self, handler, task: Task) -> None:
+        try:
+            result = await handler(task.get_payload(), task.id)
+        except asyncio.CancelledError:
+            # Воркер останавливается: возвращаем задачу в очередь
+            await TaskDAO.mark_failed(task.id, self.worker_id, 'Прервана при остановке воркера', retry_in=timedelta(0))
+            raise
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            if task.attempts < task.max_attempts:
+                delay = retry_delay(task.attempts)
+                _logger.warning(
+                    f'Задача {task.id} ({task.task_type}) упала, повтор через {delay}',
+                    extra={'TaskId': task.id, 'Error': error}
+                )
+                await TaskDAO.mark_failed(task.id, self.worker_id, error, retry_in=delay)
+            else:
+                _logger.error(
+                    f'Задача {task.id} ({task.task_type}) завершилась с ошибкой',
+                    extra={'TaskId': task.id, 'Error': error}
+                )
+                await TaskDAO.mark_failed(task.id, self.worker_id, error)
+            return
+
+        await TaskDAO.mark_done(task.id, self.worker_id, result)
+
+
+task_worker = TaskWorker()
+
+
+async def run_standalone() -> None:
+    """
+    Запуск воркера отдельным процессом, без HTTP-сервера.
+    Останавливается по SIGTERM/SIGINT, дожидаясь текущих задач.
+    """
+    worker = TaskWorker()
+    stop = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    await worker.start()
+    _logger.info(f'Воркер задач {worker.worker_id} запущен')
+
+    await stop.wait()
+    await worker.stop()
+
+
+if __name__ == '__main__':
+    asyncio.run(run_standalone())
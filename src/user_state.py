@@ -0,0 +1,98 @@
+"""
+Версии состояния пользователей для проверки access-токенов без БД.
+
+При блокировке, разблокировке, смене группы или пароля у пользователя
+увеличивается users.state_version и обновляется state_changed_at
+(UserDAO.bump_state). Access-токен хранит версию, с которой он выдан
+(claim uv); токен с устаревшей версией не принимается.
+
+Каждый процесс раз в USER_STATE_POLL_SECONDS забирает из БД только
+изменившиеся строки (state_changed_at больше водяного знака, по индексу
+ix_users_state_changed_at), поэтому блокировка вступает в силу за
+несколько секунд, а сам запрос не обращается к БД. Хранятся только
+изменения за время жизни access-токена: более старые токены и так
+истекли.
+"""
+import asyncio
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from src.db import User, async_session_maker
+from src.logger import _logger
+from config import settings
+
+
+class UserStateCache:
+
+    def __init__(self) -> None:
+        # ID пользователя -> (текущая версия, когда изменилась)
+        self._versions: dict[int, tuple[int, datetime]] = {}
+        self._watermark: datetime | None = None
+        self._poller: asyncio.Task | None = None
+
+    @staticmethod
+    def _window() -> timedelta:
+        return timedelta(minutes=settings.ACCESS_TOKEN_MINUTES)
+
+    async def poll(self) -> int:
+        """
+        Забирает изменения состояния пользователей с прошлого опроса.
+        :return: Количество полученных изменений.
+        """
+        now = datetime.utcnow()
+        if self._watermark is None:
+            since = now - self._window()
+        else:
+            # Нахлест на случай транзакций, закоммиченных позже, чем
+            # проставлен их state_changed_at
+            since = self._watermark - timedelta(seconds=settings.USER_STATE_POLL_SECONDS * 2)
+
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(User.id, User.state_version, User.state_changed_at)
+                .where(User.state_changed_at > since)
+            )
+            rows = result.all()
+
+        versions = dict(self._versions)
+        for user_id, version, changed_at in rows:
+            known = versions.get(user_id)
+            if known is None or version > known[0]:
+                versions[user_id] = (version, changed_at)
+            if self._watermark is None or changed_at > self._watermark:
+                self._watermark = changed_at
+
+        # Токены, выданные до изменения, старше времени жизни access-токена
+        expired = now - self._window()
+        self._versions = {
+            user_id: entry for user_id, entry in versions.items() if entry[1] > expired
+        }
+        if self._watermark is None:
+            self._watermark = since
+        return len(rows)
+
+    def is_current(self, user_id: int, version: int) -> bool:
+        known = self._versions.get(user_id)
+        return known is None or version >= known[0]
+
+    async def _poll_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.USER_STATE_POLL_SECONDS)
+            try:
+                await self.poll()
+            except Exception as e:
+                _logger.error(f'Не удалось получить изменения пользователей: {e}')
+
+    async def start(self) -> None:
+        await self.poll()
+        self._poller = asyncio.create_task(self._poll_loop())
+
+    async def stop(self) -> None:
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+
+
+user_state_cache = UserStateCache()
@@ -0,0 +1,78 @@
+"""
+Бенчмарк генерации актов о списании (актов в секунду).
+
+Сравниваются:
+- исходный скрипт tests/__generate_docx_akt__.py (по одному акту);
+- src.documents.render_act последовательно в одном процессе;
+- src.documents.render_act в пуле процессов render_pool.
+
+Запуск: python tests/__bench_docx_acts__.py [кол-во актов] [процессов]
+Пример: python tests/__bench_docx_acts__.py 200 4
+
+Данные акта берутся из tests/__example_data_for_docx_akt__.json.
+БД и S3 не нужны.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.documents import render_act, render_pool
+
+ACTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+EXAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '__example_data_for_docx_akt__.json')
+
+
+def report(title: str, acts: int, elapsed: float) -> None:
+    print(f'{title:<28} {acts:>5} актов за {elapsed:7.2f} c  ({acts / elapsed:8.1f} актов/с)')
+
+
+def bench_original(data: dict, acts: int) -> None:
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from __generate_docx_akt__ import generate_document
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Исходный скрипт сохраняет файл в текущую директорию
+        os.chdir(tmp)
+        try:
+            started = time.perf_counter()
+            for _ in range(acts):
+                generate_document(data)
+            report('исходный скрипт', acts, time.perf_counter() - started)
+        finally:
+            os.chdir(cwd)
+
+
+def bench_serial(data: dict, acts: int) -> None:
+    render_act(data)  # сборка шаблона не входит в замер
+    started = time.perf_counter()
+    for _ in range(acts):
+        render_act(data)
+    report('render_act, 1 процесс', acts, time.perf_counter() - started)
+
+
+def bench_pool(data: dict, acts: int, workers: int) -> None:
+    pool = render_pool(workers)
+    # Прогрев: поднимаем процессы и собираем шаблон в каждом
+    list(pool.map(render_act, [data] * workers))
+    started = time.perf_counter()
+    sizes = list(pool.map(render_act, [data] * acts, chunksize=4))
+    report(f'render_pool, {workers} процессов', acts, time.perf_counter() - started)
+    assert all(sizes)
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    with open(EXAMPLE, encoding='utf-8') as f:
+        data = json.load(f)
+
+    print(f'Строк товаров в акте: {len(data["product_data"])}')
+    # Исходный скрипт заметно медленнее, поэтому для него берем меньше актов
+    bench_original(data, max(ACTS // 20, 5))
+    bench_serial(data, ACTS)
+    bench_pool(data, ACTS, WORKERS)
@@ -0,0 +1,197 @@
+"""
+Бенчмарк инвентаризации (src/inventory.py) на синтетическом складе.
+
+Запуск: python tests/__bench_inventory_counts__.py [предметов] [строк в пачке] [доля расхождений]
+Пример: python tests/__bench_inventory_counts__.py 1000000 5000 0.02
+Локально на SQLite: EDGE_MODE=1 EDGE_DATABASE_PATH=/tmp/bench.db python tests/__bench_inventory_counts__.py
+
+Работает с базой из config.settings (недостающие миграции применяются).
+Создается отдельный склад с предметами, после прогона он удаляется.
+
+Этапы, которые измеряются:
+- загрузка подсчетов пачками, как их присылают сканеры;
+- расчет расхождений одним UPDATE по всему пересчету;
+- утверждение всех расхождений;
+- применение корректировок порциями INVENTORY_APPLY_CHUNK.
+Для сравнения на выборке замеряется поштучное применение через
+ItemDAO.change_quantity и пересчитывается на все расхождения.
+
+После прогона проверяется, что количества совпали с подсчетом, сверка
+сводок не нашла расхождений, а у склада выставлен last_inventory_date.
+"""
+import asyncio
+import random
+import sys
+import time
+
+from sqlalchemy import delete, func, insert, select
+
+ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+BATCH = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+VARIANCE_SHARE = float(sys.argv[3]) if len(sys.argv) > 3 else 0.02
+SAMPLE = 500
+INSERT_BATCH = 50_000
+
+
+def quiet_engine() -> None:
+    # SQL-лог движка выключается, иначе бенчмарк меряет вывод в консоль
+    from src.db import engine
+
+    engine.echo = False
+
+
+async def create_depot() -> tuple[int, int, list[int]]:
+    from src.db import City, Depot, DepotItems, async_session_maker
+    from src.stock_summary import StockDelta, apply_stock_delta
+
+    async with async_session_maker() as session:
+        city_id = (await session.execute(
+            insert(City).values(name='bench inventory', country='bench')
+        )).inserted_primary_key[0]
+        depot_id = (await session.execute(insert(Depot).values(
+            name='bench inventory', city_id=city_id, address='-', working_hours='{}', postal_code=0
+        ))).inserted_primary_key[0]
+        await session.commit()
+
+    for start in range(0, ITEMS, INSERT_BATCH):
+        rows = [
+            {'depot_id': depot_id, 'name': f'bench {i}', 'barcode': f'bench-{i}', 'quantity': random.randint(0, 100), 'price': 1.0}
+            for i in range(start, min(start + INSERT_BATCH, ITEMS))
+        ]
+        async with async_session_maker() as session:
+            await session.execute(insert(DepotItems), rows)
+            await apply_stock_delta(session, StockDelta.of(rows))
+            await session.commit()
+
+    async with async_session_maker() as session:
+        item_ids = (await session.execute(
+            select(DepotItems.id).where(DepotItems.depot_id == depot_id).order_by(DepotItems.id)
+        )).scalars().all()
+    return city_id, depot_id, item_ids
+
+
+async def counted_quantities(depot_id: int, item_ids: list[int]) -> dict[int, int]:
+    from src.db import DepotItems, async_session_maker
+
+    async with async_session_maker() as session:
+        quantities = dict((await session.execute(
+            select(DepotItems.id, DepotItems.quantity).where(DepotItems.depot_id == depot_id)
+        )).all())
+
+    # Часть подсчетов расходится с учетом в обе стороны
+    for item_id in random.sample(item_ids, int(len(item_ids) * VARIANCE_SHARE)):
+        quantities[item_id] = max(0, quantities[item_id] + random.choice((-3, -1, 1, 2, 5)))
+    return quantities
+
+
+async def per_item_baseline(item_ids: list[int]) -> float:
+    from api.item.dao import ItemDAO
+
+    started = time.perf_counter()
+    for item_id in item_ids:
+        await ItemDAO.change_quantity(item_id, 1)
+    for item_id in item_ids:
+        await ItemDAO.change_quantity(item_id, -1)
+    return (time.perf_counter() - started) / (2 * len(item_ids))
+
+
+async def verify(count_id: int, depot_id: int) -> dict:
+    from src.db import Depot, DepotItems, InventoryCountLine, async_session_maker
+    from src.stock_summary import reconcile
+
+    async with async_session_maker() as session:
+        mismatched = (await session.execute(
+            select(func.count())
+            .select_from(InventoryCountLine)
+            .join(DepotItems, DepotItems.id == InventoryCountLine.item_id)
+            .where(InventoryCountLine.count_id == count_id, DepotItems.quantity != InventoryCountLine.counted_quantity)
+        )).scalar_one()
+        last_inventory_date = (await session.execute(
+            select(Depot.last_inventory_date).where(Depot.id == depot_id)
+        )).scalar_one()
+        fixed = await reconcile(session)
+        await session.commit()
+    return {'mismatched': mismatched, 'last_inventory_date': last_inventory_date, **fixed}
+
+
+async def cleanup(city_id: int, depot_id: int, count_id: int) -> None:
+    from src.db import City, Depot, DepotItems, InventoryCount, InventoryCountLine, async_session_maker
+    from src.stock_summary import reconcile
+
+    async with async_session_maker() as session:
+        await session.execute(delete(InventoryCountLine).where(InventoryCountLine.count_id == count_id))
+        await session.execute(delete(InventoryCount).where(InventoryCount.id == count_id))
+        await session.execute(delete(DepotItems).where(DepotItems.depot_id == depot_id))
+        await reconcile(session)
+        await session.execute(delete(Depot).where(Depot.id == depot_id))
+        await session.execute(delete(City).where(City.id == city_id))
+        await session.commit()
+
+
+async def main() -> bool:
+    from api.inventory.dao import InventoryCountDAO, InventoryCountStatus
+    from src.migrator import migrate
+
+    await migrate()
+    started = time.perf_counter()
+    city_id, depot_id, item_ids = await create_depot()
+    print(f'склад: {len(item_ids)} предметов за {time.perf_counter() - started:.1f} c')
+
+    quantities = await counted_quantities(depot_id, item_ids)
+    count_id = await InventoryCountDAO.create(depot_id, None, 0)
+    timings = {}
+
+    try:
+        started = time.perf_counter()
+        for start in range(0, len(item_ids), BATCH):
+            batch = item_ids[start:start + BATCH]
+            await InventoryCountDAO.stage(count_id, {item_id: quantities[item_id] for item_id in batch}, 0)
+        timings['загрузка'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        summary = await InventoryCountDAO.compute_variances(count_id)
+        timings['расхождения'] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        approved = await InventoryCountDAO.approve(count_id)
+        timings['утверждение'] = time.perf_counter() - started
+
+        # Поштучный вариант меряется до применения: он не меняет итоговые количества
+        per_item = await per_item_baseline(random.sample(item_ids, SAMPLE))
+
+        started = time.perf_counter()
+        await InventoryCountDAO.set_status(count_id, InventoryCountStatus.APPLYING, InventoryCountStatus.OPEN)
+        result = await InventoryCountDAO.apply(count_id)
+        timings['применение'] = time.perf_counter() - started
+
+        state = await verify(count_id, depot_id)
+    finally:
+        await cleanup(city_id, depot_id, count_id)
+
+    lines = summary['lines']
+    print(
+        f'строк: {lines} | расхождений: {summary["with_variance"]}'
+        f' | утверждено: {approved} | применено: {result["applied"]}'
+    )
+    for stage, elapsed in timings.items():
+        print(f'  {stage:<12} {elapsed:7.2f} c')
+    print(
+        f'  загрузка: {lines / timings["загрузка"]:.0f} строк/с'
+        f' | применение: {result["applied"] / timings["применение"]:.0f} корректировок/с'
+        f' | поштучно (ItemDAO.change_quantity): {1 / per_item:.0f} корректировок/с,'
+        f' {per_item * summary["with_variance"]:.1f} c на все расхождения'
+    )
+
+    checks = {
+        'количества = подсчету': state['mismatched'] == 0,
+        'сверка сводок без исправлений': state['stock_rows_fixed'] == 0 and state['expiry_rows_fixed'] == 0,
+        'last_inventory_date выставлен': state['last_inventory_date'] is not None,
+    }
+    for name, ok in checks.items():
+        print(f'  {"OK  " if ok else "FAIL"} {name}')
+    return all(checks.values())
+
+
+if __name__ == '__main__':
+    quiet_engine()
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -0,0 +1,64 @@
+"""
+Бенчмарк сериализации ответов: ручное копирование полей + stdlib json
+(как было в роутерах) против src.responses.dumps на orjson.
+
+Запуск: python tests/__bench_json_responses__.py [кол-во строк]
+"""
+import json
+import sys
+import time
+
+from datetime import datetime, timedelta
+
+from src.responses import dumps
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+REPEAT = 20
+
+FIELDS = (
+    'id', 'depot_id', 'name', 'barcode', 'weight', 'quantity', 'description',
+    'status', 'price', 'depot_section', 'expiration_date', 'supplier_id',
+    'item_type', 'received_at', 'created_at', 'updated_at'
+)
+
+
+def make_rows() -> list[dict]:
+    now = datetime(2025, 1, 1)
+    return [
+        {
+            'id': i, 'depot_id': i % 10, 'name': f'Предмет {i}', 'barcode': f'{i:012d}',
+            'weight': i * 0.1, 'quantity': i % 100, 'description': 'Описание предмета',
+            'status': 'active', 'price': i * 1.5, 'depot_section': i % 50,
+            'expiration_date': 1735689600 + i, 'supplier_id': i % 30, 'item_type': i % 5,
+            'received_at': now, 'created_at': now + timedelta(seconds=i), 'updated_at': None,
+        }
+        for i in range(ROWS)
+    ]
+
+
+def stdlib(rows: list[dict]) -> bytes:
+    data = []
+    for row in rows:
+        item = {field: row[field] for field in FIELDS}
+        for field in ('received_at', 'created_at', 'updated_at'):
+            item[field] = str(item[field])
+        data.append(item)
+    return json.dumps({'message': 'ok', 'data': data}, ensure_ascii=False).encode('utf-8')
+
+
+def fast(rows: list[dict]) -> bytes:
+    return dumps({'message': 'ok', 'data': rows})
+
+
+def measure(func, rows) -> float:
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        func(rows)
+    return (time.perf_counter() - started) / REPEAT
+
+
+if __name__ == '__main__':
+    rows = make_rows()
+    before = measure(stdlib, rows)
+    after = measure(fast, rows)
+    print(f'{ROWS} строк: stdlib json {before * 1000:.1f} мс | orjson {after * 1000:.1f} мс | x{before / after:.1f}')
@@ -0,0 +1,93 @@
+"""
+Бенчмарк поиска по login/email и по внешним ключам depot_items
+до и после создания индексов из миграции 0001.
+
+Запуск: python tests/__bench_lookup_indexes__.py [кол-во строк]
+
+Используется sqlite в памяти, чтобы бенчмарк не зависел от MySQL;
+абсолютные цифры на MySQL будут другими, но порядок разницы тот же.
+"""
+import random
+import sqlite3
+import sys
+import time
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+LOOKUPS = 200
+
+INDEXES = [
+    'CREATE UNIQUE INDEX ix_users_login ON users (login)',
+    'CREATE UNIQUE INDEX ix_users_email ON users (email)',
+    'CREATE INDEX ix_depot_items_depot_section ON depot_items (depot_id, depot_section)',
+    'CREATE INDEX ix_depot_items_depot_type ON depot_items (depot_id, item_type)',
+]
+
+
+def fill(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        'CREATE TABLE users (id INTEGER PRIMARY KEY, login TEXT, email TEXT, password_hash TEXT)'
+    )
+    conn.execute(
+        'CREATE TABLE depot_items (id INTEGER PRIMARY KEY, depot_id INTEGER, '
+        'depot_section INTEGER, item_type INTEGER, quantity INTEGER)'
+    )
+    conn.executemany(
+        'INSERT INTO users (login, email, password_hash) VALUES (?, ?, ?)',
+        ((f'user{i}', f'user{i}@depot.ru', 'hash') for i in range(ROWS))
+    )
+    conn.executemany(
+        'INSERT INTO depot_items (depot_id, depot_section, item_type, quantity) VALUES (?, ?, ?, ?)',
+        (
+            (i % 100, i % 5000, i % 50, i % 17)
+            for i in range(ROWS)
+        )
+    )
+    conn.commit()
+
+
+def run_lookups(conn: sqlite3.Connection) -> dict[str, float]:
+    rnd = random.Random(42)
+    timings = {}
+
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        conn.execute('SELECT id FROM users WHERE login = ?', (f'user{rnd.randrange(ROWS)}',)).fetchone()
+    timings['users.login'] = (time.perf_counter() - started) / LOOKUPS
+
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        conn.execute('SELECT id FROM users WHERE email = ?', (f'user{rnd.randrange(ROWS)}@depot.ru',)).fetchone()
+    timings['users.email'] = (time.perf_counter() - started) / LOOKUPS
+
+    started = time.perf_counter()
+    for _ in range(LOOKUPS):
+        depot_id = rnd.randrange(100)
+        conn.execute(
+            'SELECT id, quantity FROM depot_items WHERE depot_id = ? AND depot_section = ?',
+            (depot_id, depot_id + 100 * rnd.randrange(50))
+        ).fetchall()
+    timings['depot_items(depot_id, depot_section)'] = (time.perf_counter() - started) / LOOKUPS
+
+    return timings
+
+
+if __name__ == '__main__':
+    conn = sqlite3.connect(':memory:')
+    print(f'Заполнение {ROWS} строк...')
+    fill(conn)
+
+    before = run_lookups(conn)
+
+    started = time.perf_counter()
+    for statement in INDEXES:
+        conn.execute(statement)
+    print(f'Создание индексов: {time.perf_counter() - started:.2f} c')
+
+    after = run_lookups(conn)
+
+    for name in before:
+        print(
+            f'{name:40} без индекса {before[name] * 1000:9.3f} мс'
+            f' | с индексом {after[name] * 1000:7.3f} мс'
+            f' | x{before[name] / after[name]:.0f}'
+        )
@@ -0,0 +1,194 @@
+"""
+Бенчмарк резервов остатков (src/reservations.py): тысячи параллельных
+попыток зарезервировать один и тот же предмет из нескольких процессов.
+
+Запуск: python tests/__bench_reservations__.py [попыток на процесс] [процессы] [остаток]
+Пример: python tests/__bench_reservations__.py 1000 4 1000
+
+Работает с базой из config.settings. Создается отдельный предмет на
+первом складе, после прогона он и его резервы удаляются.
+
+Каждая попытка резервирует 1-3 штуки; удачный резерв сразу
+подтверждается, отменяется или остается висеть до истечения (TTL 1 c).
+После прогона проверяется:
+- подтверждено + активно <= начального остатка (нет перепродажи);
+- quantity = остаток - подтверждено;
+- reserved_quantity = сумме активных резервов, а после сборщика - 0;
+- обычное списание (ItemDAO.change_quantity) не съедает зарезервированное:
+  на отдельном предмете резервируется весь остаток, списание отклоняется,
+  а подтверждение резерва не уводит количество в минус.
+"""
+import asyncio
+import multiprocessing
+import random
+import sys
+import time
+
+from sqlalchemy import delete, func, insert, select
+
+ATTEMPTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+PROCESSES = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+STOCK = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+CONCURRENCY = 50
+
+
+def quiet_engine() -> None:
+    # SQL-лог движка выключается, иначе бенчмарк меряет вывод в консоль
+    from src.db import engine
+
+    engine.echo = False
+
+
+def worker_process(item_id: int, results) -> None:
+    from api.reservation.dao import ReservationDAO
+    from exceptions import InsufficientStockException
+
+    quiet_engine()
+
+    async def attempt(semaphore: asyncio.Semaphore, counters: dict) -> None:
+        action = random.randrange(3)
+        async with semaphore:
+            try:
+                reservation = await ReservationDAO.reserve(
+                    item_id=item_id, quantity=random.randint(1, 3), user_id=0,
+                    # Неподтвержденные резервы должны истечь к проверке сборщика
+                    ttl_seconds=1 if action == 2 else 60
+                )
+            except InsufficientStockException:
+                counters['rejected'] += 1
+                return
+            except Exception:
+                # Ошибка БД (таймаут блокировки и т.п.): транзакция откатилась
+                counters['errors'] += 1
+                return
+
+            counters['reserved'] += 1
+            if action == 0:
+                await ReservationDAO.commit(reservation['id'])
+            elif action == 1:
+                await ReservationDAO.release(reservation['id'])
+
+    async def main() -> dict:
+        semaphore = asyncio.Semaphore(CONCURRENCY)
+        counters = {'reserved': 0, 'rejected': 0, 'errors': 0}
+        await asyncio.gather(*(attempt(semaphore, counters) for _ in range(ATTEMPTS)))
+        return counters
+
+    results.put(asyncio.run(main()))
+
+
+async def create_item(quantity: int = STOCK) -> int:
+    from src.db import Depot, DepotItems, async_session_maker
+    from src.stock_summary import StockDelta, apply_stock_delta
+
+    async with async_session_maker() as session:
+        depot_id = await session.scalar(select(func.min(Depot.id)))
+        if depot_id is None:
+            sys.exit('Нужен хотя бы один склад в БД')
+
+        row = {'depot_id': depot_id, 'name': 'bench reservation', 'barcode': 'bench-reservation', 'quantity': quantity}
+        result = await session.execute(insert(DepotItems).values(**row))
+        await apply_stock_delta(session, StockDelta.of([row]))
+        await session.commit()
+    return result.inserted_primary_key[0]
+
+
+async def totals(item_id: int) -> dict:
+    from src.db import DepotItems, StockReservation, async_session_maker
+
+    async with async_session_maker() as session:
+        item = (await session.execute(
+            select(DepotItems.quantity, DepotItems.reserved_quantity).where(DepotItems.id == item_id)
+        )).one()
+        by_status = dict((await session.execute(
+            select(StockReservation.status, func.sum(StockReservation.quantity))
+            .where(StockReservation.item_id == item_id)
+            .group_by(StockReservation.status)
+        )).all())
+    return {'quantity': item.quantity, 'reserved': item.reserved_quantity, **by_status}
+
+
+async def sweep_and_cleanup(item_id: int) -> dict:
+    from api.item.dao import ItemDAO
+    from api.reservation.dao import ReservationDAO
+    from src.db import StockReservation, async_session_maker
+
+    await asyncio.sleep(1.1)
+    while await ReservationDAO.expire_due(500):
+        pass
+    swept = await totals(item_id)
+
+    await ItemDAO.delete_item(item_id)
+    async with async_session_maker() as session:
+        await session.execute(delete(StockReservation).where(StockReservation.item_id == item_id))
+        await session.commit()
+    return swept
+
+
+async def write_off_over_hold() -> bool:
+    from api.item.dao import ItemDAO
+    from api.reservation.dao import ReservationDAO
+    from src.db import StockReservation, async_session_maker
+    from exceptions import InsufficientStockException
+
+    item_id = await create_item(10)
+    try:
+        reservation = await ReservationDAO.reserve(item_id=item_id, quantity=10, user_id=0, ttl_seconds=60)
+        try:
+            await ItemDAO.change_quantity(item_id, -10)
+            rejected = False
+        except InsufficientStockException:
+            rejected = True
+        await ReservationDAO.commit(reservation['id'])
+        state = await totals(item_id)
+    finally:
+        await ItemDAO.delete_item(item_id)
+        async with async_session_maker() as session:
+            await session.execute(delete(StockReservation).where(StockReservation.item_id == item_id))
+            await session.commit()
+    return rejected and state['quantity'] == 0 and state['reserved'] == 0
+
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method('spawn')
+    quiet_engine()
+
+    item_id = asyncio.run(create_item())
+    results = multiprocessing.Queue()
+
+    started = time.perf_counter()
+    processes = [
+        multiprocessing.Process(target=worker_process, args=(item_id, results))
+        for _ in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    counters = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    state = asyncio.run(totals(item_id))
+    swept = asyncio.run(sweep_and_cleanup(item_id))
+    guarded = asyncio.run(write_off_over_hold())
+
+    attempts = ATTEMPTS * PROCESSES
+    reserved = sum(counter['reserved'] for counter in counters)
+    errors = sum(counter['errors'] for counter in counters)
+    committed, active = state.get('committed', 0), state.get('active', 0)
+    checks = {
+        'нет перепродажи': committed + active <= STOCK,
+        'quantity = остаток - подтверждено': state['quantity'] == STOCK - committed,
+        'reserved_quantity = активные резервы': state['reserved'] == active,
+        'после сборщика reserved_quantity = 0': swept['reserved'] == 0 and not swept.get('active'),
+        'списание не съедает резерв': guarded,
+    }
+
+    print(
+        f'процессов: {PROCESSES} | попыток: {attempts} за {elapsed:.1f} c | {attempts / elapsed:.0f} попыток/с'
+        f' | резервов: {reserved}, отказов: {attempts - reserved - errors}, ошибок: {errors}'
+        f' | подтверждено: {committed}, активно: {active}, остаток: {state["quantity"]}'
+    )
+    for name, ok in checks.items():
+        print(f'  {"OK  " if ok else "FAIL"} {name}')
+    sys.exit(0 if all(checks.values()) else 1)
@@ -0,0 +1,61 @@
+"""
+Бенчмарк планирования доставки (src/routing.py) на случайных точках.
+
+Запуск: python tests/__bench_routing__.py [кол-во точек через запятую] [кол-во машин]
+Пример: python tests/__bench_routing__.py 100,200,500 10
+
+Точки разбрасываются в квадрате ~100x100 км вокруг Екатеринбурга, у
+каждой точки одна отправка весом 50-500 кг. Выводится время построения
+плана и длина маршрутов до и после 2-opt. БД не нужна.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.routing import _nearest_neighbour, build_plan, distance_matrix, plan_route
+
+STOPS = [int(x) for x in (sys.argv[1] if len(sys.argv) > 1 else '100,200,500').split(',')]
+CARS = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+ORIGIN = (56.8389, 60.6057)
+
+
+def random_shipments(stops: int, rng: np.random.Generator) -> list[dict]:
+    points = np.array(ORIGIN) + rng.uniform(-0.45, 0.45, size=(stops, 2)) * [1.0, 1.8]
+    return [
+        {'depot_id': index + 1, 'coordinates': tuple(point), 'weight': float(rng.uniform(50, 500))}
+        for index, point in enumerate(points)
+    ]
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(42)
+
+    for stops in STOPS:
+        shipments = random_shipments(stops, rng)
+        total_weight = sum(shipment['weight'] for shipment in shipments)
+        # Суммарной грузоподъемности хватает с запасом 20%
+        payload = int(total_weight * 1.2 / CARS)
+        cars = [{'id': i + 1, 'name': f'car {i + 1}', 'vehicle_payload': payload} for i in range(CARS)]
+
+        build_plan(ORIGIN, shipments, cars)  # прогрев
+        started = time.perf_counter()
+        plan = build_plan(ORIGIN, shipments, cars)
+        elapsed = time.perf_counter() - started
+
+        # Один маршрут по всем точкам: жадный против жадного + 2-opt
+        matrix = distance_matrix(np.array([ORIGIN] + [s['coordinates'] for s in shipments]))
+        greedy = _nearest_neighbour(matrix, stops) + [0]
+        greedy_km = float(matrix[greedy[:-1], greedy[1:]].sum())
+        started = time.perf_counter()
+        _, improved_km = plan_route(matrix)
+        route_elapsed = time.perf_counter() - started
+
+        print(
+            f'{stops:>5} точек, {CARS} машин: план {elapsed * 1000:7.1f} мс, '
+            f'{len(plan["cars"])} машин в работе, {len(plan["unassigned"])} не поместилось; '
+            f'один маршрут: {greedy_km:8.1f} км -> {improved_km:8.1f} км за {route_elapsed * 1000:7.1f} мс'
+        )
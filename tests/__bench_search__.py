@@ -0,0 +1,60 @@
+"""
+Бенчмарк поиска (api/search/dao.py): задержка запросов по предметам.
+
+Запуск: python tests/__bench_search__.py [запросы через запятую] [повторов]
+Пример: python tests/__bench_search__.py молоко,молако,шоколад,хлеб 50
+
+Работает с базой из config.settings (для FULLTEXT нужен MySQL и
+примененная миграция 0006). Данные не изменяются. Для каждого запроса
+выводится медиана и p95 времени полнотекстового поиска (первая страница
+из 20 строк) и автодополнения по первым трем буквам.
+"""
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+QUERIES = (sys.argv[1] if len(sys.argv) > 1 else 'молоко,молако,шоколад,хлеб').split(',')
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+
+async def measure(call) -> tuple[float, float]:
+    await call()  # прогрев
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+async def main() -> None:
+    from sqlalchemy import func, select
+
+    from api.search.dao import SearchDAO, SearchKind
+    from src.db import DepotItems, async_session_maker, engine
+
+    engine.echo = False
+    async with async_session_maker() as session:
+        total = (await session.execute(select(func.count()).select_from(DepotItems))).scalar()
+    print(f'Предметов в depot_items: {total}, диалект: {engine.dialect.name}')
+
+    for query in QUERIES:
+        rows, _ = await SearchDAO.search(SearchKind.ITEMS, query)
+        search = await measure(lambda: SearchDAO.search(SearchKind.ITEMS, query))
+        complete = await measure(lambda: SearchDAO.autocomplete(SearchKind.ITEMS, query[:3]))
+        print(
+            f'{query:<15} найдено {len(rows):>2} на странице | '
+            f'поиск: медиана {search[0]:6.1f} мс, p95 {search[1]:6.1f} мс | '
+            f'автодополнение: медиана {complete[0]:6.1f} мс, p95 {complete[1]:6.1f} мс'
+        )
+
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
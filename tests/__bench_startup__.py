@@ -0,0 +1,74 @@
+"""
+Бенчмарк холодного старта воркера: время импорта app и построения
+схемы OpenAPI, каждый замер - в новом процессе.
+
+Запуск: python tests/__bench_startup__.py [кол-во повторов] [кол-во модулей в топе]
+Пример: python tests/__bench_startup__.py 5 15
+
+Выводится медиана времени импорта app, время первого app.openapi() и
+самые долгие по собственному времени модули из python -X importtime.
+Модули, которые должны грузиться лениво (LAZY_MODULES), проверяются
+отдельно: если какой-то из них импортируется при старте, это видно в
+выводе. БД не нужна, подключение при импорте не открывается.
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TOP = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+# Тяжелые подсистемы, которые не должны импортироваться вместе с app
+LAZY_MODULES = (
+    'aiohttp', 'aioboto3', 'botocore', 'pyotp', 'qrcode', 'numpy',
+    'docx', 'openpyxl', 'pyinstrument', 'sqlalchemy.dialects.postgresql',
+)
+
+MEASURE = '''
+import sys, time, json
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.api.openapi()
+schema = time.perf_counter()
+print(json.dumps({
+    'import': imported - started,
+    'openapi': schema - imported,
+    'lazy_loaded': [name for name in %r if name in sys.modules],
+}))
+''' % (LAZY_MODULES,)
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, '-c', code],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+
+def self_times(stderr: str) -> list[tuple[int, str]]:
+    times = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, _, name = line.removeprefix('import time:').split('|')
+        times.append((int(own), name.strip()))
+    return sorted(times, reverse=True)
+
+
+if __name__ == '__main__':
+    import json
+
+    results = [json.loads(run(MEASURE).stdout.splitlines()[-1]) for _ in range(RUNS)]
+    print(f'Импорт app:         {statistics.median(r["import"] for r in results) * 1000:8.1f} мс (медиана из {RUNS})')
+    print(f'Первый app.openapi: {statistics.median(r["openapi"] for r in results) * 1000:8.1f} мс')
+
+    loaded = results[-1]['lazy_loaded']
+    print(f'Загружены при старте ленивые модули: {", ".join(loaded) if loaded else "нет"}')
+
+    print(f'\nТоп-{TOP} модулей по собственному времени импорта:')
+    for own, name in self_times(run('import app', '-X', 'importtime').stderr)[:TOP]:
+        print(f'  {own / 1000:8.1f} мс  {name}')
@@ -0,0 +1,118 @@
+"""
+Бенчмарк пропускной способности воркеров задач (задач в секунду)
+в зависимости от количества процессов-воркеров.
+
+Запуск: python tests/__bench_task_workers__.py [кол-во задач] [воркеры через запятую]
+Пример: python tests/__bench_task_workers__.py 5000 1,2,4,8
+
+Работает с базой из config.settings. Задачи бенчмарка имеют
+idempotency_key с префиксом bench: и удаляются после прогона.
+После каждого прогона проверяется, что ни одна задача не была
+выполнена дважды (attempts == 1 у всех задач).
+"""
+import asyncio
+import multiprocessing
+import sys
+import time
+import uuid
+
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+
+TASKS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+WORKERS = [int(x) for x in (sys.argv[2] if len(sys.argv) > 2 else '1,2,4').split(',')]
+TASK_TYPE = 'send_notification'
+
+
+def worker_process(run_id: str) -> None:
+    from api.task.dao import TaskStatus
+    from src.db import Task, async_session_maker
+    from src.manager import TaskManager
+    from src.tasks import TaskWorker
+
+    @TaskManager.handler(TASK_TYPE, concurrency=32)
+    async def noop(payload: dict, task_id: int) -> None:
+        # Имитация короткой I/O-задачи
+        await asyncio.sleep(0.005)
+
+    async def main():
+        worker = TaskWorker(poll_interval=0.05)
+        await worker.start()
+        while True:
+            await asyncio.sleep(0.2)
+            async with async_session_maker() as session:
+                left = await session.scalar(
+                    select(func.count()).select_from(Task).where(
+                        Task.idempotency_key.like(f'bench:{run_id}:%'),
+                        Task.status.in_([TaskStatus.PENDING, TaskStatus.RUNNING])
+                    )
+                )
+            if not left:
+                break
+        await worker.stop()
+
+    asyncio.run(main())
+
+
+async def enqueue(run_id: str) -> None:
+    from api.task.dao import TaskStatus
+    from src.db import Task, async_session_maker
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'task_type': TASK_TYPE, 'status': TaskStatus.PENDING, 'priority': 0,
+            'payload': '{}', 'progress': 0, 'attempts': 0, 'max_attempts': 3,
+            'idempotency_key': f'bench:{run_id}:{i}', 'run_at': now, 'created_at': now,
+        }
+        for i in range(TASKS)
+    ]
+    async with async_session_maker() as session:
+        await session.execute(insert(Task), rows)
+        await session.commit()
+
+
+async def check_and_cleanup(run_id: str) -> tuple[int, int]:
+    from src.db import Task, async_session_maker
+
+    pattern = f'bench:{run_id}:%'
+    async with async_session_maker() as session:
+        done = await session.scalar(
+            select(func.count()).select_from(Task).where(
+                Task.idempotency_key.like(pattern), Task.status == 'done'
+            )
+        )
+        duplicates = await session.scalar(
+            select(func.count()).select_from(Task).where(
+                Task.idempotency_key.like(pattern), Task.attempts > 1
+            )
+        )
+        await session.execute(delete(Task).where(Task.idempotency_key.like(pattern)))
+        await session.commit()
+    return done, duplicates
+
+
+if __name__ == '__main__':
+    multiprocessing.set_start_method('spawn')
+
+    for workers in WORKERS:
+        run_id = uuid.uuid4().hex[:8]
+        asyncio.run(enqueue(run_id))
+
+        started = time.perf_counter()
+        processes = [
+            multiprocessing.Process(target=worker_process, args=(run_id,))
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - started
+
+        done, duplicates = asyncio.run(check_and_cleanup(run_id))
+        print(
+            f'воркеров: {workers:2} | {done}/{TASKS} задач за {elapsed:.1f} c'
+            f' | {done / elapsed:.0f} задач/с | повторных выполнений: {duplicates}'
+        )